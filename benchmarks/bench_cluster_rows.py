@@ -0,0 +1,58 @@
+"""
+Benchmark: cluster_rows against the original word-by-word walk on large pages.
+
+    python benchmarks/bench_cluster_rows.py [--words 2500] [--pages 50]
+
+Both sides get the same shuffled tops and must produce the same rows. The walk gets
+them as a list, cluster_rows as the page's top array (as PageWords keeps it) and only
+returns index ranges. The script prints the per-page time of each and the speedup,
+for y_tolerance 3 and 5.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))  # the reference walk lives with its test
+
+import main as valarix  # noqa: E402
+from test_cluster_rows import clustered_rows, random_page_tops, reference_rows  # noqa: E402
+
+
+def best_of(fn, pages, repeat=5):
+    """Best total seconds over repeat runs of fn on every page."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for tops in pages:
+            fn(tops)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=2500, help="words per page (default 2500)")
+    parser.add_argument("--pages", type=int, default=50, help="pages per run (default 50)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [random_page_tops(rng, args.words) for _ in range(args.pages)]
+    top_arrays = [np.asarray(tops, dtype=float) for tops in pages]
+    print(f"{args.pages} pages x {args.words} words")
+    for y_tolerance in (3, 5):
+        for tops in pages:
+            assert clustered_rows(tops, y_tolerance) == reference_rows(tops, y_tolerance)
+        walk = best_of(lambda tops: reference_rows(tops, y_tolerance), pages)
+        vectorized = best_of(lambda tops: valarix.cluster_rows(tops, y_tolerance), top_arrays)
+        print(f"y_tolerance={y_tolerance}: walk {walk / args.pages * 1e3:.3f} ms/page, "
+              f"cluster_rows {vectorized / args.pages * 1e3:.3f} ms/page ({walk / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
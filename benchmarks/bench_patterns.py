@@ -0,0 +1,105 @@
+"""
+Micro-benchmark: per-row regex cost of the movement hot path, with patterns compiled
+inline (as before the module-level registry) and with the registry's compiled patterns.
+
+    python benchmarks/bench_patterns.py [--rows 100000]
+
+Both sides run the same steps over a synthetic Banorte-style word stream: every word
+is checked for an amount and a date, dated words for the full DIA-MES-AÑO date, and
+every row goes through the is_transaction_row date check. The results must agree.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as valarix  # noqa: E402
+
+MONTHS = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+DATE_SOURCE = (r"\b(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?"
+               r"|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])"
+               r"|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})\b")
+
+
+def word_stream(rows, seed=0):
+    """rows movement rows of (words, row_data), words as pdfplumber-style dicts."""
+    rng = random.Random(seed)
+    stream = []
+    for _ in range(rows):
+        date = f"{rng.randint(1, 28):02d}-{rng.choice(MONTHS)}-{rng.randint(20, 25)}"
+        amount = f"{rng.uniform(1, 90000):,.2f}"
+        saldo = f"{rng.uniform(1, 900000):,.2f}"
+        texts = [date + rng.choice(["", "EST", "I.V.A"]), "PAGO", "SPEI", f"REF{rng.randint(1000, 9999)}",
+                 amount, saldo]
+        words = [{"text": text, "x0": 20 + 60 * n, "x1": 70 + 60 * n} for n, text in enumerate(texts)]
+        stream.append((words, {"fecha": date, "cargos": amount, "abonos": "", "saldo": saldo}))
+    return stream
+
+
+def row_before(words, row_data):
+    """The hot path's regex steps with the patterns compiled where they were used."""
+    date_pattern = re.compile(DATE_SOURCE, re.I)  # extract_movement_row, per call
+    found = []
+    for word in words:
+        text = word["text"]
+        m = valarix.DEC_AMOUNT_RE.search(text)
+        date_match = date_pattern.search(text)
+        date_text = date_match.group() if date_match else None
+        if date_match:
+            banorte_match = re.compile(r'(\d{1,2}-[A-Z]{3}-\d{2,4})', re.I).search(text)  # per word
+            if banorte_match:
+                date_text = banorte_match.group(1)
+        found.append((m.group() if m else None, date_text))
+    day_re = re.compile(DATE_SOURCE, re.I)  # is_transaction_row, per call
+    has_date = bool(day_re.search((row_data.get("fecha") or "").strip()))
+    return found, has_date and bool(row_data["cargos"] or row_data["abonos"] or row_data["saldo"])
+
+
+def row_after(words, row_data):
+    """The same steps with the registry's compiled patterns."""
+    found = []
+    for word in words:
+        text = word["text"]
+        m = valarix.DEC_AMOUNT_RE.search(text)
+        date_match = valarix.DATE_RE.search(text)
+        date_text = date_match.group() if date_match else None
+        if date_match:
+            banorte_match = valarix.BANORTE_DATE_RE.search(text)
+            if banorte_match:
+                date_text = banorte_match.group(1)
+        found.append((m.group() if m else None, date_text))
+    return found, valarix.is_transaction_row(row_data)
+
+
+def best_of(fn, stream, repeat=3):
+    """Best seconds over repeat passes of fn over the whole stream."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for words, row_data in stream:
+            fn(words, row_data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="rows in the stream (default 100000)")
+    args = parser.parse_args()
+
+    stream = word_stream(args.rows)
+    for words, row_data in stream[:1000]:
+        assert row_before(words, row_data) == row_after(words, row_data)
+    before = best_of(row_before, stream)
+    after = best_of(row_after, stream)
+    print(f"{args.rows} rows x {len(stream[0][0])} words")
+    print(f"inline compile: {before / args.rows * 1e6:.2f} us/row")
+    print(f"registry:       {after / args.rows * 1e6:.2f} us/row ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,55 @@
+from __future__ import annotations
+
 import sys
 import os
 import re
-import pdfplumber
-import pandas as pd
+import datetime
+import glob
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import marshal
+import math
+import signal
+import sqlite3
+import statistics
+import threading
+import time
+import unicodedata
+import zlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, redirect_stdout
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from operator import itemgetter
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+
+class _LazyModule:
+    """
+    Stand-in for a heavy module (pandas, NumPy, pdfplumber): the real import happens on
+    first attribute access, then the module-level name is rebound to the real module.
+    Keeps usage errors and --find from paying for imports they never use.
+    """
+
+    def __init__(self, global_name: str, module_name: str):
+        self._global_name = global_name
+        self._module_name = module_name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._module_name)
+        globals()[self._global_name] = module
+        return getattr(module, attr)
+
+
+pdfplumber = _LazyModule("pdfplumber", "pdfplumber")
+np = _LazyModule("np", "numpy")
+pd = _LazyModule("pd", "pandas")
 
 
 # Bank configurations with column coordinate ranges (X-axis)
@@ -114,8 +161,41 @@ BANK_CONFIGS = {
 
 DEFAULT_BANK = "BBVA"
 
+# Column ranges saved by --calibrate. They are only used when asked for: --config on a
+# conversion run, or this environment variable (unset by default), and never change BANK_CONFIGS
+BANK_CONFIG_ENV = "VALARIX_BANK_CONFIGS"
+DEFAULT_BANK_CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".config", "valarix", "bank_configs.json")
+
+
+def bank_config_path(path: str = None) -> str:
+    """The calibrated config file to use: path (--config), else $VALARIX_BANK_CONFIGS, else None."""
+    return path or os.environ.get(BANK_CONFIG_ENV) or None
+
+
+def load_bank_config_file(path: str) -> dict:
+    """Read calibrated bank configs ({bank: {"name", "columns"}}) from a JSON file; {} if missing or invalid."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return {
+            bank_name: {"name": bank_name, "columns": {col: tuple(rng) for col, rng in cfg["columns"].items()}}
+            for bank_name, cfg in data.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def save_bank_config(bank_name: str, columns: dict, path: str = DEFAULT_BANK_CONFIG_FILE):
+    """Add or replace one bank's column ranges in the JSON config file (created if missing)."""
+    configs = load_bank_config_file(path)
+    configs[bank_name] = {"name": bank_name, "columns": columns}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(configs, fh, ensure_ascii=False, indent=2)
+
+
 # Bank detection keywords (case insensitive)
-# Order matters: more specific patterns should come first
+# Every hit scores for its bank; multi-word phrases are more specific and weigh double
 BANK_KEYWORDS = {
     
     "BBVA": [
@@ -170,9 +250,187 @@ BANK_KEYWORDS = {
     ],
 }
 
+# Stop reading pages once the leading bank has this score...
+BANK_DETECT_DECISIVE_SCORE = 2
+# ...and at least this many times the runner-up's score
+BANK_DETECT_MARGIN = 2
+
+
+def _compile_bank_detector():
+    """
+    Compile BANK_KEYWORDS (plus each bank's own name as a whole word) into a single
+    alternation with one named group per keyword, so a page is scanned once. Phrases
+    are tried before bare names, so "BBVA BANCOMER" scores as the phrase.
+    Returns the regex and {group name: (bank name, weight)}.
+    """
+    keywords = []
+    for bank_name, patterns in BANK_KEYWORDS.items():
+        name_pattern = rf"\b{re.escape(bank_name.upper())}\b"
+        for pattern in patterns + ([name_pattern] if name_pattern not in patterns else []):
+            keywords.append((pattern, bank_name, 2 if r"\s" in pattern else 1))
+    keywords.sort(key=lambda keyword: -keyword[2])
+    alternation = "|".join(f"(?P<k{i}>{pattern})" for i, (pattern, _, _) in enumerate(keywords))
+    groups = {f"k{i}": (bank_name, weight) for i, (_, bank_name, weight) in enumerate(keywords)}
+    return re.compile(alternation, re.I), groups
+
+
+BANK_DETECT_RE, BANK_DETECT_GROUPS = _compile_bank_detector()
+
+# Document info entries that can name the issuing bank (checked before any page layout)
+BANK_METADATA_FIELDS = ("Title", "Author", "Subject", "Creator", "Producer")
+
+
+def ascii_fold(text: str) -> str:
+    """Drop accents (and anything else outside ASCII): "Depósitos" -> "Depositos"."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+
+
+# Subset tag of an embedded font name ("ABCDEF+"), and the name's segments after it:
+# "BentonSansBBVA-Book" -> Benton, Sans, BBVA, Book
+FONT_SUBSET_RE = re.compile(r'^[A-Z]{6}\+')
+FONT_SEGMENT_RE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+# Bank names as lowercase ASCII without spaces, to compare against runs of font name segments
+BANK_FONT_NAMES = {ascii_fold(bank_name).lower().replace(" ", ""): bank_name for bank_name in BANK_KEYWORDS}
+# A bank named in the fonts adds this to its text score (a keyword hit weighs 1 or 2)
+BANK_FONT_HINT_WEIGHT = 1
+# Confidence of a bank named only by the fonts, with no bank keyword in the page text
+BANK_FONT_CONFIDENCE = 0.5
+
+
+def font_name_banks(font_names) -> set:
+    """
+    Banks named by page-1 font names: a bank name must equal one or more whole, consecutive
+    segments of a font name (split on '+', '-' and case changes), so "BentonSansBBVA-Book"
+    names BBVA and "BanBajio-Bold" Banbajío, but "ClarendonBT" doesn't name Clara.
+    """
+    banks = set()
+    for font_name in font_names:
+        name = FONT_SUBSET_RE.sub('', ascii_fold(font_name))
+        segments = [segment.lower() for segment in FONT_SEGMENT_RE.findall(name)]
+        for start in range(len(segments)):
+            joined = ""
+            for segment in segments[start:]:
+                joined += segment
+                if joined in BANK_FONT_NAMES:
+                    banks.add(BANK_FONT_NAMES[joined])
+                elif not any(name.startswith(joined) for name in BANK_FONT_NAMES):
+                    break
+    return banks
+
 # Decimal / thousands amount regex (module-level so helpers can use it)
 DEC_AMOUNT_RE = re.compile(r"\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2})")
 
+# Compiled pattern registry: every hot path uses these instead of compiling per call
+# Movement date: "05 ENE", "05/ENE/23", "ENE 05", "05 ENE 2023"
+DATE_PATTERN = (
+    r"(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?"
+    r"|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])"
+    r"|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})"
+)
+DATE_RE = re.compile(r"\b" + DATE_PATTERN + r"\b", re.I)
+DATE_ANYWHERE_RE = re.compile(DATE_PATTERN, re.I)     # Same date without word boundaries (findall)
+BANORTE_DATE_RE = re.compile(r'(\d{1,2}-[A-Z]{3}-\d{2,4})', re.I)
+HOUR_RE = re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?\b')
+CURRENCY_AMOUNT_RE = re.compile(r'\$?\s*(\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2}))', re.I)
+HEADER_KEYWORDS_RE = re.compile(r"(?:(?=.*\bfecha\b)(?=.*\bdescripcion\b))|(?:\bconcepto\b)", re.I)
+
+# Section markers
+DIGITEM_RE = re.compile(r'\bDIGITEM\b', re.I)
+DETALLE_OPERACIONES_RE = re.compile(r'DETALLE\s+DE\s+OPERACIONES', re.I)
+TRANSFERENCIA_RE = re.compile(r'TRANSFERENCIA\s+ELECTRONICA\s+DE\s+FONDOS', re.I)
+TOTALES_RE = re.compile(r'^TOTALES:', re.I)
+DAY_MONTH_RE = re.compile(r'(\d{1,2})\s+([A-Z]{3})')
+
+# Per-bank movement section markers (banks not listed use the generic date/header scan)
+MOVEMENT_START_PATTERNS = {
+    "Inbursa": (
+        re.compile(r'DETALLE\s+DE\s+MOVIMIENTOS', re.I),
+        re.compile(r'FECHA.*?REFERENCIA.*?CONCEPTO.*?CARGOS.*?ABONOS.*?SALDO', re.I),
+    ),
+    "Banorte": (
+        re.compile(r'DETALLE\s+DE\s+MOVIMIENTOS\s*\(PESOS\)', re.I),
+    ),
+}
+MOVEMENT_END_PATTERNS = {
+    "Banamex": re.compile(r'SALDO\s+MINIMO\s+REQUERIDO', re.I),
+    # Santander: "TOTAL 821,646.20 820,238.73 1,417.18"
+    "Santander": re.compile(r'^TOTAL\s+[\d,\.]+\s+[\d,\.]+\s+[\d,\.]+', re.I),
+    "Banorte": re.compile(r'INVERSION\s+ENLACE\s+NEGOCIOS', re.I),
+}
+
+# Summary sheet line formatting
+SUMMARY_PERIODO_RE = re.compile(r'periodo\s+del\s+(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s+al\s+(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})', re.I)
+SUMMARY_CUENTA_RE = re.compile(r'(no\.?\s*de\s+(?:cuenta|cliente))\s+(.+)', re.I)
+SUMMARY_SLASH_RE = re.compile(r'^([A-Za-z][A-Za-z\s]+?)\s*/\s*([A-Za-z][A-Za-z\s]*(?:\([^)]+\))?)\s+(\d+(?:,\d{3})*(?:\.\d{2})?)\s+([\d,\.\s]+)$', re.I)
+SUMMARY_COMPANY_RE = re.compile(r'\b(SA DE CV|S\.A\.|S\.A\. DE C\.V\.|S\.R\.L\.|INC\.|CORP\.|LLC)\b', re.I)
+SUMMARY_NUMBER_TOKEN_RE = re.compile(r'^\d{1,3}(?:,\d{3})*(?:\.\d{2})?$|^\d+(?:\.\d{2})?$')
+SUMMARY_DATE_TOKEN_RE = re.compile(r'^\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}$')
+SUMMARY_KV_RE = re.compile(r'^([A-Za-z][A-Za-z\s]+(?:de|del|la|el|los|las)?)\s{2,}(.+)$', re.I)
+SUMMARY_VALUE_RE = re.compile(r'(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}|[\d,\.]+)')
+TRAILING_PUNCT_RE = re.compile(r'[:\-]+$')
+
+# Month abbreviations found in statements (Spanish first, English variants used by some banks)
+MONTH_NUMBERS = {
+    "ENE": 1, "FEB": 2, "MAR": 3, "ABR": 4, "MAY": 5, "JUN": 6,
+    "JUL": 7, "AGO": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DIC": 12,
+    "JAN": 1, "APR": 4, "AUG": 8, "DEC": 12,
+}
+DAY_TOKEN_RE = re.compile(r'\d{1,2}')
+MONTH_TOKEN_RE = re.compile(r'[A-Za-z]{3}')
+
+
+class WordToken(NamedTuple):
+    """Classification of a word's text, computed once per distinct text by classify_word()."""
+    kind: str                  # "time", "date", "amount" or "text" (first that applies)
+    date_span: tuple           # (start, end) of the first DATE_RE match, or None
+    dates: tuple               # Every DATE_RE match (findall), used to split joined dates
+    banorte_date_span: tuple   # (start, end) of the first DIA-MES-AÑO match, or None
+    amount: str                # First DEC_AMOUNT_RE match, or None
+    amount_count: int          # Number of DEC_AMOUNT_RE matches
+    day: int                   # Day of the first date, or None
+    month: int                 # Month number of the first date, or None
+
+
+@lru_cache(maxsize=65536)
+def classify_word(text: str) -> WordToken:
+    """
+    Run every word-level pattern (hour, date, Banorte date, amount) over text in one go.
+    Memoized on the text because tokens like "01 ABR" or "0.00" repeat thousands of times.
+    """
+    date_match = DATE_RE.search(text)
+    banorte_match = BANORTE_DATE_RE.search(text)
+    amounts = DEC_AMOUNT_RE.findall(text)
+    is_time = HOUR_RE.search(text) is not None
+
+    day = month = None
+    if date_match:
+        date_text = date_match.group()
+        day_match = DAY_TOKEN_RE.search(date_text)
+        month_match = MONTH_TOKEN_RE.search(date_text)
+        day = int(day_match.group()) if day_match else None
+        month = MONTH_NUMBERS.get(month_match.group().upper()) if month_match else None
+
+    if is_time:
+        kind = "time"
+    elif date_match:
+        kind = "date"
+    elif amounts:
+        kind = "amount"
+    else:
+        kind = "text"
+
+    return WordToken(
+        kind=kind,
+        date_span=date_match.span() if date_match else None,
+        dates=tuple(DATE_RE.findall(text)) if date_match else (),
+        banorte_date_span=banorte_match.span(1) if banorte_match else None,
+        amount=amounts[0] if amounts else None,
+        amount_count=len(amounts),
+        day=day,
+        month=month,
+    )
+
+
 # Amount normalization function
 def normalize_amount_str(amount_str):
     """Normalize amount string by removing commas, spaces, and converting to float."""
@@ -185,17 +443,527 @@ def normalize_amount_str(amount_str):
     except (ValueError, AttributeError):
         return 0.0
 
-# Amount normalization function
-def normalize_amount_str(amount_str):
-    """Normalize amount string by removing commas, spaces, and converting to float."""
-    if not amount_str or pd.isna(amount_str):
-        return 0.0
-    # Remove commas, spaces, and extract numeric value
-    cleaned = str(amount_str).replace(',', '').replace(' ', '').replace('$', '')
+
+def to_cents(amount) -> int:
+    """Convert a float amount (e.g. from normalize_amount_str) to exact integer cents."""
+    return int(round(amount * 100))
+
+
+def amount_to_cents(amount_str) -> int:
+    """Scalar amounts_to_cents: exact cents of one amount string (0 when empty or unparseable)."""
+    value = normalize_amount_str(amount_str)
+    return to_cents(value) if math.isfinite(value) else 0
+
+
+
+def amounts_to_cents(values: pd.Series) -> pd.Series:
+    """
+    Parse a whole column of amount strings into int64 cents in one vectorized pass.
+    Same rules as normalize_amount_str: commas, spaces and '$' are dropped, and NaN,
+    empty or unparseable cells count as zero.
+    """
+    text = values.astype(object).where(values.notna(), '').astype(str)
+    cleaned = text.str.replace(r'[, $]', '', regex=True).str.strip()
+    numbers = pd.to_numeric(cleaned, errors='coerce').astype(float)
+    numbers = numbers.where(np.isfinite(numbers), 0.0)
+    return (numbers * 100).round().astype('int64')
+
+
+def format_cents(cents: int) -> str:
+    """Format integer cents as '1,234.56'."""
+    return f"{cents / 100:,.2f}"
+
+
+# Word extraction parameters shared by every stage (also part of the page cache key)
+WORD_EXTRACTION_PARAMS = {"x_tolerance": 3, "y_tolerance": 3}
+
+# Persistent page cache location and size bound (override the folder with VALARIX_CACHE_DIR)
+PAGE_CACHE_DIR = os.environ.get(
+    "VALARIX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "valarix")
+)
+PAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PAGE_CACHE_FORMAT = 1
+# Layouts not used for this long (seconds) are dropped when the cache is written
+PAGE_CACHE_LAYOUT_MAX_AGE = 90 * 24 * 3600
+
+
+def file_sha256(pdf_path) -> str:
+    """Return the SHA-256 hex digest of a file's content (pdf_path may also be the PDF's bytes)."""
+    if isinstance(pdf_path, bytes):
+        return hashlib.sha256(pdf_path).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """
+    On-disk cache of per-page text and words, keyed by PDF content hash, page index
+    and extraction parameters.
+    Entries are stored as zlib-compressed marshal blobs in a SQLite file and evicted
+    least-recently-used first once the cache grows past max_bytes; layouts unused for
+    PAGE_CACHE_LAYOUT_MAX_AGE seconds are dropped.
+    Call close() to persist the entries added during a run.
+    bank_configs are the calibrated configs the run uses, if any (see ParseOptions).
+    """
+
+    def __init__(self, cache_dir: str = PAGE_CACHE_DIR, max_bytes: int = PAGE_CACHE_MAX_BYTES,
+                 bank_configs: dict = None):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.params = ";".join(
+            [f"{k}={v}" for k, v in sorted(WORD_EXTRACTION_PARAMS.items())]
+            + [f"pdfplumber={pdfplumber.__version__}", f"format={PAGE_CACHE_FORMAT}"]
+        )
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "pages.sqlite3"), timeout=30)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                file_hash TEXT, params TEXT, page_count INTEGER,
+                PRIMARY KEY (file_hash, params)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                file_hash TEXT, params TEXT, page INTEGER, data BLOB,
+                size INTEGER, last_used REAL,
+                PRIMARY KEY (file_hash, params, page)
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+            CREATE TABLE IF NOT EXISTS layouts (
+                fingerprint TEXT, params TEXT, bank TEXT, columns TEXT, start_page INTEGER,
+                detalle_found INTEGER, header_line_skipped INTEGER, last_used REAL,
+                PRIMARY KEY (fingerprint, params)
+            );
+        """)
+        # Layouts resolved under other bank configs or keywords don't apply
+        self.layout_params = self.params + ";configs=" + hashlib.sha256(
+            json.dumps([BANK_CONFIGS, bank_configs or {}, BANK_KEYWORDS], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        # Writes are buffered and flushed in close(), so concurrent runs (batch mode)
+        # only hold the database lock for one short transaction each
+        self._pending_counts = []
+        self._pending_pages = []
+        self._pending_layouts = []
+        self._touched = []
+        self._touched_layouts = []
+
+    def close(self):
+        """Write buffered entries in one transaction, evict, and close the database."""
+        if self._conn is None:
+            return
+        try:
+            if (self._pending_pages or self._pending_counts or self._pending_layouts
+                    or self._touched or self._touched_layouts):
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", self._pending_counts
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)", self._pending_pages
+                    )
+                    self._conn.executemany(
+                        "UPDATE pages SET last_used = ? WHERE file_hash = ? AND params = ? AND page = ?",
+                        self._touched,
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO layouts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._pending_layouts
+                    )
+                    self._conn.executemany(
+                        "UPDATE layouts SET last_used = ? WHERE fingerprint = ? AND params = ?",
+                        self._touched_layouts,
+                    )
+                    self.evict()
+        except sqlite3.Error:
+            # Another process holds the cache for too long: skip this run's updates
+            pass
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def get_page_count(self, file_hash: str):
+        row = self._conn.execute(
+            "SELECT page_count FROM documents WHERE file_hash = ? AND params = ?",
+            (file_hash, self.params),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_page_count(self, file_hash: str, page_count: int):
+        self._pending_counts.append((file_hash, self.params, page_count))
+
+    def get_page(self, file_hash: str, page_index: int):
+        """Return {"content", "words"} for a cached page, or None."""
+        row = self._conn.execute(
+            "SELECT data FROM pages WHERE file_hash = ? AND params = ? AND page = ?",
+            (file_hash, self.params, page_index),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            content, keys, rows = marshal.loads(zlib.decompress(row[0]))
+        except Exception:
+            return None
+        self._touched.append((time.time(), file_hash, self.params, page_index))
+        return {"content": content, "words": [dict(zip(keys, values)) for values in rows]}
+
+    def put_page(self, file_hash: str, page_index: int, page_data: dict):
+        words = page_data["words"]
+        keys = tuple(words[0].keys()) if words else ()
+        rows = [tuple(w.get(k) for k in keys) for w in words]
+        try:
+            blob = zlib.compress(marshal.dumps((page_data["content"], keys, rows)))
+        except ValueError:
+            # Word attributes that marshal can't store: just don't cache this page
+            return
+        self._pending_pages.append(
+            (file_hash, self.params, page_index, blob, len(blob), time.time())
+        )
+
+    def get_layout(self, fingerprint: str):
+        """
+        Return what an earlier statement with this layout fingerprint resolved to:
+        {"bank", "columns", "start_page", "detalle_found", "header_line_skipped"}, or None.
+        """
+        row = self._conn.execute(
+            "SELECT bank, columns, start_page, detalle_found, header_line_skipped FROM layouts "
+            "WHERE fingerprint = ? AND params = ?",
+            (fingerprint, self.layout_params),
+        ).fetchone()
+        if row is None:
+            return None
+        bank, columns, start_page, detalle_found, header_line_skipped = row
+        self._touched_layouts.append((time.time(), fingerprint, self.layout_params))
+        return {
+            "bank": bank,
+            "columns": {name: tuple(bounds) for name, bounds in json.loads(columns).items()},
+            "start_page": start_page,
+            "detalle_found": bool(detalle_found),
+            "header_line_skipped": bool(header_line_skipped),
+        }
+
+    def put_layout(self, fingerprint: str, bank: str, columns: dict, start_page: int,
+                   detalle_found: bool, header_line_skipped: bool):
+        self._pending_layouts.append((
+            fingerprint, self.layout_params, bank, json.dumps(columns), start_page,
+            int(detalle_found), int(header_line_skipped), time.time(),
+        ))
+
+    def evict(self):
+        """Drop stale layouts, then least-recently-used pages until the cache fits in max_bytes."""
+        self._conn.execute("DELETE FROM layouts WHERE last_used < ?", (time.time() - PAGE_CACHE_LAYOUT_MAX_AGE,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        stale = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM pages ORDER BY last_used"):
+            stale.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE rowid = ?", stale)
+        self._conn.execute(
+            "DELETE FROM documents WHERE NOT EXISTS (SELECT 1 FROM pages "
+            "WHERE pages.file_hash = documents.file_hash AND pages.params = documents.params)"
+        )
+
+
+def text_from_words(words: list) -> str:
+    """
+    Rebuild a page's text from its words, the way page.extract_text() lays it out:
+    words are clustered into lines by 'top' (same y tolerance, extraction order kept),
+    joined by single spaces, and lines are joined by newlines.
+    """
+    from pdfplumber.utils import cluster_objects
+
+    lines = cluster_objects(words, itemgetter("top"), WORD_EXTRACTION_PARAMS["y_tolerance"],
+                            preserve_order=True)
+    return "\n".join(" ".join(w["text"] for w in line) for line in lines)
+
+
+def _layout_page(page) -> dict:
+    """
+    Extract a pdfplumber page's words and derive its text from them in a single
+    char-clustering pass, then drop the page's layout cache.
+    """
     try:
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return 0.0
+        words = page.extract_words(**WORD_EXTRACTION_PARAMS)
+        text = text_from_words(words)
+    except Exception:
+        words = []
+        text = page.extract_text()
+    # Text and words are kept by the caller, so pdfplumber's per-page layout cache can go
+    page.close()
+    return {"content": text if text else "", "words": words}
+
+
+def open_pdf(pdf_path):
+    """Open a PDF with pdfplumber from a file path or from the PDF's bytes."""
+    return pdfplumber.open(io.BytesIO(pdf_path) if isinstance(pdf_path, bytes) else pdf_path)
+
+
+def read_pdf_prelude(pdf_path) -> tuple:
+    """
+    Read the document info strings (BANK_METADATA_FIELDS) and the page-1 font names
+    through pdfminer's parser, without laying out any page.
+    pdf_path is a file path or the PDF's bytes. Returns (info strings, font names);
+    ([], []) when the PDF can't be parsed.
+    """
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+    from pdfminer.utils import decode_text
+
+    values = []
+    font_names = []
+    try:
+        with (io.BytesIO(pdf_path) if isinstance(pdf_path, bytes) else open(pdf_path, "rb")) as fh:
+            document = PDFDocument(PDFParser(fh))
+            for info in document.info:
+                for field in BANK_METADATA_FIELDS:
+                    value = resolve1(info.get(field))
+                    if isinstance(value, bytes):
+                        value = decode_text(value)
+                    if isinstance(value, str):
+                        values.append(value)
+
+            page = next(PDFPage.create_pages(document), None)
+            fonts = resolve1(page.resources.get("Font")) if page is not None and page.resources else None
+            for font in (fonts or {}).values():
+                base_font = resolve1(resolve1(font).get("BaseFont"))
+                if base_font is not None:
+                    font_names.append(getattr(base_font, "name", str(base_font)))
+    except Exception as e:
+        pass
+        # print(f"⚠️  Error al leer metadatos: {e}")
+    return values, font_names
+
+
+def _layout_pages_chunk(pdf_path, page_indexes: list) -> list:
+    """Worker for PdfDocument.prefetch: lay out a contiguous chunk of pages."""
+    with open_pdf(pdf_path) as pdf:
+        return [(page_index, _layout_page(pdf.pages[page_index])) for page_index in page_indexes]
+
+
+# Compact page words: coordinates in one structured array, text as slices of one string pool
+# (a plain field list, so defining it doesn't import NumPy)
+PAGE_WORD_DTYPE = [
+    ("x0", "f8"), ("x1", "f8"), ("top", "f8"), ("bottom", "f8"),
+    ("text_start", "i4"), ("text_end", "i4"),
+]
+
+
+class PageWords:
+    """
+    Compact representation of a page's words: a NumPy structured array (x0, x1, top,
+    bottom, text offsets) plus a single string pool, instead of one dict per word.
+    Iterating (or indexing) yields small word dicts built on demand, so code written
+    against pdfplumber's word dicts keeps working; row grouping sorts the top array
+    directly and only builds dicts for the rows it returns.
+    """
+
+    __slots__ = ("coords", "pool")
+
+    def __init__(self, coords: np.ndarray, pool: str):
+        self.coords = coords
+        self.pool = pool
+
+    @classmethod
+    def from_words(cls, words: list) -> "PageWords":
+        coords = np.empty(len(words), dtype=PAGE_WORD_DTYPE)
+        texts = []
+        offset = 0
+        for i, w in enumerate(words):
+            text = w.get("text", "")
+            coords[i] = (w.get("x0", 0), w.get("x1", 0), w.get("top", 0), w.get("bottom", 0),
+                         offset, offset + len(text))
+            texts.append(text)
+            offset += len(text)
+        return cls(coords, "".join(texts))
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __iter__(self):
+        for i in range(len(self.coords)):
+            yield self.word(i)
+
+    def __getitem__(self, i):
+        return self.word(i)
+
+    def text(self, i: int) -> str:
+        start, end = self.coords["text_start"][i], self.coords["text_end"][i]
+        return self.pool[start:end]
+
+    @property
+    def texts(self) -> list:
+        return [self.pool[s:e] for s, e in zip(self.coords["text_start"].tolist(),
+                                               self.coords["text_end"].tolist())]
+
+    def word(self, i: int) -> dict:
+        """Build the word dict (text, x0, x1, top, bottom) for word i."""
+        x0, x1, top, bottom, start, end = self.coords[i].tolist()
+        return {"text": self.pool[start:end], "x0": x0, "x1": x1, "top": top, "bottom": bottom}
+
+    def take(self, indexes) -> list:
+        """Return the word dicts for the given word indexes, in that order."""
+        return [self.word(i) for i in indexes]
+
+
+class PdfDocument:
+    """
+    Document session shared by every extraction stage (detection, summary, movements,
+    DIGITEM and TRANSFERENCIA).
+    The PDF is opened once and each page's text and words are extracted at most once.
+    With a PageCache, pages laid out on a previous run are read back instead, and the
+    PDF is only opened when a page is missing from the cache.
+    With compact_words, the words kept in memory are stored as PageWords.
+    pdf_path is a file path or the PDF's bytes.
+    """
+
+    def __init__(self, pdf_path, cache: PageCache = None, page_range: tuple = None,
+                 compact_words: bool = False):
+        self.pdf_path = pdf_path
+        self.page_range = page_range  # (first, last) 1-based and inclusive, None = every page
+        self.compact_words = compact_words
+        self._cache = cache
+        self._file_hash = file_sha256(pdf_path) if cache is not None else None
+        self._pdf = None
+        self._page_count = None
+        self._prelude = None
+        self._pages = {}  # page index -> {"content": str, "words": list or PageWords}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+    def _open_pdf(self):
+        if self._pdf is None:
+            self._pdf = open_pdf(self.pdf_path)
+        return self._pdf
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            if self._cache is not None:
+                self._page_count = self._cache.get_page_count(self._file_hash)
+            if self._page_count is None:
+                self._page_count = len(self._open_pdf().pages)
+                if self._cache is not None:
+                    self._cache.put_page_count(self._file_hash, self._page_count)
+        return self._page_count
+
+    def prelude(self) -> tuple:
+        """(document info strings, page-1 font names), read once; see read_pdf_prelude."""
+        if self._prelude is None:
+            self._prelude = read_pdf_prelude(self.pdf_path)
+        return self._prelude
+
+    def _load_page(self, page_index: int) -> dict:
+        """Lay out a page once and keep its text and words."""
+        cached = self._pages.get(page_index)
+        if cached is not None:
+            return cached
+
+        if self._cache is not None:
+            cached = self._cache.get_page(self._file_hash, page_index)
+            if cached is not None:
+                return self._keep_page(page_index, cached)
+
+        cached = _layout_page(self._open_pdf().pages[page_index])
+        return self._store_page(page_index, cached)
+
+    def _keep_page(self, page_index: int, page_data: dict) -> dict:
+        """Keep a laid out page in memory (as PageWords when compact_words is set)."""
+        if self.compact_words and not isinstance(page_data["words"], PageWords):
+            page_data = {"content": page_data["content"], "words": PageWords.from_words(page_data["words"])}
+        self._pages[page_index] = page_data
+        return page_data
+
+    def _store_page(self, page_index: int, page_data: dict) -> dict:
+        if self._cache is not None:
+            self._cache.put_page(self._file_hash, page_index, page_data)
+        return self._keep_page(page_index, page_data)
+
+    def prefetch(self, page_indexes, workers: int):
+        """
+        Lay out the given pages in worker processes, split into contiguous chunks.
+        Results are merged back in page order, so later stages see exactly what the
+        serial path would have produced. Pages already loaded (or cached) are skipped.
+        """
+        pending = []
+        for page_index in page_indexes:
+            if page_index in self._pages:
+                continue
+            if self._cache is not None:
+                cached = self._cache.get_page(self._file_hash, page_index)
+                if cached is not None:
+                    self._keep_page(page_index, cached)
+                    continue
+            pending.append(page_index)
+
+        if workers <= 1 or len(pending) <= 1:
+            for page_index in pending:
+                self._load_page(page_index)
+            return
+
+        chunk_size = -(-len(pending) // workers)  # ceil
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            for chunk_pages in executor.map(_layout_pages_chunk, [self.pdf_path] * len(chunks), chunks):
+                for page_index, page_data in chunk_pages:
+                    self._store_page(page_index, page_data)
+
+    def page_text(self, page_index: int) -> str:
+        """Return the text of a page (0-based index), '' if the page has no text."""
+        return self._load_page(page_index)["content"]
+
+    def page_words(self, page_index: int) -> list:
+        """Return the words (with coordinates) of a page (0-based index)."""
+        return self._load_page(page_index)["words"]
+
+    def pages_data(self) -> list:
+        """Return a list of dictionaries (page, content, words), one per page."""
+        return [
+            {"page": page_index + 1, **self._load_page(page_index)}
+            for page_index in range(self.page_count)
+        ]
+
+    def scan_page_indexes(self) -> range:
+        """Return the 0-based indexes of the pages that movement and section scans visit."""
+        if self.page_range is None:
+            return range(self.page_count)
+        first, last = self.page_range
+        return range(max(first, 1) - 1, min(last, self.page_count))
+
+    def iter_pages(self, start_page: int = 1):
+        """
+        Lazily yield dictionaries (page, content, words) for the scanned pages from
+        start_page (1-based) on. A page is laid out only when the consumer reaches it.
+        """
+        for page_index in self.scan_page_indexes():
+            if page_index + 1 >= start_page:
+                yield {"page": page_index + 1, **self._load_page(page_index)}
+
+
+@contextmanager
+def open_document(pdf_path):
+    """Yield a PdfDocument for a path, or reuse the given PdfDocument without closing it."""
+    if isinstance(pdf_path, PdfDocument):
+        yield pdf_path
+    else:
+        with PdfDocument(pdf_path) as doc:
+            yield doc
 
 
 def find_column_coordinates(pdf_path: str, page_number: int = 1):
@@ -270,58 +1038,541 @@ def find_column_coordinates(pdf_path: str, page_number: int = 1):
         print(f"❌ Error: {e}")
 
 
-def detect_bank_from_pdf(pdf_path: str) -> str:
+# Column calibration (--calibrate) and layout inference for banks without a config
+# Header words that name each column (accent- and case-folded)
+CALIBRATION_HEADER_WORDS = {
+    "FECHA": "fecha",
+    "DESCRIPCION": "descripcion",
+    "CONCEPTO": "descripcion",
+    "CARGOS": "cargos",
+    "RETIROS": "cargos",
+    "ABONOS": "abonos",
+    "DEPOSITOS": "abonos",
+    "SALDO": "saldo",
+}
+# Amount x-centers further apart than this (points) belong to different columns
+CALIBRATION_GAP = 10
+# Words of one date are at most this far apart (points)
+CALIBRATION_WORD_GAP = 6
+# Margin added on both sides of a calibrated range (points)
+CALIBRATION_PADDING = 2
+# Without a header: one amount column is a card's charges, the rightmost of several is the balance
+INFERRED_NUMERIC_COLUMNS = {
+    1: ("cargos",),
+    2: ("cargos", "saldo"),
+    3: ("cargos", "abonos", "saldo"),
+}
+# Banks without a config get columns inferred from this many pages from the movement start...
+LAYOUT_INFERENCE_PAGES = 3
+# ...when at least this many dated rows are found there
+LAYOUT_INFERENCE_MIN_ROWS = 3
+AMOUNT_TOKEN_RE = re.compile(r"\$?\s*" + DEC_AMOUNT_RE.pattern + r"-?")
+
+
+def _page_word_arrays(words):
+    """(x0, x1, top, texts) lists for a page's words, whether dicts or PageWords."""
+    if isinstance(words, PageWords):
+        coords = words.coords
+        return coords["x0"].tolist(), coords["x1"].tolist(), coords["top"].tolist(), words.texts
+    return ([w["x0"] for w in words], [w["x1"] for w in words],
+            [w["top"] for w in words], [w["text"] for w in words])
+
+
+def _leading_date_words(words: list) -> int:
+    """
+    How many of a row's leading (x0, x1, text) words make up a date: the words the date
+    match covers, stopping at a gap wider than CALIBRATION_WORD_GAP. 0 without a date.
+    """
+    date_match = DATE_RE.match(" ".join(text for _, _, text in words))
+    if not date_match:
+        return 0
+    consumed = count = 0
+    for n, (x0, _, text) in enumerate(words):
+        if consumed >= date_match.end() or (n and x0 - words[n - 1][1] > CALIBRATION_WORD_GAP):
+            break
+        consumed += len(text) + 1
+        count += 1
+    return count
+
+
+def _cluster_centers(centers: list, gap: float) -> list:
+    """1-D clustering: sort the centers and cut wherever two neighbours are more than gap apart."""
+    clusters = []
+    for center in sorted(centers):
+        if clusters and center - clusters[-1][-1] <= gap:
+            clusters[-1].append(center)
+        else:
+            clusters.append([center])
+    return clusters
+
+
+def page_word_rows(pages) -> list:
+    """
+    The rows of the given pages (as yielded by PdfDocument.iter_pages), each a
+    (page number, [(x0, x1, text), ...] left to right) tuple, straight from the word arrays.
+    """
+    rows = []
+    for page in pages:
+        x0s, x1s, tops, texts = _page_word_arrays(page["words"])
+        order, bounds = cluster_rows(tops)
+        order = order.tolist()
+        for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            row = sorted(order[a:b], key=x0s.__getitem__)
+            rows.append((page["page"], [(x0s[i], x1s[i], texts[i]) for i in row]))
+    return rows
+
+
+def calibration_document(pdf_path, page_range: tuple = None, use_cache: bool = True) -> PdfDocument:
+    """
+    Open a statement for calibration: compact word arrays, read through the page cache
+    when use_cache, so a statement that was already parsed isn't laid out again.
+    page_range (1-based first, last) limits the pages sampled.
+    """
+    page_cache = None
+    if use_cache:
+        try:
+            page_cache = PageCache()
+        except (OSError, sqlite3.Error):
+            page_cache = None
+    return PdfDocument(pdf_path, cache=page_cache, page_range=page_range, compact_words=True)
+
+
+def calibrate_columns(doc: PdfDocument) -> dict:
+    """Propose BANK_CONFIGS column ranges for an open statement's layout (see infer_columns)."""
+    return infer_columns(page_word_rows(doc.iter_pages()))
+
+
+def infer_columns(rows: list) -> dict:
+    """
+    Infer column ranges from the geometry of page_word_rows rows.
+    Finds the movements header row (FECHA plus at least two other column names), then
+    takes every row below it that starts with a date: the date words give "fecha", the
+    amount tokens are clustered by x-center (CALIBRATION_GAP) into the numeric columns,
+    matched to the header's CARGOS/ABONOS/SALDO words (see INFERRED_NUMERIC_COLUMNS
+    without a header), and the text between the date and the first amount column
+    becomes "descripcion" (left out when the amounts start before the text).
+    Returns {"columns", "header_page", "rows", "amounts"}; columns is empty when no
+    dated rows with amounts were found.
+    """
+    # Header row: FECHA plus two other column names; without one, every dated row counts
+    header = {}  # column -> header word center
+    header_page = None
+    first_row = 0
+    for n, (page_number, words) in enumerate(rows):
+        labels = {}
+        for x0, x1, text in words:
+            column = CALIBRATION_HEADER_WORDS.get(ascii_fold(text).upper().strip(":.$"))
+            if column and column not in labels:
+                labels[column] = (x0 + x1) / 2
+        if "fecha" in labels and len(labels) >= 3:
+            header, header_page, first_row = labels, page_number, n + 1
+            break
+
+    date_spans, liq_spans = [], []  # (x0, x1) of each row's leading date (and liquidation date)
+    desc_starts = []  # x0 of each row's first description word
+    amounts = []  # (center, x0, x1)
+    rows_seen = 0
+    for _, words in rows[first_row:]:
+        date_end = _leading_date_words(words)
+        if not date_end:
+            continue
+        rows_seen += 1
+        date_spans.append((words[0][0], words[date_end - 1][1]))
+        liq_end = _leading_date_words(words[date_end:])
+        if liq_end:
+            liq_spans.append((words[date_end][0], words[date_end + liq_end - 1][1]))
+            date_end += liq_end
+        described = False
+        for x0, x1, text in words[date_end:]:
+            if AMOUNT_TOKEN_RE.fullmatch(text):
+                amounts.append(((x0 + x1) / 2, x0, x1))
+            elif not described:
+                desc_starts.append(x0)
+                described = True
+
+    result = {"columns": {}, "header_page": header_page, "rows": rows_seen, "amounts": len(amounts)}
+    if not rows_seen or not amounts:
+        return result
+
+    # Amount columns: clusters of x-centers, ignoring stray tokens (under 5% of the amounts)
+    spans = []
+    for cluster in _cluster_centers([a[0] for a in amounts], CALIBRATION_GAP):
+        if len(cluster) >= max(2, len(amounts) * 0.05):
+            lo, hi = cluster[0], cluster[-1]
+            members = [a for a in amounts if lo <= a[0] <= hi]
+            spans.append((min(a[1] for a in members), max(a[2] for a in members)))
+
+    # Clusters take the header's numeric column names in the header's left-to-right order,
+    # or else the usual names for that many amount columns
+    numeric = sorted((col for col in NUMERIC_COLUMNS if col in header), key=header.get)
+    if len(numeric) != len(spans):
+        numeric = INFERRED_NUMERIC_COLUMNS.get(len(spans), ())
+    assigned = dict(zip(numeric, spans))
+
+    def padded(span):
+        return (math.floor(span[0]) - CALIBRATION_PADDING, math.ceil(span[1]) + CALIBRATION_PADDING)
+
+    columns = {"fecha": padded((min(x0 for x0, _ in date_spans), max(x1 for _, x1 in date_spans)))}
+    # A second date on most rows is the liquidation date column
+    if len(liq_spans) * 2 > rows_seen:
+        columns["liq"] = padded((min(x0 for x0, _ in liq_spans), max(x1 for _, x1 in liq_spans)))
+    if assigned:
+        first_amount = min(x0 for x0, _ in assigned.values())
+        desc_start = max(statistics.median(desc_starts) if desc_starts else 0,
+                         max(x1 for _, x1 in columns.values()))
+        desc_band = (math.floor(desc_start) - CALIBRATION_PADDING, math.floor(first_amount) - CALIBRATION_PADDING)
+        # No room between the dates and the first amount column: no description band
+        if desc_band[0] < desc_band[1]:
+            columns["descripcion"] = desc_band
+    for col in NUMERIC_COLUMNS:
+        if col in assigned:
+            columns[col] = padded(assigned[col])
+    result["columns"] = columns
+    return result
+
+
+def run_calibration(pdf_path: str, bank_name: str = None, page_range: tuple = None,
+                    config_path: str = DEFAULT_BANK_CONFIG_FILE, use_cache: bool = True):
+    """Calibrate a statement's column ranges (calibrate_columns), print them and save them for its bank."""
+    # One document serves detection and calibration, so no page is laid out twice
+    with calibration_document(pdf_path, page_range=page_range, use_cache=use_cache) as doc:
+        if bank_name is None:
+            bank_name = detect_bank(doc)[0]
+            if bank_name is None:
+                print("❌ No se pudo detectar el banco, indícalo con --bank")
+                return None
+        print(f"🏦 Banco: {bank_name}")
+        calibration = calibrate_columns(doc)
+
+    columns = calibration["columns"]
+    if not columns:
+        print("❌ No se encontraron filas con fecha e importes para calibrar")
+        return None
+
+    if calibration["header_page"] is None:
+        print("⚠️  Sin fila de encabezado: cargos/abonos/saldo asignados por posición, revísalos")
+    else:
+        print(f"📄 Encabezado en página {calibration['header_page']}")
+    print(f"   {calibration['rows']} filas con fecha, {calibration['amounts']} importes")
+    for col, (x_min, x_max) in columns.items():
+        current = BANK_CONFIGS.get(bank_name, {}).get("columns", {}).get(col)
+        print(f"   {col:<12} ({x_min}, {x_max})" + (f"   actual: {current}" if current else ""))
+
+    save_bank_config(bank_name, columns, config_path)
+    print(f"✅ Configuración guardada -> {config_path}")
+    return columns
+
+
+def detect_bank_from_metadata(pdf_path) -> tuple:
+    """
+    Fast path for bank detection: look only at the document info dictionary and the
+    font names in page 1's resources (see read_pdf_prelude), without laying out any page.
+    Accepts a path or an open PdfDocument.
+    Returns (bank name, "metadata" or "fonts") when exactly one bank is named there,
+    otherwise (None, None). A "fonts" result is only a hint (see detect_bank).
     """
-    Detect the bank from PDF content by reading line by line.
-    Returns the bank name if detected, otherwise returns DEFAULT_BANK.
+    with open_document(pdf_path) as doc:
+        values, font_names = doc.prelude()
+
+    banks = {BANK_DETECT_GROUPS[m.lastgroup][0] for m in BANK_DETECT_RE.finditer("\n".join(values))}
+    if len(banks) == 1:
+        return banks.pop(), "metadata"
+    banks = font_name_banks(font_names)
+    if len(banks) == 1:
+        return banks.pop(), "fonts"
+    return None, None
+
+
+def detect_bank(pdf_path) -> tuple:
     """
+    Detect the bank, trying the metadata fast path before the page text.
+    A bank named only by the fonts is a hint for detect_bank_from_pdf; it decides the
+    bank, with BANK_FONT_CONFIDENCE, only when the page text names none.
+    Accepts a path or an open PdfDocument.
+    Returns (bank name or None, confidence, source), source being "metadata", "fonts",
+    "text", or None when nothing matched.
+    """
+    with open_document(pdf_path) as doc:
+        bank_name, source = detect_bank_from_metadata(doc)
+        if source == "metadata":
+            return bank_name, 1.0, source
+        text_bank, confidence = detect_bank_from_pdf(doc, hint=bank_name)
+        if text_bank:
+            return text_bank, confidence, "text"
+        if bank_name:
+            return bank_name, BANK_FONT_CONFIDENCE, "fonts"
+        return None, 0.0, None
+
+
+def detect_bank_from_pdf(pdf_path, hint: str = None) -> tuple:
+    """
+    Detect the bank from PDF content, scanning each page's text once with
+    BANK_DETECT_RE and adding every keyword hit's weight to its bank's score.
+    hint, a bank named elsewhere (the fonts), adds BANK_FONT_HINT_WEIGHT to its score.
+    Reading stops at the first page where the leader is decisive (usually page 1),
+    otherwise after three pages. Accepts a path or an open PdfDocument.
+    Returns (bank name, confidence), the confidence being the leader's share of all
+    scored hits; (None, 0.0) when no bank keyword is found.
+    """
+    scores = {}
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_document(pdf_path) as doc:
             # Read first few pages (usually bank name appears early)
-            max_pages_to_check = min(3, len(pdf.pages))
-            
+            max_pages_to_check = min(3, doc.page_count)
+
             for page_num in range(max_pages_to_check):
-                page = pdf.pages[page_num]
-                text = page.extract_text()
-                
+                text = doc.page_text(page_num)
                 if not text:
                     continue
-                
-                # Split into lines and check each line
-                lines = text.split('\n')
-                for line in lines:
-                    line_clean = line.strip()
-                    if not line_clean:
-                        continue
-                    
-                    # Check each bank's keywords
-                    for bank_name, keywords in BANK_KEYWORDS.items():
-                        for keyword_pattern in keywords:
-                            if re.search(keyword_pattern, line_clean, re.I):
-                                print(f"🏦 Banco detectado: {bank_name}")
-                                return bank_name
-                    
-                    # Also check if line contains bank name directly (case insensitive)
-                    line_upper = line_clean.upper()
-                    for bank_name in BANK_KEYWORDS.keys():
-                        # Check for exact bank name match (as whole word)
-                        if re.search(rf'\b{re.escape(bank_name.upper())}\b', line_upper):
-                            print(f"🏦 Banco detectado: {bank_name}")
-                            return bank_name
-    
+
+                for match in BANK_DETECT_RE.finditer(text):
+                    bank_name, weight = BANK_DETECT_GROUPS[match.lastgroup]
+                    scores[bank_name] = scores.get(bank_name, 0) + weight
+
+                ranked = sorted(scores.values(), reverse=True) + [0]
+                if ranked[0] >= BANK_DETECT_DECISIVE_SCORE and ranked[0] >= BANK_DETECT_MARGIN * ranked[1]:
+                    break
+
     except Exception as e:
         pass
         # print(f"⚠️  Error al detectar banco: {e}")
-    
-    # If no bank detected, return default
-    #print(f"⚠️  No se pudo detectar el banco, usando: {DEFAULT_BANK}")
-    return DEFAULT_BANK
+
+    if not scores:
+        return None, 0.0
+    if hint:
+        # The hint only weighs in once the text names some bank
+        scores[hint] = scores.get(hint, 0) + BANK_FONT_HINT_WEIGHT
+    # Ties go to the bank hit first (dicts keep insertion order)
+    bank_name = max(scores, key=scores.get)
+    return bank_name, round(scores[bank_name] / sum(scores.values()), 3)
+
+
+# Words whose page-1 positions identify a statement template (compared accent- and case-folded)
+LAYOUT_HEADER_WORDS = {
+    "FECHA", "DESCRIPCION", "CONCEPTO", "REFERENCIA",
+    "CARGOS", "ABONOS", "RETIROS", "DEPOSITOS", "SALDO",
+}
+# Fewer header words than this on page 1 can't tell templates apart: no fingerprint
+LAYOUT_MIN_HEADER_WORDS = 3
+# Only detections at least this confident are remembered as a template's layout
+LAYOUT_MIN_CONFIDENCE = 0.8
+
+
+def layout_fingerprint(doc) -> str:
+    """
+    Fingerprint a statement's template from page 1 geometry: where its header words
+    (LAYOUT_HEADER_WORDS) sit, to the nearest point, plus the page-1 font set.
+    Statements of the same bank and product share it.
+    Returns a hex digest, or None when page 1 has too few header words.
+    """
+    if not doc.page_count:
+        return None
+    anchors = []
+    for w in doc.page_words(0):
+        if ascii_fold(w["text"]).upper().strip(":.$") in LAYOUT_HEADER_WORDS:
+            anchors.append((w["text"], round(w["x0"]), round(w["top"])))
+    if len(anchors) < LAYOUT_MIN_HEADER_WORDS:
+        return None
+    # Subset prefixes ("ABCDEF+Arial") change from file to file
+    fonts = sorted({name.split("+")[-1] for name in doc.prelude()[1]})
+    return hashlib.sha256(repr((sorted(anchors), fonts)).encode("utf-8")).hexdigest()
+
+
+class SummaryRule(NamedTuple):
+    """One field of a bank's summary box, as searched by apply_summary_rules()."""
+    fields: tuple              # summary_data keys the value is written to
+    patterns: tuple            # Compiled; tried in order, the first giving a positive value wins
+    next_line: bool = False    # The patterns only find the label; the value is the next line's "$ amount"
+    only_if_empty: bool = False  # Skip once any of fields is set (default: once all of them are)
+    columns: tuple = ()        # Header row: the next line's "$ amount"s go to these field tuples in order
+    parse: object = normalize_amount_str
+
+
+def summary_rule(fields, *patterns, **options) -> SummaryRule:
+    """Build a SummaryRule from a field name (or tuple of names) and pattern strings (matched ignoring case)."""
+    if isinstance(fields, str):
+        fields = (fields,)
+    return SummaryRule(fields, tuple(re.compile(p, re.I) for p in patterns), **options)
+
+
+SUMMARY_DOLLAR_RE = re.compile(r'\$\s*([\d,\.]+)')
+DEPOSITOS = ('total_depositos', 'total_abonos')
+RETIROS = ('total_retiros', 'total_cargos')
+
+# Per-bank summary box rules. Rules run in order on every line, so a line can fill several fields.
+SUMMARY_RULES = {
+    # "Depósitos / Abonos (+) 1 25,000.00" - el último número es el total
+    # "Retiros / Cargos (-) 25 53,877.37"
+    # "Saldo Final (+) 166,301.83"
+    "BBVA": (
+        summary_rule(DEPOSITOS,
+                     r'Dep[oó]sitos\s*/\s*Abonos\s*\(\+\)\s+\d+\s+([\d,\.]+)',
+                     r'Dep[oó]sitos\s*/\s*Abonos\s*\(\+\).*?([\d,\.]+)',
+                     r'Dep[oó]sitos.*?Abonos.*?\(\+\).*?([\d,\.]+)'),
+        summary_rule(RETIROS,
+                     r'Retiros\s*/\s*Cargos\s*\(\-\)\s+\d+\s+([\d,\.]+)',
+                     r'Retiros\s*/\s*Cargos\s*\(\-\).*?([\d,\.]+)',
+                     r'Retiros.*?Cargos.*?\(\-\).*?([\d,\.]+)'),
+        summary_rule('saldo_final',
+                     r'Saldo\s+Final\s*\(\+\)\s+([\d,\.]+)',
+                     r'Saldo\s+Final.*?([\d,\.]+)'),
+    ),
+    # "ABONOS 9,375.49", "CARGOS 58,927.68", "SALDO ACTUAL 546,409.22", "SALDO ANTERIOR 595,961.41"
+    "Inbursa": (
+        summary_rule(DEPOSITOS, r'ABONOS\s+([\d,\.]+)'),
+        summary_rule(RETIROS, r'CARGOS\s+([\d,\.]+)'),
+        summary_rule('saldo_final', r'SALDO\s+ACTUAL\s+([\d,\.]+)'),
+        summary_rule('saldo_anterior', r'SALDO\s+ANTERIOR\s+([\d,\.]+)'),
+    ),
+    # "+ DEPOSITOS 821,646.20", "- RETIROS 820,238.73", "= SALDO ACTUAL 1,417.18"
+    # (searched in the CUENTA DE CHEQUES section, see SUMMARY_SECTIONS)
+    "Santander": (
+        summary_rule(DEPOSITOS, r'[+\s]+DEPOSITOS\s+([\d,\.]+)'),
+        summary_rule(RETIROS, r'[-\s]+RETIROS\s+([\d,\.]+)'),
+        summary_rule('saldo_final', r'(?:=\s*)?SALDO\s+ACTUAL\s+([\d,\.]+)'),
+    ),
+    # "Saldo inicial del periodo $ 2,284.38", "+ Total de depósitos $ 38,396.00"
+    # "- Total de retiros $ 36,805.40", "Saldo actual $ 3,347.18"
+    "Banorte": (
+        summary_rule('saldo_anterior', r'Saldo\s+inicial\s+del\s+periodo\s+\$\s*([\d,\.]+)'),
+        summary_rule(DEPOSITOS, r'\+\s*Total\s+de\s+dep[oó]sitos\s+\$\s*([\d,\.]+)'),
+        summary_rule(RETIROS, r'-\s*Total\s+de\s+retiros\s+\$\s*([\d,\.]+)'),
+        summary_rule('saldo_final', r'Saldo\s+actual\s+\$\s*([\d,\.]+)'),
+    ),
+    # "Saldo Anterior $5,297.64", "( + ) 8 Depósitos $344,527.26"
+    # "( - ) 16 Retiros $254,072.38", "SALDO AL 31 DE ENERO DE 2020 $95,752.52"
+    "Banamex": (
+        summary_rule('saldo_anterior', r'Saldo\s+Anterior\s+\$\s*([\d,\.]+)'),
+        summary_rule(DEPOSITOS, r'\(\s*\+\s*\)\s+\d+\s+Dep[oó]sitos\s+\$\s*([\d,\.]+)'),
+        summary_rule(RETIROS, r'\(\s*-\s*\)\s+\d+\s+Retiros\s+\$\s*([\d,\.]+)'),
+        summary_rule('saldo_final',
+                     r'SALDO\s+AL\s+\d{1,2}\s+DE\s+\w+\s+DE\s+\d{4}\s+\$\s*([\d,\.]+)',
+                     r'SALDO\s+AL.*?\$\s*([\d,\.]+)'),
+    ),
+    # Tabla "SALDO ANTERIOR (+) DEPOSITOS (-) CARGOS SALDO ACTUAL" con los valores en la siguiente línea:
+    # "$ 5,280.55 $ 1,441,951.06 $ 1,350,565.02 $ 96,666.59"
+    "Banbajío": (
+        summary_rule(('saldo_anterior',) + DEPOSITOS + RETIROS + ('saldo_final',),
+                     r'SALDO\s+ANTERIOR.*DEPOSITOS.*CARGOS.*SALDO\s+ACTUAL',
+                     columns=(('saldo_anterior',), DEPOSITOS, RETIROS, ('saldo_final',))),
+    ),
+    # "Saldo Inicial $903.18", "+ Abonos $49,675.60", "- Retiros" / "$7,000.00", "= Saldo Final" / "$4,580.78"
+    "Banregio": (
+        summary_rule('saldo_anterior', r'Saldo\s+Inicial\s+\$\s*([\d,\.]+)'),
+        summary_rule(DEPOSITOS, r'\+\s*Abonos\s+\$\s*([\d,\.]+)'),
+        summary_rule(RETIROS, r'-\s*Retiros', next_line=True),
+        summary_rule('saldo_final', r'=\s*Saldo\s+Final', next_line=True),
+    ),
+    # "+ Saldo anterior 3,305.40", "+ Compras y cargos del periodo 3,115.30", "Saldo al corte 3,115.30"
+    "Clara": (
+        summary_rule('saldo_anterior', r'\+\s*Saldo\s+anterior\s+([\d,\.]+)'),
+        summary_rule(RETIROS, r'\+\s*Compras\s+y\s+cargos\s+del\s+periodo\s+([\d,\.]+)'),
+        summary_rule('saldo_final', r'Saldo\s+al\s+corte\s+([\d,\.]+)'),
+    ),
+    # "Saldo anterior $ 317,215.14", "Compras y cargos $ 56,176.79", "Saldo total al corte $ 312,227.05"
+    "Konfio": (
+        summary_rule('saldo_anterior', r'Saldo\s+anterior\s+\$\s*([\d,\.]+)'),
+        summary_rule(RETIROS, r'Compras\s+y\s+cargos\s+\$\s*([\d,\.]+)'),
+        summary_rule('saldo_final', r'Saldo\s+total\s+al\s+corte\s+\$\s*([\d,\.]+)'),
+    ),
+    # "Saldo inicial $1,031,652.97", "(+) Depósitos $35,461,511.04"
+    # "(-) Retiros $33,018,203.16", "(=) Saldo final de la cuenta $3,473,941.21"
+    "Scotiabank": (
+        summary_rule('saldo_anterior', r'Saldo\s+inicial\s+\$\s*([\d,\.]+)'),
+        summary_rule(DEPOSITOS, r'\(\+\)\s+Dep[oó]sitos\s+\$\s*([\d,\.]+)'),
+        summary_rule(RETIROS, r'\(-\s*\)\s*Retiros\s+\$\s*([\d,\.]+)'),
+        summary_rule('saldo_final', r'\(=\s*\)\s+Saldo\s+final\s+de\s+la\s+cuenta\s+\$\s*([\d,\.]+)'),
+    ),
+}
+
+# Generic patterns for other banks
+GENERIC_SUMMARY_RULES = (
+    summary_rule(DEPOSITOS,
+                 r'(?:dep[oó]sitos?|abonos?)\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'(?:\+\s*)?\d+\s+dep[oó]sitos?\s+([\d,\.\s]+)',
+                 r'total\s+dep[oó]sitos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 only_if_empty=True),
+    summary_rule(RETIROS,
+                 r'(?:retiros?|cargos?)\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'(?:\-\s*)?\d+\s+retiros?\s+([\d,\.\s]+)',
+                 r'total\s+retiros?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'total\s+cargos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 only_if_empty=True),
+    summary_rule('total_abonos',
+                 r'total\s+abonos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'abonos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)'),
+    summary_rule('total_cargos',
+                 r'total\s+cargos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'cargos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)'),
+    summary_rule('saldo_final',
+                 r'saldo\s+(?:al|final|al\s+\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'saldo\s+(?:final|total)\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
+                 r'saldo\s*[:\-]?\s*\$?\s*([\d,\.\s]+)'),
+    summary_rule('saldo_anterior', r'saldo\s+anterior\s*[:\-]?\s*\$?\s*([\d,\.\s]+)'),
+    summary_rule('total_movimientos',
+                 r'total\s+de\s+movimientos?\s*[:\-]?\s*(\d+)',
+                 r'(\d+)\s+movimientos?',
+                 parse=int),
+)
+
+# Banks whose summary box is one block of page 1, between these two markers. The rules search the
+# block as a whole (or the text of the first pages when a marker is missing) instead of line by line.
+SUMMARY_SECTIONS = {
+    "Santander": (re.compile(r'CUENTA\s+DE\s+CHEQUES', re.I),
+                  re.compile(r'GRAFICO\s+CUENTA\s+DE\s+CHEQUES', re.I)),
+}
+
+
+def _summary_rule_open(rule: SummaryRule, summary_data: dict) -> bool:
+    """Whether rule may still write a value (fields are only ever filled, so a closed rule stays closed)."""
+    if rule.only_if_empty:
+        return not any(summary_data[field] for field in rule.fields)
+    return not all(summary_data[field] for field in rule.fields)
 
 
-def extract_summary_from_pdf(pdf_path: str) -> dict:
+def apply_summary_rules(rules, lines, summary_data: dict) -> dict:
+    """
+    Fill summary_data from lines in a single pass. Each line is tried against the rules still
+    open, in order; the pass ends as soon as none is. A columns rule ends it as soon as its
+    header is found, since the table appears once.
+    """
+    pending = [rule for rule in rules if _summary_rule_open(rule, summary_data)]
+    for i, line in enumerate(lines):
+        if not pending:
+            break
+        next_line = lines[i + 1] if i + 1 < len(lines) else None
+        for rule in pending:
+            if not _summary_rule_open(rule, summary_data):
+                continue
+            for pattern in rule.patterns:
+                match = pattern.search(line)
+                if not match:
+                    continue
+                if rule.columns:
+                    amounts = SUMMARY_DOLLAR_RE.findall(next_line) if next_line is not None else []
+                    if len(amounts) >= len(rule.columns):
+                        for fields, amount in zip(rule.columns, amounts):
+                            for field in fields:
+                                summary_data[field] = rule.parse(amount)
+                    return summary_data
+                if rule.next_line:
+                    match = SUMMARY_DOLLAR_RE.search(next_line) if next_line is not None else None
+                    if not match:
+                        continue
+                value = rule.parse(match.group(1))
+                if value > 0:
+                    for field in rule.fields:
+                        summary_data[field] = value
+                    break
+        pending = [rule for rule in pending if _summary_rule_open(rule, summary_data)]
+    return summary_data
+
+
+def extract_summary_from_pdf(pdf_path, bank_name: str = None) -> dict:
     """
     Extract summary information from PDF (totals, deposits, withdrawals, balance, movement count).
-    Uses bank-specific patterns to extract summary data accurately.
+    Uses the bank's SUMMARY_RULES (GENERIC_SUMMARY_RULES for other banks) to extract summary data.
+    Accepts a path or an open PdfDocument; pass bank_name when the bank is already known.
     Returns a dictionary with extracted values or None if not found.
     """
     summary_data = {
@@ -333,624 +1584,53 @@ def extract_summary_from_pdf(pdf_path: str) -> dict:
         'total_movimientos': None,
         'saldo_anterior': None
     }
-    
+
     try:
-        # First, detect the bank
-        bank_name = detect_bank_from_pdf(pdf_path)
-        # print(f"🏦 Extrayendo resumen para banco: {bank_name}")
-        
-        with pdfplumber.open(pdf_path) as pdf:
-            # Check first few pages and last page for summary information
-            pages_to_check = min(3, len(pdf.pages))
-            all_text = ""
-            all_lines = []
-            
-            # Collect text from first pages
-            for page_num in range(pages_to_check):
-                page = pdf.pages[page_num]
-                text = page.extract_text()
-                if text:
-                    all_text += text + "\n"
-                    all_lines.extend(text.split('\n'))
-            
-            # Also check last page for Santander and BanRegio
-            if len(pdf.pages) > pages_to_check:
-                last_page = pdf.pages[-1]
-                last_text = last_page.extract_text()
-                if last_text:
-                    all_lines.extend(last_text.split('\n'))
-            
-            # Bank-specific extraction
-            if bank_name == "BBVA":
-                # BBVA: "Depósitos / Abonos (+) 1 25,000.00" - el último número es el total
-                # "Retiros / Cargos (-) 25 53,877.37"
-                # "Saldo Final (+) 166,301.83"
-                #print(f"🔍 Buscando patrones BBVA en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Try multiple patterns for BBVA depósitos
-                    if not summary_data['total_abonos']:
-                        patterns_bbva = [
-                            r'Dep[oó]sitos\s*/\s*Abonos\s*\(\+\)\s+\d+\s+([\d,\.]+)',  # Original pattern
-                            r'Dep[oó]sitos\s*/\s*Abonos\s*\(\+\).*?([\d,\.]+)',  # More flexible
-                            r'Dep[oó]sitos.*?Abonos.*?\(\+\).*?([\d,\.]+)',  # Even more flexible
-                        ]
-                        for pattern in patterns_bbva:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    #print(f"✅ BBVA: Encontrado depósitos/abonos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                    summary_data['total_abonos'] = amount
-                                    summary_data['total_depositos'] = amount
-                                    break
-                    
-                    # Search for Retiros / Cargos
-                    if not summary_data['total_cargos']:
-                        patterns_retiros = [
-                            r'Retiros\s*/\s*Cargos\s*\(\-\)\s+\d+\s+([\d,\.]+)',
-                            r'Retiros\s*/\s*Cargos\s*\(\-\).*?([\d,\.]+)',
-                            r'Retiros.*?Cargos.*?\(\-\).*?([\d,\.]+)',
-                        ]
-                        for pattern in patterns_retiros:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    #print(f"✅ BBVA: Encontrado retiros/cargos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                    summary_data['total_cargos'] = amount
-                                    summary_data['total_retiros'] = amount
-                                    break
-                    
-                    # Search for Saldo Final
-                    if not summary_data['saldo_final']:
-                        patterns_saldo = [
-                            r'Saldo\s+Final\s*\(\+\)\s+([\d,\.]+)',
-                            r'Saldo\s+Final.*?([\d,\.]+)',
-                        ]
-                        for pattern in patterns_saldo:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    #print(f"✅ BBVA: Encontrado saldo final: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                    summary_data['saldo_final'] = amount
-                                    break
-            
-            elif bank_name == "Inbursa":
-                # Inbursa: "ABONOS 9,375.49" - el número después de ABONOS
-                # "CARGOS 58,927.68"
-                # "SALDO ACTUAL 546,409.22"
-                # "SALDO ANTERIOR 595,961.41"
-                #print(f"🔍 Buscando patrones Inbursa en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    if not summary_data['total_abonos']:
-                        match = re.search(r'ABONOS\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Inbursa: Encontrado abonos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_abonos'] = amount
-                                summary_data['total_depositos'] = amount
-                    
-                    if not summary_data['total_cargos']:
-                        match = re.search(r'CARGOS\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Inbursa: Encontrado cargos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_cargos'] = amount
-                                summary_data['total_retiros'] = amount
-                    
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'SALDO\s+ACTUAL\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Inbursa: Encontrado saldo actual: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_final'] = amount
-                    
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'SALDO\s+ANTERIOR\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Inbursa: Encontrado saldo anterior: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-            
-            elif bank_name == "Santander":
-                # Santander: Extract from first page, section between "CUENTA DE CHEQUES" and "GRAFICO CUENTA DE CHEQUES"
-                # Patterns:
-                # "+ DEPOSITOS 821,646.20" -> Total de Abonos
-                # "- RETIROS 820,238.73" -> Total de Retiros
-                # "SALDO ACTUAL 1,417.18" -> Saldo Final
-                #print(f"🔍 Buscando patrones Santander en primera página...")
-                
-                # Get first page text for more reliable extraction
-                first_page_text = ""
-                if len(pdf.pages) > 0:
-                    first_page = pdf.pages[0]
-                    first_page_text = first_page.extract_text() or ""
-                
-                # Find the section between "CUENTA DE CHEQUES" and "GRAFICO CUENTA DE CHEQUES"
-                cuenta_match = re.search(r'CUENTA\s+DE\s+CHEQUES', first_page_text, re.I)
-                grafico_match = re.search(r'GRAFICO\s+CUENTA\s+DE\s+CHEQUES', first_page_text, re.I)
-                
-                if cuenta_match and grafico_match:
-                    # Extract the section text
-                    section_start = cuenta_match.start()
-                    section_end = grafico_match.start()
-                    section_text = first_page_text[section_start:section_end]
-                    
-                    # Pattern: "+ DEPOSITOS 821,646.20" or "+DEPOSITOS 821,646.20"
-                    if not summary_data['total_depositos'] or not summary_data['total_abonos']:
-                        match = re.search(r'[+\s]+DEPOSITOS\s+([\d,\.]+)', section_text, re.I)
-                        if match:
-                            depositos = normalize_amount_str(match.group(1))
-                            #print(f"✅ Santander: Encontrado DEPOSITOS: ${depositos:,.2f}")
-                            if depositos > 0:
-                                summary_data['total_depositos'] = depositos
-                                summary_data['total_abonos'] = depositos
-                    
-                    # Pattern: "- RETIROS 820,238.73" or "-RETIROS 820,238.73"
-                    if not summary_data['total_retiros'] or not summary_data['total_cargos']:
-                        match = re.search(r'[-\s]+RETIROS\s+([\d,\.]+)', section_text, re.I)
-                        if match:
-                            retiros = normalize_amount_str(match.group(1))
-                            #print(f"✅ Santander: Encontrado RETIROS: ${retiros:,.2f}")
-                            if retiros > 0:
-                                summary_data['total_retiros'] = retiros
-                                summary_data['total_cargos'] = retiros
-                    
-                    # Pattern: "SALDO ACTUAL 1,417.18" or "= SALDO ACTUAL 1,417.18"
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'(?:=\s*)?SALDO\s+ACTUAL\s+([\d,\.]+)', section_text, re.I)
-                        if match:
-                            saldo = normalize_amount_str(match.group(1))
-                            #print(f"✅ Santander: Encontrado SALDO ACTUAL: ${saldo:,.2f}")
-                            if saldo > 0:
-                                summary_data['saldo_final'] = saldo
-                else:
-                    # Fallback: search in all text if section markers not found
-                    #print(f"⚠️  No se encontró sección CUENTA DE CHEQUES, buscando en todo el texto...")
-                    full_text = all_text
-                    
-                    # Pattern: "+ DEPOSITOS 821,646.20"
-                    if not summary_data['total_depositos'] or not summary_data['total_abonos']:
-                        match = re.search(r'[+\s]+DEPOSITOS\s+([\d,\.]+)', full_text, re.I)
-                        if match:
-                            depositos = normalize_amount_str(match.group(1))
-                            if depositos > 0:
-                                summary_data['total_depositos'] = depositos
-                                summary_data['total_abonos'] = depositos
-                    
-                    # Pattern: "- RETIROS 820,238.73"
-                    if not summary_data['total_retiros'] or not summary_data['total_cargos']:
-                        match = re.search(r'[-\s]+RETIROS\s+([\d,\.]+)', full_text, re.I)
-                        if match:
-                            retiros = normalize_amount_str(match.group(1))
-                            if retiros > 0:
-                                summary_data['total_retiros'] = retiros
-                                summary_data['total_cargos'] = retiros
-                    
-                    # Pattern: "SALDO ACTUAL 1,417.18"
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'(?:=\s*)?SALDO\s+ACTUAL\s+([\d,\.]+)', full_text, re.I)
-                        if match:
-                            saldo = normalize_amount_str(match.group(1))
-                            if saldo > 0:
-                                summary_data['saldo_final'] = saldo
-            
-            elif bank_name == "Banorte":
-                # Banorte: 
-                # "Saldo inicial del periodo $ 2,284.38"
-                # "+ Total de depósitos $ 38,396.00"
-                # "- Total de retiros $ 36,805.40"
-                # "Saldo actual $ 3,347.18"
-                #print(f"🔍 Buscando patrones Banorte en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Saldo inicial
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'Saldo\s+inicial\s+del\s+periodo\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banorte: Encontrado saldo inicial: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-                    
-                    # Depósitos
-                    if not summary_data['total_depositos']:
-                        match = re.search(r'\+\s*Total\s+de\s+dep[oó]sitos\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banorte: Encontrado depósitos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_depositos'] = amount
-                                summary_data['total_abonos'] = amount
-                    
-                    # Retiros
-                    if not summary_data['total_retiros']:
-                        match = re.search(r'-\s*Total\s+de\s+retiros\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banorte: Encontrado retiros: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_retiros'] = amount
-                                summary_data['total_cargos'] = amount
-                    
-                    # Saldo actual
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'Saldo\s+actual\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banorte: Encontrado saldo actual: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_final'] = amount
-            
-            elif bank_name == "Banamex":
-                # Banamex: 
-                # "Saldo Anterior $5,297.64"
-                # "( + ) 8 Depósitos $344,527.26"
-                # "( - ) 16 Retiros $254,072.38"
-                # "SALDO AL 31 DE ENERO DE 2020 $95,752.52"
-                #print(f"🔍 Buscando patrones Banamex en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Saldo Anterior
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'Saldo\s+Anterior\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banamex: Encontrado saldo anterior: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-                    
-                    # Depósitos
-                    if not summary_data['total_depositos']:
-                        match = re.search(r'\(\s*\+\s*\)\s+\d+\s+Dep[oó]sitos\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banamex: Encontrado depósitos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_depositos'] = amount
-                                summary_data['total_abonos'] = amount
-                    
-                    # Retiros
-                    if not summary_data['total_retiros']:
-                        match = re.search(r'\(\s*-\s*\)\s+\d+\s+Retiros\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banamex: Encontrado retiros: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_retiros'] = amount
-                                summary_data['total_cargos'] = amount
-                    
-                    # Saldo Final
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'SALDO\s+AL\s+\d{1,2}\s+DE\s+\w+\s+DE\s+\d{4}\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Banamex: Encontrado saldo final: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_final'] = amount
-                        # Also try simpler pattern
-                        if not summary_data['saldo_final']:
-                            match = re.search(r'SALDO\s+AL.*?\$\s*([\d,\.]+)', line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    #print(f"✅ Banamex: Encontrado saldo final (patrón simple): ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                    summary_data['saldo_final'] = amount
-            
-            elif bank_name == "Banbajío":
-                # BanBajío: tabla con "SALDO ANTERIOR (+) DEPOSITOS (-) CARGOS SALDO ACTUAL" y valores en la siguiente línea
-                # Pattern: "$ 5,280.55 $ 1,441,951.06 $ 1,350,565.02 $ 96,666.59"
-                #print(f"🔍 Buscando patrones BanBajío en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    if re.search(r'SALDO\s+ANTERIOR.*DEPOSITOS.*CARGOS.*SALDO\s+ACTUAL', line, re.I):
-                        #print(f"✅ BanBajío: Encontrada tabla en línea {i+1}: {line[:100]}")
-                        # Next line should have the values
-                        if i + 1 < len(all_lines):
-                            values_line = all_lines[i + 1]
-                            #print(f"   Línea de valores: {values_line[:100]}")
-                            # Extract all amounts from the line
-                            amounts = re.findall(r'\$\s*([\d,\.]+)', values_line)
-                            if len(amounts) >= 4:
-                                summary_data['saldo_anterior'] = normalize_amount_str(amounts[0])
-                                summary_data['total_depositos'] = normalize_amount_str(amounts[1])
-                                summary_data['total_abonos'] = normalize_amount_str(amounts[1])
-                                summary_data['total_cargos'] = normalize_amount_str(amounts[2])
-                                summary_data['total_retiros'] = normalize_amount_str(amounts[2])
-                                summary_data['saldo_final'] = normalize_amount_str(amounts[3])
-                                #print(f"   Extraídos: Saldo anterior=${summary_data['saldo_anterior']:,.2f}, Depósitos=${summary_data['total_depositos']:,.2f}, Cargos=${summary_data['total_cargos']:,.2f}, Saldo final=${summary_data['saldo_final']:,.2f}")
-                            else:
-                                pass
-                                # print(f"   ⚠️  Solo se encontraron {len(amounts)} valores, se esperaban 4")
-                            break
-            
-            elif bank_name == "Banregio":
-                # BanRegio: 
-                # "Saldo Inicial $903.18"
-                # "+ Abonos $49,675.60"
-                # "- Retiros $7,000.00"
-                # "- Comisiones Efectivamente Cobradas $320.00"
-                # "- Otros Cargos $38,678.00"
-                # "= Saldo Final $4,580.78"
-                #print(f"🔍 Buscando patrones BanRegio en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Saldo Inicial
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'Saldo\s+Inicial\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ BanRegio: Encontrado saldo inicial: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-                    
-                    # Abonos
-                    if not summary_data['total_abonos']:
-                        match = re.search(r'\+\s*Abonos\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ BanRegio: Encontrado abonos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_abonos'] = amount
-                                summary_data['total_depositos'] = amount
-                    
-                    # Retiros (puede estar en línea separada)
-                    if not summary_data['total_retiros']:
-                        # First check if line has "Retiros" and next line has amount
-                        if re.search(r'-\s*Retiros', line, re.I) and i + 1 < len(all_lines):
-                            next_line = all_lines[i + 1]
-                            match = re.search(r'\$\s*([\d,\.]+)', next_line)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    #print(f"✅ BanRegio: Encontrado retiros: ${amount:,.2f} en línea {i+2}: {next_line[:80]}")
-                                    summary_data['total_retiros'] = amount
-                                    summary_data['total_cargos'] = amount
-                    
-                    # Saldo Final
-                    if not summary_data['saldo_final']:
-                        # First check if line has "Saldo Final" and next line has amount
-                        if re.search(r'=\s*Saldo\s+Final', line, re.I) and i + 1 < len(all_lines):
-                            next_line = all_lines[i + 1]
-                            match = re.search(r'\$\s*([\d,\.]+)', next_line)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    #print(f"✅ BanRegio: Encontrado saldo final: ${amount:,.2f} en línea {i+2}: {next_line[:80]}")
-                                    summary_data['saldo_final'] = amount
-            
-            elif bank_name == "Clara":
-                # Clara:
-                # "+ Saldo anterior 3,305.40"
-                # "- Pagos -3,305.40"
-                # "+ Compras y cargos del periodo 3,115.30"
-                # "Saldo al corte 3,115.30"
-                #print(f"🔍 Buscando patrones Clara en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Saldo anterior
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'\+\s*Saldo\s+anterior\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Clara: Encontrado saldo anterior: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-                    
-                    # Compras y cargos (esto son los cargos)
-                    if not summary_data['total_cargos']:
-                        match = re.search(r'\+\s*Compras\s+y\s+cargos\s+del\s+periodo\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Clara: Encontrado cargos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_cargos'] = amount
-                                summary_data['total_retiros'] = amount
-                    
-                    # Saldo al corte
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'Saldo\s+al\s+corte\s+([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Clara: Encontrado saldo al corte: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_final'] = amount
-            
-            elif bank_name == "Konfio":
-                # Konfio:
-                # "Saldo anterior $ 317,215.14"
-                # "Pagos - $ 97,000.00"
-                # "Compras y cargos $ 56,176.79"
-                # "Saldo total al corte $ 312,227.05"
-                #print(f"🔍 Buscando patrones Konfio en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Saldo anterior
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'Saldo\s+anterior\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Konfio: Encontrado saldo anterior: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-                    
-                    # Compras y cargos
-                    if not summary_data['total_cargos']:
-                        match = re.search(r'Compras\s+y\s+cargos\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Konfio: Encontrado cargos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_cargos'] = amount
-                                summary_data['total_retiros'] = amount
-                    
-                    # Saldo total al corte
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'Saldo\s+total\s+al\s+corte\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Konfio: Encontrado saldo total al corte: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_final'] = amount
-            
-            elif bank_name == "Scotiabank":
-                # Scotiabank:
-                # "Saldo inicial $1,031,652.97"
-                # "(+) Depósitos $35,461,511.04"
-                # "(-) Retiros $33,018,203.16"
-                # "(=) Saldo final de la cuenta $3,473,941.21"
-                #print(f"🔍 Buscando patrones Scotiabank en {len(all_lines)} líneas...")
-                for i, line in enumerate(all_lines):
-                    # Saldo inicial
-                    if not summary_data['saldo_anterior']:
-                        match = re.search(r'Saldo\s+inicial\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Scotiabank: Encontrado saldo inicial: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_anterior'] = amount
-                    
-                    # Depósitos
-                    if not summary_data['total_depositos']:
-                        match = re.search(r'\(\+\)\s+Dep[oó]sitos\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Scotiabank: Encontrado depósitos: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_depositos'] = amount
-                                summary_data['total_abonos'] = amount
-                    
-                    # Retiros
-                    if not summary_data['total_retiros']:
-                        match = re.search(r'\(-\s*\)\s+Retiros\s+\$\s*([\d,\.]+)', line, re.I)
-                        if not match:
-                            # Try alternative pattern without space after minus
-                            match = re.search(r'\(-\s*\)\s*Retiros\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Scotiabank: Encontrado retiros: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['total_retiros'] = amount
-                                summary_data['total_cargos'] = amount
-                    
-                    # Saldo final
-                    if not summary_data['saldo_final']:
-                        match = re.search(r'\(=\s*\)\s+Saldo\s+final\s+de\s+la\s+cuenta\s+\$\s*([\d,\.]+)', line, re.I)
-                        if match:
-                            amount = normalize_amount_str(match.group(1))
-                            if amount > 0:
-                                #print(f"✅ Scotiabank: Encontrado saldo final: ${amount:,.2f} en línea {i+1}: {line[:80]}")
-                                summary_data['saldo_final'] = amount
-            
+        with open_document(pdf_path) as doc:
+            # First, detect the bank (unless the caller already did)
+            if bank_name is None:
+                bank_name = detect_bank(doc)[0] or DEFAULT_BANK
+            # print(f"🏦 Extrayendo resumen para banco: {bank_name}")
+            rules = SUMMARY_RULES.get(bank_name, GENERIC_SUMMARY_RULES)
+
+            # A bank with a summary section is searched there, on the first page only
+            section = SUMMARY_SECTIONS.get(bank_name)
+            section_text = None
+            if section and doc.page_count > 0:
+                first_page_text = doc.page_text(0)
+                start_match = section[0].search(first_page_text)
+                end_match = section[1].search(first_page_text)
+                if start_match and end_match:
+                    section_text = first_page_text[start_match.start():end_match.start()]
+
+            if section_text is not None:
+                lines = [section_text]
             else:
-                # Generic patterns for other banks
-                patterns = {
-                    'depositos': [
-                        r'(?:dep[oó]sitos?|abonos?)\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'(?:\+\s*)?\d+\s+dep[oó]sitos?\s+([\d,\.\s]+)',
-                        r'total\s+dep[oó]sitos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                    ],
-                    'retiros': [
-                        r'(?:retiros?|cargos?)\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'(?:\-\s*)?\d+\s+retiros?\s+([\d,\.\s]+)',
-                        r'total\s+retiros?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'total\s+cargos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                    ],
-                    'abonos': [
-                        r'total\s+abonos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'abonos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                    ],
-                    'cargos': [
-                        r'total\s+cargos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'cargos?\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                    ],
-                    'saldo_final': [
-                        r'saldo\s+(?:al|final|al\s+\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'saldo\s+(?:final|total)\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                        r'saldo\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                    ],
-                    'saldo_anterior': [
-                        r'saldo\s+anterior\s*[:\-]?\s*\$?\s*([\d,\.\s]+)',
-                    ],
-                    'movimientos': [
-                        r'total\s+de\s+movimientos?\s*[:\-]?\s*(\d+)',
-                        r'(\d+)\s+movimientos?',
-                    ]
-                }
-                
-                # Search for patterns in all lines
-                for line in all_lines:
-                    # Look for depositos/abonos
-                    if not summary_data['total_depositos'] and not summary_data['total_abonos']:
-                        for pattern in patterns['depositos']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    summary_data['total_depositos'] = amount
-                                    summary_data['total_abonos'] = amount
-                                    break
-                    
-                    # Look for retiros/cargos
-                    if not summary_data['total_retiros'] and not summary_data['total_cargos']:
-                        for pattern in patterns['retiros']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    summary_data['total_retiros'] = amount
-                                    summary_data['total_cargos'] = amount
-                                    break
-                    
-                    # Look for abonos specifically
-                    if not summary_data['total_abonos']:
-                        for pattern in patterns['abonos']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    summary_data['total_abonos'] = amount
-                                    break
-                    
-                    # Look for cargos specifically
-                    if not summary_data['total_cargos']:
-                        for pattern in patterns['cargos']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    summary_data['total_cargos'] = amount
-                                    break
-                    
-                    # Look for saldo final
-                    if not summary_data['saldo_final']:
-                        for pattern in patterns['saldo_final']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    summary_data['saldo_final'] = amount
-                                    break
-                    
-                    # Look for saldo anterior
-                    if not summary_data['saldo_anterior']:
-                        for pattern in patterns['saldo_anterior']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                amount = normalize_amount_str(match.group(1))
-                                if amount > 0:
-                                    summary_data['saldo_anterior'] = amount
-                                    break
-                    
-                    # Look for total movimientos
-                    if not summary_data['total_movimientos']:
-                        for pattern in patterns['movimientos']:
-                            match = re.search(pattern, line, re.I)
-                            if match:
-                                count = int(match.group(1))
-                                if count > 0:
-                                    summary_data['total_movimientos'] = count
-                                    break
-    
+                # Check first few pages and last page for summary information
+                pages_to_check = min(3, doc.page_count)
+                all_text = ""
+                all_lines = []
+
+                # Collect text from first pages
+                for page_num in range(pages_to_check):
+                    text = doc.page_text(page_num)
+                    if text:
+                        all_text += text + "\n"
+                        all_lines.extend(text.split('\n'))
+
+                if section:
+                    # Fallback: search in all text if section markers not found
+                    lines = [all_text]
+                else:
+                    # Also check last page (BanRegio prints its summary there)
+                    if doc.page_count > pages_to_check:
+                        last_text = doc.page_text(doc.page_count - 1)
+                        if last_text:
+                            all_lines.extend(last_text.split('\n'))
+                    lines = all_lines
+
+            apply_summary_rules(rules, lines, summary_data)
+
     except Exception as e:
         #print(f"⚠️  Error al extraer resumen del PDF: {e}")
         import traceback
@@ -983,12 +1663,13 @@ def calculate_extracted_totals(df_mov: pd.DataFrame, bank_name: str) -> dict:
     }
     
     # Calculate based on available columns
+    # Sums are exact integer cents; the float totals are derived from them
     if 'Abonos' in df_mov.columns:
-        totals['total_abonos'] = df_mov['Abonos'].apply(normalize_amount_str).sum()
+        totals['total_abonos'] = int(amounts_to_cents(df_mov['Abonos']).sum()) / 100
         totals['total_depositos'] = totals['total_abonos']
     
     if 'Cargos' in df_mov.columns:
-        totals['total_cargos'] = df_mov['Cargos'].apply(normalize_amount_str).sum()
+        totals['total_cargos'] = int(amounts_to_cents(df_mov['Cargos']).sum()) / 100
         totals['total_retiros'] = totals['total_cargos']
     
     # Get final balance (last row's saldo if available)
@@ -1013,42 +1694,46 @@ def create_validation_sheet(pdf_summary: dict, extracted_totals: dict) -> pd.Dat
     """
     validation_data = []
     
-    # Tolerance for floating point comparison (0.01 for cents)
-    tolerance = 0.01
+    # Amounts are compared as exact integer cents
+    def amounts_match(pdf_value, ext_value):
+        return pdf_value is None or to_cents(pdf_value) == to_cents(ext_value)
+
+    def difference(pdf_value, ext_value):
+        return f"${abs(to_cents(pdf_value) - to_cents(ext_value)) / 100:,.2f}"
     
     # Compare Abonos/Depositos
     pdf_abonos = pdf_summary.get('total_abonos') or pdf_summary.get('total_depositos')
     ext_abonos = extracted_totals.get('total_abonos', 0.0)
-    abonos_match = pdf_abonos is None or abs(pdf_abonos - ext_abonos) < tolerance
+    abonos_match = amounts_match(pdf_abonos, ext_abonos)
     validation_data.append({
         'Concepto': 'Total Abonos / Depósitos',
         'Valor en PDF': f"${pdf_abonos:,.2f}" if pdf_abonos else "No encontrado",
         'Valor Extraído': f"${ext_abonos:,.2f}",
-        'Diferencia': f"${abs(pdf_abonos - ext_abonos):,.2f}" if pdf_abonos else "N/A",
+        'Diferencia': difference(pdf_abonos, ext_abonos) if pdf_abonos else "N/A",
         'Estado': '✓' if abonos_match else '✗'
     })
     
     # Compare Cargos/Retiros
     pdf_cargos = pdf_summary.get('total_cargos') or pdf_summary.get('total_retiros')
     ext_cargos = extracted_totals.get('total_cargos', 0.0)
-    cargos_match = pdf_cargos is None or abs(pdf_cargos - ext_cargos) < tolerance
+    cargos_match = amounts_match(pdf_cargos, ext_cargos)
     validation_data.append({
         'Concepto': 'Total Cargos / Retiros',
         'Valor en PDF': f"${pdf_cargos:,.2f}" if pdf_cargos else "No encontrado",
         'Valor Extraído': f"${ext_cargos:,.2f}",
-        'Diferencia': f"${abs(pdf_cargos - ext_cargos):,.2f}" if pdf_cargos else "N/A",
+        'Diferencia': difference(pdf_cargos, ext_cargos) if pdf_cargos else "N/A",
         'Estado': '✓' if cargos_match else '✗'
     })
     
     # Compare Saldo Final
     pdf_saldo = pdf_summary.get('saldo_final')
     ext_saldo = extracted_totals.get('saldo_final', 0.0)
-    saldo_match = pdf_saldo is None or abs(pdf_saldo - ext_saldo) < tolerance
+    saldo_match = amounts_match(pdf_saldo, ext_saldo)
     validation_data.append({
         'Concepto': 'Saldo Final',
         'Valor en PDF': f"${pdf_saldo:,.2f}" if pdf_saldo else "No encontrado",
         'Valor Extraído': f"${ext_saldo:,.2f}",
-        'Diferencia': f"${abs(pdf_saldo - ext_saldo):,.2f}" if pdf_saldo else "N/A",
+        'Diferencia': difference(pdf_saldo, ext_saldo) if pdf_saldo else "N/A",
         'Estado': '✓' if saldo_match else '✗'
     })
     
@@ -1117,23 +1802,19 @@ def print_validation_summary(pdf_summary: dict, extracted_totals: dict, validati
     # print("=" * 80 + "\n")
 
 
-def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame:
+def extract_digitem_section(pdf_path, columns_config: dict) -> pd.DataFrame:
     """
     Extract DIGITEM section from Banamex PDF using the same coordinate-based extraction as Movements.
     Section starts with "DIGITEM" and ends with "TRANSFERENCIA ELECTRONICA DE FONDOS".
+    Accepts a path or an open PdfDocument.
     Returns a DataFrame with columns: Fecha, Descripción, Importe
     """
     digitem_rows = []
     
     try:
-        # Use the same extraction method as Movements
-        extracted_data = extract_text_from_pdf(pdf_path)
-        # Pattern for dates: supports multiple formats:
-        # - "DIA MES" (01 ABR)
-        # - "MES DIA" (ABR 01)
-        # - "DIA MES AÑO" (06 mar 2023) - for Konfio
-        date_pattern = re.compile(r"\b(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})\b", re.I)
-        dec_amount_re = re.compile(r"\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2})")
+        # Use the same extraction method as Movements.
+        # Pages are laid out lazily; DIGITEM cannot be on the first page, so start at page 2
+        extracted_data = iter_pdf_pages(pdf_path, start_page=2)
         
         in_digitem_section = False
         extraction_stopped = False
@@ -1156,7 +1837,7 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
             # Check if we're entering DIGITEM section (starting from page 2)
             if not in_digitem_section:
                 # Check both text and words for "DIGITEM"
-                if re.search(r'\bDIGITEM\b', text, re.I):
+                if DIGITEM_RE.search(text):
                     in_digitem_section = True
                     #print(f"📄 Sección DIGITEM encontrada en página {page_num}")
                     # Skip the header line "DETALLE DE OPERACIONES" that comes after DIGITEM
@@ -1164,7 +1845,7 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
                 else:
                     # Also check in words (in case text extraction missed it)
                     all_words_text = ' '.join([w.get('text', '') for w in words])
-                    if re.search(r'\bDIGITEM\b', all_words_text, re.I):
+                    if DIGITEM_RE.search(all_words_text):
                         in_digitem_section = True
                         # print(f"📄 Sección DIGITEM encontrada en página {page_num} (desde words)")
                         skip_next_line = True
@@ -1184,14 +1865,14 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
                     
                     # Check if we're leaving DIGITEM section (check each row)
                     all_row_text = ' '.join([w.get('text', '') for w in row_words])
-                    if re.search(r'TRANSFERENCIA\s+ELECTRONICA\s+DE\s+FONDOS', all_row_text, re.I):
+                    if TRANSFERENCIA_RE.search(all_row_text):
                         # print(f"📄 Fin de sección DIGITEM encontrado en página {page_num}")
                         extraction_stopped = True
                         break
                     
                     # Skip header line "DETALLE DE OPERACIONES" that comes right after DIGITEM
                     if skip_next_line:
-                        if re.search(r'DETALLE\s+DE\s+OPERACIONES', all_row_text, re.I):
+                        if DETALLE_OPERACIONES_RE.search(all_row_text):
                             # print(f"   ⏭️  Saltando línea de encabezado: DETALLE DE OPERACIONES")
                             skip_next_line = False
                             continue
@@ -1202,12 +1883,12 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
                         break
                     
                     # Extract structured row using coordinates (same as Movements)
-                    # Pass date_pattern to enable date/description separation
-                    row_data = extract_movement_row(row_words, columns_config, None, date_pattern)
+                    # Pass the date pattern to enable date/description separation
+                    row_data = extract_movement_row(row_words, columns_config, None, DATE_RE)
                     
                     # Check if this row has a date (same logic as Movements)
                     fecha_val = str(row_data.get('fecha') or '')
-                    has_date = bool(date_pattern.search(fecha_val))
+                    has_date = bool(DATE_RE.search(fecha_val))
                     
                     # Check if description contains "EMP" (required for DIGITEM rows)
                     desc_val = str(row_data.get('descripcion') or '')
@@ -1278,7 +1959,7 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
                                         cont_parts.append(str(v))
                                 
                                 cont_text = ' '.join(cont_parts)
-                                cont_text = dec_amount_re.sub('', cont_text)
+                                cont_text = DEC_AMOUNT_RE.sub('', cont_text)
                                 cont_text = ' '.join(cont_text.split()).strip()
                                 
                                 if cont_text:
@@ -1360,7 +2041,7 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
                 if 'descripcion' in row and row.get('descripcion'):
                     parts.append(str(row.get('descripcion')))
                 text = ' '.join(parts)
-                text = dec_amount_re.sub('', text)
+                text = DEC_AMOUNT_RE.sub('', text)
                 text = ' '.join(text.split()).strip()
                 return text if text else ''
             
@@ -1394,15 +2075,10 @@ def extract_digitem_section(pdf_path: str, columns_config: dict) -> pd.DataFrame
 
 
 def _extract_two_dates(txt):
-    """Helper function to extract dates (same as in main function)"""
+    """Return the first two dates found in txt as (Fecha Oper, Fecha Liq); more than two keeps the first two."""
     if not txt or not isinstance(txt, str):
         return (None, None)
-    # Pattern for dates: supports multiple formats:
-    # - "DIA MES" (01 ABR)
-    # - "MES DIA" (ABR 01)
-    # - "DIA MES AÑO" (06 mar 2023) - for Konfio
-    date_pattern = re.compile(r"(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})", re.I)
-    found = date_pattern.findall(txt)
+    found = DATE_ANYWHERE_RE.findall(txt)
     if not found:
         return (None, None)
     if len(found) == 1:
@@ -1410,20 +2086,51 @@ def _extract_two_dates(txt):
     return (found[0], found[1])
 
 
-def extract_transferencia_section(pdf_path: str) -> pd.DataFrame:
+def _extract_two_amounts(txt):
+    """Extract two amounts from the saldo column (OPERACIÓN and LIQUIDACIÓN)."""
+    if not txt or not isinstance(txt, str):
+        return (None, None)
+    # Find all amounts matching the decimal pattern
+    amounts = DEC_AMOUNT_RE.findall(str(txt))
+    if len(amounts) >= 2:
+        # Check if both amounts are the same (normalize by removing separators)
+        # Normalize: remove commas, spaces, and compare numeric parts
+        def normalize_amount(amt):
+            # Remove commas, spaces, keep only digits and decimal separator
+            normalized = re.sub(r'[,\s]', '', amt)
+            return normalized
+
+        amt1_normalized = normalize_amount(amounts[0])
+        amt2_normalized = normalize_amount(amounts[1])
+
+        if amt1_normalized == amt2_normalized:
+            # If amounts are the same, return the same value for both columns
+            return (amounts[0], amounts[0])
+        # Return first two amounts (first is LIQUIDACIÓN, second is OPERACIÓN)
+        return (amounts[0], amounts[1])
+    elif len(amounts) == 1:
+        # Only one amount found - assign it to both columns
+        return (amounts[0], amounts[0])
+    else:
+        return (None, None)
+
+
+def extract_transferencia_section(pdf_path) -> pd.DataFrame:
     """
     Extract TRANSFERENCIA ELECTRONICA DE FONDOS section from Banamex PDF.
     Section starts with "TRANSFERENCIA ELECTRONICA DE FONDOS" and ends with "TOTALES:".
+    Accepts a path or an open PdfDocument.
     Returns a DataFrame with columns: Fecha, Descripción, Importe, Comisiones, I.V.A, Total
     """
     transferencia_rows = []
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_document(pdf_path) as doc:
             in_transferencia_section = False
+            section_closed = False
             
-            for page_num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text()
+            for page_index in doc.scan_page_indexes():
+                text = doc.page_text(page_index)
                 if not text:
                     continue
                 
@@ -1435,20 +2142,21 @@ def extract_transferencia_section(pdf_path: str) -> pd.DataFrame:
                         continue
                     
                     # Check if we're entering TRANSFERENCIA section
-                    if re.search(r'TRANSFERENCIA\s+ELECTRONICA\s+DE\s+FONDOS', line_clean, re.I):
+                    if TRANSFERENCIA_RE.search(line_clean):
                         in_transferencia_section = True
-                        #print(f"📄 Sección TRANSFERENCIA encontrada en página {page_num}")
+                        #print(f"📄 Sección TRANSFERENCIA encontrada en página {page_index + 1}")
                         continue
                     
                     # Check if we're leaving TRANSFERENCIA section
-                    if in_transferencia_section and re.search(r'^TOTALES:', line_clean, re.I):
-                        #print(f"📄 Fin de sección TRANSFERENCIA encontrado en página {page_num}")
+                    if in_transferencia_section and TOTALES_RE.search(line_clean):
+                        #print(f"📄 Fin de sección TRANSFERENCIA encontrado en página {page_index + 1}")
+                        section_closed = True
                         break
                     
                     # Extract rows from TRANSFERENCIA section
                     if in_transferencia_section:
                         # Try to extract date (DD MMM format)
-                        date_match = re.search(r'(\d{1,2})\s+([A-Z]{3})', line_clean)
+                        date_match = DAY_MONTH_RE.search(line_clean)
                         if date_match:
                             fecha = f"{date_match.group(1)} {date_match.group(2)}"
                             
@@ -1499,6 +2207,10 @@ def extract_transferencia_section(pdf_path: str) -> pd.DataFrame:
                                         transferencia_rows[-1]['Descripción'] += ' ' + line_clean
                                     else:
                                         transferencia_rows[-1]['Descripción'] = line_clean
+
+                # The section is over: later pages aren't laid out
+                if section_closed:
+                    break
         
         if transferencia_rows:
             df_transferencia = pd.DataFrame(transferencia_rows)
@@ -1516,28 +2228,35 @@ def extract_transferencia_section(pdf_path: str) -> pd.DataFrame:
         return pd.DataFrame(columns=['Fecha', 'Descripción', 'Importe', 'Comisiones', 'I.V.A', 'Total'])
 
 
-def extract_text_from_pdf(pdf_path: str) -> list:
+def iter_pdf_pages(pdf_path, start_page: int = 1):
+    """Lazily yield page dictionaries (page, content, words) from a path or an open PdfDocument."""
+    with open_document(pdf_path) as doc:
+        yield from doc.iter_pages(start_page)
+
+
+def parse_page_range(spec: str) -> tuple:
+    """Parse a --pages value ("3-10", "5", "3-" or "-10") into 1-based (first, last)."""
+    match = re.fullmatch(r'\s*(\d*)\s*(-?)\s*(\d*)\s*', spec or '')
+    if not match or not (match.group(1) or match.group(3)):
+        raise ValueError(f"Invalid page range: {spec!r}")
+    first = int(match.group(1)) if match.group(1) else 1
+    if match.group(2):
+        last = int(match.group(3)) if match.group(3) else sys.maxsize
+    else:
+        last = first
+    if first < 1 or last < first:
+        raise ValueError(f"Invalid page range: {spec!r}")
+    return (first, last)
+
+
+def extract_text_from_pdf(pdf_path) -> list:
     """
     Extract text and word positions from each page of a PDF.
+    Accepts a path or an open PdfDocument (pages already laid out are reused).
     Returns a list of dictionaries (page_number, text, words).
     """
-    extracted_data = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_number, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text()
-            # also extract words with positions for coordinate-based column detection
-            try:
-                words = page.extract_words(x_tolerance=3, y_tolerance=3)
-            except Exception:
-                words = []
-            extracted_data.append({
-                "page": page_number,
-                "content": text if text else "",
-                "words": words
-            })
-
-    return extracted_data
+    with open_document(pdf_path) as doc:
+        return doc.pages_data()
 
 
 def export_to_excel(data: list, output_path: str):
@@ -1549,25 +2268,305 @@ def export_to_excel(data: list, output_path: str):
     print(f"✅ Excel file created -> {output_path}")
 
 
-def split_pages_into_lines(pages: list) -> list:
-    """Return list of page dicts with lines: [{'page': n, 'lines': [...]}, ...]"""
-    pages_lines = []
+def _excel_cell_value(value):
+    """Convert a DataFrame value to what openpyxl writes (NaN/None become empty cells)."""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    return value
+
+
+def write_excel_streaming(output_path: str, sheets: list):
+    """
+    Write (sheet name, DataFrame) pairs with openpyxl's write-only workbook.
+    Rows are serialized to the sheet's XML as they are appended instead of being
+    kept as cell objects, so the workbook adds little on top of the DataFrames
+    (which are already in memory); peak memory is roughly the parsed tables.
+    Sheet names, column order, cell values and the bold, bordered header row
+    match DataFrame.to_excel.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    thin = Side(style='thin')
+    header_font = Font(bold=True)
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_alignment = Alignment(horizontal='center', vertical='top')
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, df in sheets:
+        sheet = workbook.create_sheet(title=sheet_name)
+        header = []
+        for column in df.columns:
+            cell = WriteOnlyCell(sheet, value=str(column))
+            cell.font, cell.border, cell.alignment = header_font, header_border, header_alignment
+            header.append(cell)
+        sheet.append(header)
+        for row in df.itertuples(index=False, name=None):
+            sheet.append([_excel_cell_value(value) for value in row])
+    workbook.save(output_path)
+
+
+# Columnar output (--format parquet / arrow, needs the optional pyarrow package)
+COLUMNAR_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+OUTPUT_FORMATS = ("xlsx",) + tuple(COLUMNAR_EXTENSIONS)
+AMOUNT_COLUMNS = ("Cargos", "Abonos", "Saldo", "Operación", "Liquidación",
+                  "Importe", "Comisiones", "I.V.A", "Total")
+DATE_COLUMNS = ("Fecha", "Fecha Oper", "Fecha Liq.")
+# Full dates on the statement's first page: 31/01/2023, 31-ENE-2023, 31 DE ENERO DE 2023
+STATEMENT_DATE_RE = re.compile(
+    r'\b(\d{1,2})\s*[/\-\s]\s*(?:de\s+)?(\d{1,2}|[A-Za-z]{3,10})\s*[/\-\s]\s*(?:de\s+)?(\d{4})\b', re.I
+)
+
+
+def infer_statement_period(text: str) -> tuple:
+    """Return (year, month) of the latest full date in text (the statement's end), or (None, None)."""
+    latest = None
+    for _, month, year in STATEMENT_DATE_RE.findall(text or ''):
+        month_number = int(month) if month.isdigit() else MONTH_NUMBERS.get(month[:3].upper())
+        if month_number and 1 <= month_number <= 12:
+            latest = max(latest or (0, 0), (int(year), month_number))
+    return latest or (None, None)
+
+
+def parse_movement_date(text, statement_year: int = None, statement_month: int = None):
+    """
+    Turn a movement date ("05 ENE", "28/ENE", "12-ENE-23", "06 mar 2023") into a date.
+    Dates without a year take the statement's year; a month after the statement's
+    closing month belongs to the previous year (statements that cross New Year).
+    Returns None when there is no valid date.
+    """
+    match = DATE_RE.search(text) if isinstance(text, str) else None
+    if not match:
+        return None
+    token = classify_word(match.group())
+    if not token.day or not token.month:
+        return None
+    numbers = re.findall(r'\d+', match.group())
+    if len(numbers) > 1:
+        year = int(numbers[-1])
+        year = year + 2000 if year < 100 else year
+    elif statement_year:
+        year = statement_year
+        if statement_month and token.month > statement_month:
+            year -= 1
+    else:
+        return None
+    try:
+        return datetime.date(year, token.month, token.day)
+    except ValueError:
+        return None
+
+
+def typed_table(df: pd.DataFrame, bank: str, source_file: str, statement_period: tuple = (None, None),
+                pages: pd.Series = None) -> pd.DataFrame:
+    """
+    Convert a workbook sheet to a typed table: the trailing Total row is dropped, date
+    columns become dates, amount columns become nullable int64 cents (named <column>_cents)
+    and the rest stay strings. Bank, source file and page (when known) are added as columns.
+    """
+    if len(df) and str(df.iloc[-1, 0]) == 'Total':
+        df = df.iloc[:-1]
+    df = df.reset_index(drop=True)
+    table = {}
+    for column in df.columns:
+        values = df[column]
+        if column in DATE_COLUMNS:
+            table[column] = pd.Series([parse_movement_date(v, *statement_period) for v in values], dtype=object)
+        elif column in AMOUNT_COLUMNS:
+            blank = values.isna() | (values.astype(str).str.strip() == '')
+            table[f"{column}_cents"] = amounts_to_cents(values).astype('Int64').mask(blank)
+        elif column == 'page':
+            table[column] = pd.to_numeric(values, errors='coerce').astype('Int64')
+        else:
+            table[column] = values.astype('string')
+    table = pd.DataFrame(table, index=df.index)
+    table['bank'] = pd.Series([bank] * len(table), dtype='string')
+    table['source_file'] = pd.Series([source_file] * len(table), dtype='string')
+    if 'page' not in table.columns and pages is not None and len(pages) == len(table):
+        table['page'] = pd.to_numeric(pd.Series(pages).reset_index(drop=True), errors='coerce').astype('Int64')
+    return table
+
+
+def write_columnar(output_base: str, tables: dict, fmt: str) -> list:
+    """
+    Write each typed table to <output_base>.<name>.parquet (or .arrow, Arrow IPC/Feather).
+    Returns the written paths. Requires pyarrow.
+    """
+    paths = []
+    for name, table in tables.items():
+        path = f"{output_base}.{name}{COLUMNAR_EXTENSIONS[fmt]}"
+        if fmt == "parquet":
+            table.to_parquet(path, index=False)
+        else:
+            table.to_feather(path)
+        paths.append(path)
+    return paths
+
+
+# Ledger database schema: one row per statement (keyed by the PDF's SHA-256) and its movements,
+# DIGITEM and transferencias rows; dates are ISO text and amounts integer cents
+LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS statements (
+        file_hash TEXT PRIMARY KEY, source_file TEXT, bank TEXT, pages INTEGER,
+        period_year INTEGER, period_month INTEGER, movements INTEGER,
+        validation TEXT, imported_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS movements (
+        id INTEGER PRIMARY KEY, file_hash TEXT NOT NULL REFERENCES statements (file_hash),
+        row INTEGER, bank TEXT, date TEXT, settlement_date TEXT, description TEXT,
+        cargos_cents INTEGER, abonos_cents INTEGER, saldo_cents INTEGER, page INTEGER,
+        UNIQUE (file_hash, row)
+    );
+    CREATE TABLE IF NOT EXISTS digitem (
+        id INTEGER PRIMARY KEY, file_hash TEXT NOT NULL REFERENCES statements (file_hash),
+        row INTEGER, bank TEXT, date TEXT, description TEXT, importe_cents INTEGER,
+        UNIQUE (file_hash, row)
+    );
+    CREATE TABLE IF NOT EXISTS transferencias (
+        id INTEGER PRIMARY KEY, file_hash TEXT NOT NULL REFERENCES statements (file_hash),
+        row INTEGER, bank TEXT, date TEXT, description TEXT, importe_cents INTEGER,
+        comisiones_cents INTEGER, iva_cents INTEGER, total_cents INTEGER,
+        UNIQUE (file_hash, row)
+    );
+    CREATE INDEX IF NOT EXISTS movements_bank_date ON movements (bank, date);
+    CREATE INDEX IF NOT EXISTS digitem_bank_date ON digitem (bank, date);
+    CREATE INDEX IF NOT EXISTS transferencias_bank_date ON transferencias (bank, date);
+    CREATE VIRTUAL TABLE IF NOT EXISTS movements_fts USING fts5 (
+        description, content='movements', content_rowid='id'
+    );
+"""
+
+# Ledger column <- typed table column (first one present wins), per table
+LEDGER_COLUMNS = {
+    "movements": {
+        "date": ("Fecha", "Fecha Oper"),
+        "settlement_date": ("Fecha Liq.",),
+        "description": ("Descripción",),
+        "cargos_cents": ("Cargos_cents",),
+        "abonos_cents": ("Abonos_cents",),
+        "saldo_cents": ("Saldo_cents", "Operación_cents"),
+        "page": ("page",),
+    },
+    "digitem": {
+        "date": ("Fecha",),
+        "description": ("Descripción",),
+        "importe_cents": ("Importe_cents",),
+    },
+    "transferencias": {
+        "date": ("Fecha",),
+        "description": ("Descripción",),
+        "importe_cents": ("Importe_cents",),
+        "comisiones_cents": ("Comisiones_cents",),
+        "iva_cents": ("I.V.A_cents",),
+        "total_cents": ("Total_cents",),
+    },
+}
+
+
+def _ledger_value(value):
+    """SQLite value of a typed table cell: NA becomes NULL, dates ISO text, numpy scalars Python ones."""
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class LedgerStore:
+    """
+    Local SQLite ledger of parsed statements, for queries across many statements.
+    Tables: statements, movements, digitem and transferencias, keyed by the PDF's
+    SHA-256, with (bank, date) indexes and an FTS5 index on movement descriptions.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.executescript(LEDGER_SCHEMA)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def has_statement(self, file_hash: str) -> bool:
+        row = self._conn.execute("SELECT 1 FROM statements WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row is not None
+
+    def statement(self, file_hash: str) -> dict:
+        """The stored statements row for this hash (bank, pages, movements, validation...), or None."""
+        cursor = self._conn.execute("SELECT * FROM statements WHERE file_hash = ?", (file_hash,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip((column[0] for column in cursor.description), row))
+
+    def add_statement(self, file_hash: str, statement: dict, tables: dict) -> bool:
+        """
+        Insert one statement and its typed tables (see typed_table) in a single transaction.
+        statement holds source_file, bank, pages, period_year, period_month and validation.
+        Returns False, writing nothing, when a PDF with this hash was already imported.
+        """
+        with self._conn:
+            if self.has_statement(file_hash):
+                return False
+            movements = tables.get("movements")
+            self._conn.execute(
+                "INSERT INTO statements VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_hash, statement.get("source_file"), statement.get("bank"), statement.get("pages"),
+                 statement.get("period_year"), statement.get("period_month"),
+                 len(movements) if movements is not None else 0, statement.get("validation"),
+                 datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+            for name, columns in LEDGER_COLUMNS.items():
+                table = tables.get(name)
+                if table is None or table.empty:
+                    continue
+                values = []
+                for ledger_column, sources in columns.items():
+                    source = next((c for c in sources if c in table.columns), None)
+                    values.append(table[source].tolist() if source else [None] * len(table))
+                rows = [
+                    (file_hash, i, statement.get("bank")) + tuple(_ledger_value(v) for v in row)
+                    for i, row in enumerate(zip(*values))
+                ]
+                names = ", ".join(["file_hash", "row", "bank"] + list(columns))
+                marks = ", ".join("?" * (len(columns) + 3))
+                self._conn.executemany(f"INSERT INTO {name} ({names}) VALUES ({marks})", rows)
+            self._conn.execute(
+                "INSERT INTO movements_fts (rowid, description) "
+                "SELECT id, description FROM movements WHERE file_hash = ?",
+                (file_hash,),
+            )
+        return True
+
+
+def iter_pages_lines(pages):
+    """Lazily yield page dicts with lines: {'page': n, 'lines': [...]} for each page dict."""
     for p in pages:
         content = (p.get('content') or '')
         # normalize NBSPs
         content = content.replace('\u00A0', ' ').replace('\u202F', ' ')
         lines = [" ".join(l.split()) for l in content.splitlines() if l and l.strip()]
-        pages_lines.append({'page': p.get('page'), 'lines': lines})
-    return pages_lines
+        yield {'page': p.get('page'), 'lines': lines}
+
+
+def split_pages_into_lines(pages: list) -> list:
+    """Return list of page dicts with lines: [{'page': n, 'lines': [...]}, ...]"""
+    return list(iter_pages_lines(pages))
 
 
 def group_entries_from_lines(lines):
     """Group lines into transaction entries: a line starting with a date begins a new entry."""
-    # Pattern for dates: supports multiple formats including "DIA MES AÑO" (06 mar 2023)
-    day_re = re.compile(r"\b(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})\b", re.I)
     entries = []
     for line in lines:
-        if day_re.search(line):
+        if DATE_RE.search(line):
             entries.append(line)
         else:
             if entries:
@@ -1577,38 +2576,154 @@ def group_entries_from_lines(lines):
     return entries
 
 
+def cluster_rows(tops, y_tolerance=5):
+    """
+    Cluster word tops into rows without walking the words one by one.
+    A row starts at its first (lowest) top and takes every following top within
+    y_tolerance of it, exactly like the original word-by-word walk.
+    Returns (order, bounds): order is the stable argsort of tops and row k is
+    order[bounds[k]:bounds[k + 1]].
+    """
+    tops = np.asarray(tops, dtype=float)
+    order = np.argsort(tops, kind="stable")
+    sorted_tops = tops[order]
+    n = len(sorted_tops)
+    if n == 0:
+        return order, np.zeros(1, dtype=np.intp)
+
+    # A gap larger than the tolerance always starts a new row
+    gap_starts = np.flatnonzero(np.diff(sorted_tops) > y_tolerance) + 1
+    cluster_bounds = np.concatenate(([0], gap_starts, [n]))
+    spans = sorted_tops[cluster_bounds[1:] - 1] - sorted_tops[cluster_bounds[:-1]]
+
+    # Clusters spanning more than the tolerance are cut again from each row's anchor
+    if not (spans > y_tolerance).any():
+        return order, cluster_bounds
+    top_list = sorted_tops.tolist()
+    bounds = [0]
+    for start, end, wide in zip(cluster_bounds[:-1].tolist(), cluster_bounds[1:].tolist(),
+                                (spans > y_tolerance).tolist()):
+        while wide and start < end:
+            anchor = top_list[start]
+            j = bisect_right(top_list, anchor + y_tolerance, start, end)
+            # Keep the walk's exact test (top - anchor <= tolerance) at the boundary
+            while j < end and top_list[j] - anchor <= y_tolerance:
+                j += 1
+            while j > start + 1 and top_list[j - 1] - anchor > y_tolerance:
+                j -= 1
+            if j < end:
+                bounds.append(j)
+            start = j
+        bounds.append(end)
+    return order, np.asarray(bounds, dtype=np.intp)
+
+
 def group_words_by_row(words, y_tolerance=5):
     """Group words by Y-coordinate (rows) to extract table rows."""
     if not words:
         return []
     
-    # Sort by top coordinate
-    sorted_words = sorted(words, key=lambda w: w.get('top', 0))
-    
-    rows = []
-    current_row = []
-    current_y = None
-    
-    for word in sorted_words:
-        word_y = word.get('top', 0)
-        if current_y is None:
-            current_y = word_y
-        
-        # If word is within y_tolerance of current row, add it
-        if abs(word_y - current_y) <= y_tolerance:
-            current_row.append(word)
-        else:
-            # Start a new row
-            if current_row:
-                rows.append(current_row)
-            current_row = [word]
-            current_y = word_y
-    
-    # Don't forget the last row
-    if current_row:
-        rows.append(current_row)
+    if isinstance(words, PageWords):
+        order, bounds = cluster_rows(words.coords["top"], y_tolerance)
+        order = order.tolist()
+        return [words.take(order[a:b]) for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
     
-    return rows
+    order, bounds = cluster_rows([w.get('top', 0) for w in words], y_tolerance)
+    order = order.tolist()
+    return [[words[i] for i in order[a:b]] for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+
+NUMERIC_COLUMNS = ('cargos', 'abonos', 'saldo')
+
+
+def _scan_columns(center, columns):
+    """Linear column lookup: numeric columns first, then the rest in config order."""
+    # This fixes the issue where cargos (360-398) overlaps with descripcion (160-400)
+    for col_name in NUMERIC_COLUMNS:
+        if col_name in columns:
+            x_min, x_max = columns[col_name]
+            if x_min <= center <= x_max:
+                return col_name
+    for col_name, (x_min, x_max) in columns.items():
+        if col_name not in NUMERIC_COLUMNS:
+            if x_min <= center <= x_max:
+                return col_name
+    return None
+
+
+class ColumnIndex:
+    """
+    Column ranges of one bank compiled into a sorted interval index.
+    The x axis is cut at every range boundary; each boundary point and each open segment
+    between two boundaries resolves to the same column the linear scan would pick, so a
+    lookup is a single bisect (or one numpy searchsorted for a whole page).
+    Also holds the column centers and tolerance-expanded numeric ranges used when
+    amounts are reassigned.
+    """
+
+    # Below this many centers a bisect loop is cheaper than building numpy arrays
+    BATCH_MIN_SIZE = 64
+
+    def __init__(self, columns: dict):
+        self.columns = dict(columns)
+        self.centers = {col: (x0 + x1) / 2 for col, (x0, x1) in self.columns.items()}
+        self.numeric_ranges = {col: self.columns[col] for col in NUMERIC_COLUMNS if col in self.columns}
+        self.numeric_centers = {col: self.centers[col] for col in self.numeric_ranges}
+        self.descripcion_range = self.columns.get('descripcion')
+        self.fecha_range = self.columns.get('fecha')
+        self._expanded = {}
+
+        self._points = sorted({x for rng in self.columns.values() for x in rng})
+        self._point_cols = [_scan_columns(p, self.columns) for p in self._points]
+        # Segment i lies left of point i; segment 0 and the last one are outside every range
+        self._segment_cols = [None] + [
+            _scan_columns((a + b) / 2, self.columns) for a, b in zip(self._points, self._points[1:])
+        ] + [None]
+        # NumPy copies for lookup_many, built on first use (configs are compiled at import)
+        self._np_points = None
+
+    def lookup(self, center):
+        """Return the column whose range contains center, or None."""
+        i = bisect_left(self._points, center)
+        if i < len(self._points) and self._points[i] == center:
+            return self._point_cols[i]
+        return self._segment_cols[i]
+
+    def lookup_many(self, centers) -> list:
+        """Return the column for each center (e.g. every word on a page) in one call."""
+        if len(centers) < self.BATCH_MIN_SIZE or not self._points:
+            return [self.lookup(c) for c in centers]
+        if self._np_points is None:
+            self._np_point_cols = np.asarray(self._point_cols + [None], dtype=object)
+            self._np_segment_cols = np.asarray(self._segment_cols, dtype=object)
+            self._np_points = np.asarray(self._points, dtype=float)
+        values = np.asarray(centers, dtype=float)
+        idx = np.searchsorted(self._np_points, values, side='left')
+        clipped = np.minimum(idx, len(self._points) - 1)
+        on_point = (idx < len(self._points)) & (self._np_points[clipped] == values)
+        return np.where(on_point, self._np_point_cols[idx], self._np_segment_cols[idx]).tolist()
+
+    def expanded_ranges(self, tolerance) -> dict:
+        """Numeric column ranges widened by tolerance on both sides (cached per tolerance)."""
+        ranges = self._expanded.get(tolerance)
+        if ranges is None:
+            ranges = {col: (x0 - tolerance, x1 + tolerance) for col, (x0, x1) in self.numeric_ranges.items()}
+            self._expanded[tolerance] = ranges
+        return ranges
+
+
+@lru_cache(maxsize=None)
+def _column_index(column_items: tuple) -> ColumnIndex:
+    return ColumnIndex(dict(column_items))
+
+
+def column_index(columns: dict) -> ColumnIndex:
+    """Return the compiled ColumnIndex for a columns config (built once per distinct config)."""
+    return _column_index(tuple(columns.items()))
+
+
+# Every configured bank is compiled at load
+COLUMN_INDEXES = {name: column_index(cfg["columns"]) for name, cfg in BANK_CONFIGS.items()}
 
 
 def assign_word_to_column(word_x0, word_x1, columns):
@@ -1616,24 +2731,7 @@ def assign_word_to_column(word_x0, word_x1, columns):
     Returns column name or None if not in any range.
     Prioritizes numeric columns (cargos, abonos, saldo) over description when there's overlap.
     """
-    word_center = (word_x0 + word_x1) / 2
-    
-    # First, check numeric columns (cargos, abonos, saldo) to prioritize them
-    # This fixes the issue where cargos (360-398) overlaps with descripcion (160-400)
-    numeric_cols = ['cargos', 'abonos', 'saldo']
-    for col_name in numeric_cols:
-        if col_name in columns:
-            x_min, x_max = columns[col_name]
-            if x_min <= word_center <= x_max:
-                return col_name
-    
-    # Then check other columns (fecha, liq, descripcion, etc.)
-    for col_name, (x_min, x_max) in columns.items():
-        if col_name not in numeric_cols:  # Skip numeric cols, already checked
-            if x_min <= word_center <= x_max:
-                return col_name
-    
-    return None
+    return column_index(columns).lookup((word_x0 + word_x1) / 2)
 
 
 def is_transaction_row(row_data):
@@ -1648,10 +2746,7 @@ def is_transaction_row(row_data):
     saldo = (row_data.get('saldo') or '').strip()
     
     # Must have a date matching DD/MMM pattern
-    # Pattern for dates: supports both "DIA MES" (01 ABR) and "MES DIA" (ABR 01) formats
-    # Pattern for dates: supports multiple formats including "DIA MES AÑO" (06 mar 2023)
-    day_re = re.compile(r"\b(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})\b", re.I)
-    has_date = bool(day_re.search(fecha))
+    has_date = bool(DATE_RE.search(fecha))
     
     # Must have at least one numeric amount
     has_amount = bool(cargos or abonos or saldo)
@@ -1666,39 +2761,41 @@ def extract_movement_row(words, columns, bank_name=None, date_pattern=None):
     
     # Pattern to detect dates (for separating date from description)
     if date_pattern is None:
-        date_pattern = re.compile(r"\b(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})\b", re.I)
+        date_pattern = DATE_RE
     
     # Sort words by X coordinate within the row
     sorted_words = sorted(words, key=lambda w: w.get('x0', 0))
+    index = column_index(columns)
+    centers = [(w.get('x0', 0) + w.get('x1', 0)) / 2 for w in sorted_words]
+    word_columns = index.lookup_many(centers)
     
-    for word in sorted_words:
+    for word, center, col_name in zip(sorted_words, centers, word_columns):
         text = word.get('text', '')
-        x0 = word.get('x0', 0)
-        x1 = word.get('x1', 0)
-        center = (x0 + x1) / 2
+        token = classify_word(text)
 
         # detect amount tokens inside the word
-        m = DEC_AMOUNT_RE.search(text)
-        if m:
-            amounts.append((m.group(), center))
+        if token.amount:
+            amounts.append((token.amount, center))
 
         # Check if word contains a date followed by description text (especially for Banorte)
         # Example: "12-ENE-23EST EPIGMENIO" or "30-ENE-23I.V.A" should be split correctly
-        date_match = date_pattern.search(text)
-        if date_match and 'fecha' in columns and 'descripcion' in columns:
-            date_text = date_match.group()
-            date_end_pos = date_match.end()
+        if date_pattern is DATE_RE:
+            date_span = token.date_span
+        else:
+            date_match = date_pattern.search(text)
+            date_span = date_match.span() if date_match else None
+        if date_span and 'fecha' in columns and 'descripcion' in columns:
+            date_text = text[date_span[0]:date_span[1]]
+            date_end_pos = date_span[1]
             
             # For Banorte format "DIA-MES-AÑO", check if the date pattern captured the full date
             # Sometimes the pattern might only capture "30-ENE" and miss "-23"
             # Try to find a more complete date match by looking for the full pattern
             if bank_name == 'Banorte':
                 # Pattern specifically for Banorte: DIA-MES-AÑO (e.g., "30-ENE-23")
-                banorte_date_pattern = re.compile(r'(\d{1,2}-[A-Z]{3}-\d{2,4})', re.I)
-                banorte_match = banorte_date_pattern.search(text)
-                if banorte_match:
-                    date_text = banorte_match.group(1)  # Full date including year
-                    date_end_pos = banorte_match.end()
+                if token.banorte_date_span:
+                    date_text = text[token.banorte_date_span[0]:token.banorte_date_span[1]]  # Full date including year
+                    date_end_pos = token.banorte_date_span[1]
             
             # If there's text after the date, split it
             if date_end_pos < len(text):
@@ -1716,22 +2813,14 @@ def extract_movement_row(words, columns, bank_name=None, date_pattern=None):
                         if potential_year.isdigit():
                             # Check if we can find a date pattern that includes this
                             # Don't use word boundaries since the date might be at the start of text
-                            full_date_pattern = re.compile(r'(\d{1,2}-[A-Z]{3}-\d{2,4})', re.I)
-                            full_match = full_date_pattern.search(text)
-                            if full_match:
-                                date_text = full_match.group(1)
-                                date_end_pos = full_match.end()
+                            if token.banorte_date_span:
+                                date_text = text[token.banorte_date_span[0]:token.banorte_date_span[1]]
+                                date_end_pos = token.banorte_date_span[1]
                                 description_text = text[date_end_pos:].strip()
                 
                 # Check which column this word's center belongs to
-                fecha_col_center = None
-                descripcion_col_center = None
-                if 'fecha' in columns:
-                    fecha_x0, fecha_x1 = columns['fecha']
-                    fecha_col_center = (fecha_x0 + fecha_x1) / 2
-                if 'descripcion' in columns:
-                    descripcion_x0, descripcion_x1 = columns['descripcion']
-                    descripcion_col_center = (descripcion_x0 + descripcion_x1) / 2
+                fecha_col_center = index.centers.get('fecha')
+                descripcion_col_center = index.centers.get('descripcion')
                 
                 # Always split: assign date to fecha column and description to descripcion column
                 if row_data['fecha']:
@@ -1747,8 +2836,7 @@ def extract_movement_row(words, columns, bank_name=None, date_pattern=None):
                 
                 continue  # Skip normal assignment for this word
         
-        # Normal column assignment
-        col_name = assign_word_to_column(x0, x1, columns)
+        # Normal column assignment (column looked up for the whole row above)
         if col_name:
             if row_data[col_name]:
                 row_data[col_name] += ' ' + text
@@ -1769,14 +2857,10 @@ def split_row_if_multiple_movements(row_words, columns_config, date_pattern, ban
         return [row_words]
     
     # Find fecha column range if available
-    fecha_range = None
-    if 'fecha' in columns_config:
-        fecha_x0, fecha_x1 = columns_config['fecha']
-        fecha_range = (fecha_x0, fecha_x1)
+    index = column_index(columns_config)
+    fecha_range = index.fecha_range
     
-    # Pattern to exclude hours (like "17:47:53") from being detected as dates
-    # Hours have format HH:MM:SS or HH:MM
-    hour_pattern = re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?\b')
+    # Hours (like "17:47:53", HH:MM:SS or HH:MM) are classified as "time" and never count as dates
     
     # Find all words that contain dates (either in fecha column or anywhere if no fecha column)
     date_words = []
@@ -1785,14 +2869,15 @@ def split_row_if_multiple_movements(row_words, columns_config, date_pattern, ban
         x0 = word.get('x0', 0)
         x1 = word.get('x1', 0)
         center = (x0 + x1) / 2
+        token = classify_word(text)
         
         # Skip if this looks like a time (hour:minute:second)
-        if hour_pattern.search(text):
+        if token.kind == "time":
             continue
         
         # Check if word contains a date pattern
         # For Banorte, also check if the word contains multiple dates (like "17-ENE-2317-ENE-23")
-        date_matches = date_pattern.findall(text)
+        date_matches = token.dates if date_pattern is DATE_RE else date_pattern.findall(text)
         if date_matches:
             # If fecha column is defined, only consider dates in that column
             if fecha_range:
@@ -1861,30 +2946,19 @@ def split_row_if_multiple_movements(row_words, columns_config, date_pattern, ban
     
     # Check if there are multiple amounts in numeric columns (cargos, abonos, saldo)
     # This indicates multiple movements even if there's only one date
-    numeric_cols = ['cargos', 'abonos', 'saldo']
-    numeric_ranges = {}
-    for col in numeric_cols:
-        if col in columns_config:
-            x0, x1 = columns_config[col]
-            numeric_ranges[col] = (x0, x1)
+    numeric_ranges = index.numeric_ranges
     
     if numeric_ranges:
         # Count amounts in each numeric column
         amounts_per_col = {col: [] for col in numeric_ranges.keys()}
         
-        for word in row_words:
-            text = word.get('text', '')
-            x0 = word.get('x0', 0)
-            x1 = word.get('x1', 0)
-            center = (x0 + x1) / 2
-            
+        centers = [(w.get('x0', 0) + w.get('x1', 0)) / 2 for w in row_words]
+        for word, col in zip(row_words, index.lookup_many(centers)):
             # Check if word contains an amount
-            if DEC_AMOUNT_RE.search(text):
-                # Find which numeric column this amount belongs to
-                for col, (col_x0, col_x1) in numeric_ranges.items():
-                    if col_x0 <= center <= col_x1:
-                        amounts_per_col[col].append((word, word.get('top', 0)))
-                        break
+            if classify_word(word.get('text', '')).amount:
+                # The index resolves numeric columns first, so any numeric hit is the right one
+                if col in amounts_per_col:
+                    amounts_per_col[col].append((word, word.get('top', 0)))
         
         # Check if any column has multiple amounts at different Y positions
         # This suggests multiple movements
@@ -1915,8 +2989,7 @@ def split_row_if_multiple_movements(row_words, columns_config, date_pattern, ban
         for word in row_words:
             text = word.get('text', '')
             # Count how many distinct amounts are in this word
-            amount_matches = DEC_AMOUNT_RE.findall(text)
-            if len(amount_matches) > 1:
+            if classify_word(text).amount_count > 1:
                 # Multiple amounts in one word - this suggests multiple movements
                 words_with_multiple_amounts.append(word)
                 # Use the word's Y position as a split point
@@ -2004,6 +3077,895 @@ def split_row_if_multiple_movements(row_words, columns_config, date_pattern, ban
     return [row_words]
 
 
+def iter_movement_rows(doc, first_page: int, columns_config: dict, bank_name: str,
+                       end_pattern=None):
+    """
+    Row engine: yield movement rows from page first_page on, each one as soon as it is final.
+    A row is final once the next dated row starts (continuation rows are merged into it
+    first) or the pages end; the loop stops at end_pattern when the bank has one.
+    Pages are laid out lazily, so the first rows come out before later pages are read.
+    """
+    column_idx = column_index(columns_config)
+    pending = None
+    extraction_stopped = False
+    # Only pages from the movement start on are laid out; the loop stops at the end pattern
+    for page_data in doc.iter_pages(first_page):
+        if extraction_stopped:
+            break
+            
+        page_num = page_data['page']
+        words = page_data.get('words', [])
+        
+        if not words:
+            continue
+    
+        # Group words by row
+        # Use y_tolerance=3 for all banks to avoid grouping multiple movements into one row
+        # The split_row_if_multiple_movements function will handle cases where movements are still grouped
+        word_rows = group_words_by_row(words, y_tolerance=3)
+        
+        # Check if grouped rows contain multiple movements and split them
+        # This applies to all banks to ensure each movement is in its own row
+        if columns_config:
+            split_rows = []
+            for row_words in word_rows:
+                if not row_words:
+                    continue
+                
+                # Use the generic function to split rows with multiple movements
+                # Pass bank_name to enable bank-specific logic
+                split_result = split_row_if_multiple_movements(row_words, columns_config, DATE_RE, bank_name)
+                split_rows.extend(split_result)
+            
+            word_rows = split_rows
+        
+        for row_words in word_rows:
+            if not row_words or extraction_stopped:
+                continue
+
+            # Check for end pattern (for Banamex, Santander, etc.)
+            if end_pattern:
+                all_text = ' '.join([w.get('text', '') for w in row_words])
+                if end_pattern.search(all_text):
+                    #print(f"🛑 Fin de tabla de movimientos detectado en página {page_num}")
+                    extraction_stopped = True
+                    break
+
+            # Extract structured row using coordinates
+            # Pass bank_name and the date pattern to enable date/description separation
+            row_data = extract_movement_row(row_words, columns_config, bank_name, DATE_RE)
+
+            # Determine if this row starts a new movement (contains a date)
+            # If columns_config is empty, check all words for dates
+            if not columns_config:
+                # Check all words in the row for dates
+                all_text = ' '.join([w.get('text', '') for w in row_words])
+                has_date = bool(DATE_RE.search(all_text))
+                if has_date:
+                    # Create a basic row_data structure
+                    row_data = {'raw': all_text, '_amounts': row_data.get('_amounts', [])}
+            else:
+                # A new movement begins when the 'fecha' column contains a date token.
+                fecha_val = str(row_data.get('fecha') or '')
+                has_date = bool(DATE_RE.search(fecha_val))
+                
+            # Check if row has valid data (date, description, or amounts)
+            has_valid_data = has_date
+            if not has_valid_data:
+                # Check if row has description or amounts
+                desc_val = str(row_data.get('descripcion') or '').strip()
+                has_amounts = len(row_data.get('_amounts', [])) > 0
+                has_cargos_abonos = bool(row_data.get('cargos') or row_data.get('abonos') or row_data.get('saldo'))
+                has_valid_data = bool(desc_val or has_amounts or has_cargos_abonos)
+
+            if has_date:
+                # Only add rows that have date AND (description OR amounts)
+                # This ensures we don't add incomplete rows
+                desc_val = str(row_data.get('descripcion') or '').strip()
+                has_amounts = len(row_data.get('_amounts', [])) > 0
+                has_cargos_abonos = bool(row_data.get('cargos') or row_data.get('abonos') or row_data.get('saldo'))
+                has_description_or_amounts = bool(desc_val or has_amounts or has_cargos_abonos)
+                
+                if has_description_or_amounts:
+                    row_data['page'] = page_num
+                    # The previous movement can take no more continuation rows
+                    if pending is not None:
+                        yield pending
+                    pending = row_data
+                # If row has date but no description/amounts, skip it (incomplete row)
+            elif has_valid_data:
+                # Row has valid data but no date - treat as continuation or standalone row
+                if pending is not None:
+                    # Continuation row: append description-like text and amounts to previous movement
+                    prev = pending
+                    
+                    # First, capture amounts from continuation row and assign to appropriate columns
+                    cont_amounts = row_data.get('_amounts', [])
+                    if cont_amounts and columns_config:
+                        # Description range (amounts inside it are skipped) and numeric column
+                        # ranges widened by the tolerance, all precomputed in the column index
+                        descripcion_range = column_idx.descripcion_range
+                        col_ranges = column_idx.numeric_ranges
+                        near_ranges = column_idx.expanded_ranges(10)
+                        wide_ranges = column_idx.expanded_ranges(20)
+                        
+                        # Assign amounts from continuation row
+                        for amt_text, center in cont_amounts:
+                            # Skip if amount is within description range
+                            if descripcion_range and descripcion_range[0] <= center <= descripcion_range[1]:
+                                continue
+                            
+                            # Find which numeric column this amount belongs to
+                            assigned = False
+                            for col, (x0, x1) in near_ranges.items():
+                                if x0 <= center <= x1:
+                                    # Only assign if the column is empty or if this is a better match
+                                    existing = prev.get(col) or ''
+                                    if not existing or amt_text not in existing:
+                                        if existing:
+                                            prev[col] = (existing + ' ' + amt_text).strip()
+                                        else:
+                                            prev[col] = amt_text
+                                    assigned = True
+                                    break
+                            
+                            # If not assigned by range, use proximity as fallback
+                            if not assigned and col_ranges:
+                                valid_cols = {}
+                                for col, (x0, x1) in wide_ranges.items():
+                                    if x0 <= center <= x1:
+                                        valid_cols[col] = abs(center - column_idx.centers[col])
+                                
+                                if valid_cols:
+                                    nearest = min(valid_cols.keys(), key=lambda c: valid_cols[c])
+                                    if not descripcion_range or not (descripcion_range[0] <= center <= descripcion_range[1]):
+                                        existing = prev.get(nearest) or ''
+                                        if not existing or amt_text not in existing:
+                                            if existing:
+                                                prev[nearest] = (existing + ' ' + amt_text).strip()
+                                            else:
+                                                prev[nearest] = amt_text
+                    
+                    # Also merge amounts list for later processing
+                    prev_amounts = prev.get('_amounts', [])
+                    prev['_amounts'] = prev_amounts + cont_amounts
+                    
+                    # Collect possible text pieces from this row (prefer descripcion, then liq, then any other text)
+                    cont_parts = []
+                    for k in ('descripcion', 'fecha'):
+                        v = row_data.get(k)
+                        if v:
+                            cont_parts.append(str(v))
+                    # Also capture any stray text in other columns
+                    for k, v in row_data.items():
+                        if k in ('descripcion', 'fecha', 'cargos', 'abonos', 'saldo', 'page', '_amounts'):
+                            continue
+                        if v:
+                            cont_parts.append(str(v))
+
+                    cont_text = ' '.join(cont_parts)
+                    # Remove decimal amounts (they belong to cargos/abonos/saldo)
+                    cont_text = DEC_AMOUNT_RE.sub('', cont_text)
+                    cont_text = ' '.join(cont_text.split()).strip()
+
+                    if cont_text:
+                        # append to previous 'descripcion' field
+                        if prev.get('descripcion'):
+                            prev['descripcion'] = (prev.get('descripcion') or '') + ' ' + cont_text
+                        else:
+                            prev['descripcion'] = cont_text
+                else:
+                    # No previous movement and no date - skip this row
+                    # Only rows with dates should be added to movements
+                    # Rows without dates are only used as continuation of previous rows
+                    pass
+
+    if pending is not None:
+        yield pending
+
+
+def finalize_movement_rows(rows, columns_config: dict, bank_name: str):
+    """
+    Finalize the rows of iter_movement_rows as they arrive: reassign amounts to
+    cargos/abonos/saldo by proximity when needed, strip amounts from the description
+    and drop the helper keys. Yields each row once it is done.
+    """
+    # column centers and ranges (description range is used to exclude amounts from it)
+    column_idx = column_index(columns_config)
+    col_centers = column_idx.numeric_centers
+    descripcion_range = column_idx.descripcion_range
+    near_ranges = column_idx.expanded_ranges(10)
+    wide_ranges = column_idx.expanded_ranges(20)
+
+    for r in rows:
+        amounts = r.get('_amounts', [])
+        # Without numeric columns there is nothing to reassign to (see the fallback below)
+        if amounts and col_centers:
+            # Check if columns already have values from initial extraction
+            # If they do, we should preserve them unless we find better matches
+            existing_cargos = r.get('cargos', '').strip()
+            existing_abonos = r.get('abonos', '').strip()
+            existing_saldo = r.get('saldo', '').strip()
+
+            # If columns already have numbers, keep them but prefer reassignment
+            # We'll assign each detected amount to the appropriate numeric column
+            # ONLY if it's within the column's coordinate range
+            for amt_text, center in amounts:
+                # Find which numeric column this amount belongs to based on coordinate range
+                # Ranges carry a small tolerance (10) for amounts near column boundaries
+                assigned = False
+                
+                # First, check if amount is within any numeric column range
+                # This takes priority over description range check
+                for col, (x0, x1) in near_ranges.items():
+                    # Check with tolerance to handle amounts slightly outside the range
+                    if x0 <= center <= x1:
+                        # Amount is within a numeric column range - assign it regardless of description range
+                        # Amount is within this column's range (with tolerance)
+                        existing = r.get(col, '').strip()
+                        # Check if this amount is already in the column (to avoid duplicates)
+                        if existing and amt_text in existing:
+                            assigned = True
+                            break
+                        # Only assign if column is empty or if this amount is not already there
+                        # IMPORTANT: Preserve existing values if they're already valid numbers
+                        if not existing:
+                            # Column is empty, assign the amount
+                            r[col] = amt_text
+                            assigned = True
+                            break
+                        elif amt_text not in existing:
+                            # Column has a value but this amount is different
+                            # Check if existing is a valid amount (has digits and decimal)
+                            if DEC_AMOUNT_RE.search(existing):
+                                # Existing looks like a valid amount - preserve it
+                                # Don't overwrite or append, just keep the existing value
+                                # This preserves values extracted during initial coordinate-based extraction
+                                assigned = True
+                                break
+                            else:
+                                # Existing doesn't look like an amount, replace it
+                                r[col] = amt_text
+                                assigned = True
+                                break
+                        else:
+                            # Amount already in column
+                            assigned = True
+                            break
+                
+                # If not assigned by range, use proximity as fallback
+                # Only exclude from description range if it's NOT in any numeric column range
+                if not assigned and col_centers:
+                    # Calculate distances, but only consider columns that are reasonably close
+                    valid_cols = {}
+                    for col, (x0, x1) in wide_ranges.items():
+                        # Only consider if center is reasonably close to the column
+                        if x0 <= center <= x1:
+                            valid_cols[col] = abs(center - col_centers[col])
+                    
+                    if valid_cols:
+                        nearest = min(valid_cols.keys(), key=lambda c: valid_cols[c])
+                        # Check if amount is in description range AND not in any numeric column
+                        # If it's close to a numeric column, assign it even if it's also in description range
+                        in_desc_range = descripcion_range and descripcion_range[0] <= center <= descripcion_range[1]
+                        in_num_range = False
+                        for x0, x1 in wide_ranges.values():
+                            if x0 <= center <= x1:
+                                in_num_range = True
+                                break
+                        
+                        # Only skip if in description range AND NOT in any numeric column range
+                        if not in_desc_range or in_num_range:
+                            existing = r.get(nearest, '').strip()
+                            if existing:
+                                # If existing is a valid amount, preserve it
+                                if DEC_AMOUNT_RE.search(existing):
+                                    assigned = True
+                                elif amt_text not in existing:
+                                    r[nearest] = (existing + ' ' + amt_text).strip()
+                                    assigned = True
+                            else:
+                                r[nearest] = amt_text
+                                assigned = True
+                
+                # Only skip if amount is in description range AND NOT assigned to any numeric column
+                # This prevents amounts in cargos/abonos/saldo from being skipped
+                if not assigned and descripcion_range:
+                    if descripcion_range[0] <= center <= descripcion_range[1]:
+                        # Amount is in description range and wasn't assigned to any numeric column
+                        # Skip it to avoid assigning description amounts to numeric columns
+                        continue
+
+            # Remove amount tokens from descripcion if present
+            if r.get('descripcion'):
+                r['descripcion'] = DEC_AMOUNT_RE.sub('', r.get('descripcion'))
+
+            # cleanup helper key
+            if '_amounts' in r:
+                del r['_amounts']
+
+        # If columns_config was empty, the row has no cargos/abonos/saldo yet
+        # Try to extract them from raw text or _amounts
+        if not columns_config and bank_name != 'BBVA':
+            has_saldo = 'saldo' in columns_config
+            # If row has 'raw', extract from it
+            if 'raw' in r and r.get('raw'):
+                raw_text = str(r.get('raw'))
+                amounts = DEC_AMOUNT_RE.findall(raw_text)
+                if len(amounts) >= 3:
+                    r['cargos'] = amounts[-3]
+                    r['abonos'] = amounts[-2]
+                    if has_saldo:
+                        r['saldo'] = amounts[-1]
+                elif len(amounts) == 2:
+                    r['abonos'] = amounts[0]
+                    if has_saldo:
+                        r['saldo'] = amounts[1]
+                elif len(amounts) == 1:
+                    if has_saldo:
+                        r['saldo'] = amounts[0]
+            # If row has _amounts but no cargos/abonos/saldo, try to assign them
+            elif '_amounts' in r and r.get('_amounts'):
+                amounts_list = [amt for amt, _ in r.get('_amounts', [])]
+                if len(amounts_list) >= 3:
+                    r['cargos'] = amounts_list[-3]
+                    r['abonos'] = amounts_list[-2]
+                    if has_saldo:
+                        r['saldo'] = amounts_list[-1]
+                elif len(amounts_list) == 2:
+                    r['abonos'] = amounts_list[0]
+                    if has_saldo:
+                        r['saldo'] = amounts_list[1]
+                elif len(amounts_list) == 1:
+                    if has_saldo:
+                        r['saldo'] = amounts_list[0]
+            r.pop('_amounts', None)
+
+        yield r
+
+
+def _movement_description(row: dict, dates) -> str:
+    """Description of a finalized row as the Movements sheet builds it: liq + descripcion (or raw), without dates or amounts."""
+    parts = [str(row[k]) for k in ('liq', 'descripcion') if row.get(k)]
+    if not parts and row.get('raw'):
+        parts = [str(row['raw'])]
+    text = ' '.join(parts)
+    for date in dates:
+        if date:
+            text = text.replace(str(date), '')
+    text = DEC_AMOUNT_RE.sub('', text)
+    text = ' '.join(text.split()).strip()
+    return text if text else None
+
+
+def movement_records(rows, columns_config: dict, bank_name: str):
+    """
+    Turn finalized movement rows into NDJSON movement records, one per row, lazily.
+    Each record carries the date, description and amounts the Movements sheet shows
+    for the row (Operación stands in for saldo on BBVA), plus its page and bank.
+    Banamex information rows are left out, as in the sheet.
+    """
+    for row in rows:
+        fecha_oper, fecha_liq = _extract_two_dates(str(row.get('fecha' if columns_config else 'raw', '')))
+        if bank_name == 'BBVA':
+            description = _movement_description(row, (fecha_oper, fecha_liq))
+            saldo = _extract_two_amounts(str(row.get('saldo', '')))[1] if 'saldo' in row else None
+        else:
+            description = _movement_description(row, (fecha_oper,))
+            saldo = row.get('saldo') if 'saldo' in columns_config else None
+        if bank_name == 'Banamex':
+            desc_text = str(description).upper()
+            if 'SALDO MINIMO REQUERIDO' in desc_text or 'SALDO MÍNIMO REQUERIDO' in desc_text or 'COMISIONES COBRADAS' in desc_text:
+                continue
+        yield {
+            'type': 'movement',
+            'date': fecha_oper,
+            'description': description,
+            'cargos': row.get('cargos') or None,
+            'abonos': row.get('abonos') or None,
+            'saldo': saldo or None,
+            'page': row.get('page'),
+            'bank': bank_name,
+        }
+
+
+def frame_movement_records(df_mov: pd.DataFrame, bank_name: str, pages: pd.Series = None):
+    """NDJSON movement records from a finished Movements DataFrame (text-based paths such as Konfio)."""
+    def value(v):
+        return None if v is None or (isinstance(v, float) and np.isnan(v)) or v == '' else v
+
+    date_col = 'Fecha Oper' if 'Fecha Oper' in df_mov.columns else 'Fecha'
+    saldo_col = 'Operación' if bank_name == 'BBVA' else 'Saldo'
+    for i, row in enumerate(df_mov.to_dict('records')):
+        page = pages.iloc[i] if pages is not None else None
+        yield {
+            'type': 'movement',
+            'date': value(row.get(date_col)),
+            'description': value(row.get('Descripción')),
+            'cargos': value(row.get('Cargos')),
+            'abonos': value(row.get('Abonos')),
+            'saldo': value(row.get(saldo_col)),
+            'page': int(page) if value(page) is not None else None,
+            'bank': bank_name,
+        }
+
+
+def write_ndjson_record(out, record: dict):
+    """Write one record as a JSON line and flush it, so the reader gets it right away."""
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def emit_movement_records(records, emit, track_saldo: bool = True) -> dict:
+    """
+    Hand movement records to emit as they come and total them on the way, without keeping them.
+    Returns the same totals calculate_extracted_totals gives for the matching Movements
+    sheet (saldo_final only when track_saldo, i.e. the sheet has a Saldo column).
+    """
+    cargos = abonos = count = 0
+    saldo_final = 0.0
+    for record in records:
+        emit(record)
+        count += 1
+        cargos += amount_to_cents(record['cargos'])
+        abonos += amount_to_cents(record['abonos'])
+        if track_saldo and record['saldo'] and str(record['saldo']).strip():
+            saldo_final = normalize_amount_str(record['saldo'])
+    return {
+        'total_abonos': abonos / 100,
+        'total_cargos': cargos / 100,
+        'total_retiros': cargos / 100,
+        'total_depositos': abonos / 100,
+        'saldo_final': saldo_final,
+        'total_movimientos': count,
+    }
+
+
+def summary_record(result, source_file: str) -> dict:
+    """Summary record of a StatementResult: first-page items and the totals printed in the PDF."""
+    return {
+        'type': 'summary',
+        'bank': result.bank,
+        'bank_confidence': result.bank_confidence,
+        'file': source_file,
+        'pages': result.pages,
+        'items': [{'title': t, 'value': d} for t, d in zip(result.summary['Título'], result.summary['Dato'])],
+        'totals': result.pdf_summary,
+    }
+
+
+def validation_record(result) -> dict:
+    """Validation record of a StatementResult: each check, the overall status and the extracted totals."""
+    return {
+        'type': 'validation',
+        'bank': result.bank,
+        'status': result.validation_status,
+        'checks': [
+            {'concept': row['Concepto'], 'pdf': row['Valor en PDF'], 'extracted': row['Valor Extraído'],
+             'difference': row['Diferencia'], 'status': row['Estado']}
+            for row in result.validation.to_dict('records')
+            if row['Concepto'] != 'VALIDACIÓN GENERAL'
+        ],
+        'extracted': result.extracted_totals,
+    }
+
+
+def write_ndjson_tail(out, result, source_file: str):
+    """Write the trailing summary and validation records of an NDJSON run for a StatementResult."""
+    write_ndjson_record(out, summary_record(result, source_file))
+    write_ndjson_record(out, validation_record(result))
+
+
+def _get_cli_option(name: str, default=None):
+    """Return the value that follows a '--name value' command-line option, or default."""
+    if name in sys.argv[1:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def collect_batch_inputs(source: str) -> list:
+    """Return the PDF files inside a folder, or the PDF files matching a glob pattern."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(".pdf"))
+
+
+def _convert_for_batch(pdf_path: str, use_cache: bool, ledger: str = None, bank_config_file: str = None) -> dict:
+    """Batch worker: convert one statement quietly; any failure becomes an error report row."""
+    started = time.perf_counter()
+    try:
+        with redirect_stdout(io.StringIO()):
+            return convert_statement(pdf_path, os.path.splitext(pdf_path)[0] + ".xlsx", use_cache, ledger=ledger,
+                                     bank_config_file=bank_config_file)
+    except Exception as e:
+        return {
+            'file': pdf_path,
+            'bank': None,
+            'detected_by': None,
+            'pages': None,
+            'rows': None,
+            'validation': None,
+            'seconds': round(time.perf_counter() - started, 3),
+            'error': f'{type(e).__name__}: {e}',
+        }
+
+
+def run_batch(source: str, workers: int = None, use_cache: bool = True, report_path: str = None,
+              ledger: str = None, bank_config_file: str = None) -> list:
+    """
+    Convert every PDF in a folder (or matching a glob) across a process pool.
+    Each statement gets its own .xlsx; a consolidated run report is written to report_path
+    (default: batch_report.xlsx next to the inputs). A failing PDF is reported, not fatal.
+    With ledger, every statement is also stored in that SQLite ledger (see LedgerStore).
+    bank_config_file supplies calibrated column ranges (see convert_statement).
+    """
+    pdf_paths = collect_batch_inputs(source)
+    if not pdf_paths:
+        print(f"❌ No PDF files found in {source}")
+        return []
+
+    if report_path is None:
+        report_dir = source if os.path.isdir(source) else os.path.commonpath(
+            [os.path.dirname(os.path.abspath(p)) for p in pdf_paths]
+        )
+        report_path = os.path.join(report_dir, "batch_report.xlsx")
+
+    print(f"📂 Converting {len(pdf_paths)} PDF files...")
+    if bank_config_file:
+        print(f"📐 Calibrated columns: {bank_config_file}")
+    reports = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_convert_for_batch, p, use_cache, ledger, bank_config_file): p for p in pdf_paths}
+        for future in as_completed(futures):
+            pdf_path = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed); keep going with the rest
+                report = {'file': pdf_path, 'bank': None, 'detected_by': None, 'pages': None, 'rows': None,
+                          'validation': None, 'seconds': None, 'error': f'{type(e).__name__}: {e}'}
+            reports[pdf_path] = report
+            status = f"❌ {report['error']}" if report['error'] else report['validation']
+            print(f"   {os.path.basename(pdf_path)}: {report['bank'] or '-'} - {status}")
+
+    # Per bank, how many statements the layout/metadata/font fast paths identified
+    fast_path = {}
+    for report in reports.values():
+        if report['detected_by'] in ('layout', 'metadata', 'fonts', 'text'):
+            hits, total = fast_path.get(report['bank'], (0, 0))
+            fast_path[report['bank']] = (hits + (report['detected_by'] != 'text'), total + 1)
+    if fast_path:
+        print("🏦 Fast bank detection: " + ", ".join(
+            f"{bank} {hits}/{total}" for bank, (hits, total) in sorted(fast_path.items())))
+
+    ordered = [reports[p] for p in pdf_paths]
+    df_report = pd.DataFrame(ordered).rename(columns={
+        'file': 'File', 'bank': 'Bank', 'detected_by': 'Detected By', 'pages': 'Pages',
+        'rows': 'Rows', 'validation': 'Validation', 'seconds': 'Seconds', 'error': 'Error',
+    })
+    df_report.to_excel(report_path, sheet_name='Batch Report', index=False)
+    print(f"✅ Batch report created -> {report_path}")
+    return ordered
+
+
+# HTTP service defaults (python main.py --serve)
+SERVE_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+SERVE_DEFAULT_TIMEOUT = 120
+UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9._ -]')
+
+
+def _table_records(df: pd.DataFrame) -> list:
+    """Rows of a workbook sheet as JSON-ready dicts, without its trailing Total row."""
+    if df is None:
+        return []
+    if len(df) and str(df.iloc[-1, 0]) == 'Total':
+        df = df.iloc[:-1]
+    return [
+        {k: (None if v is None or (isinstance(v, float) and np.isnan(v)) else v) for k, v in row.items()}
+        for row in df.to_dict('records')
+    ]
+
+
+def statement_json(result, source_file: str) -> dict:
+    """The whole parsed statement as one JSON-ready dict (the --serve JSON response)."""
+    movements = result.movements
+    if movements is not None and len(movements) and str(movements.iloc[-1, 0]) == 'Total':
+        movements = movements.iloc[:-1]
+    return {
+        'bank': result.bank,
+        'pages': result.pages,
+        'movements': list(frame_movement_records(movements, result.bank, result.movement_pages))
+        if movements is not None else [],
+        'digitem': _table_records(result.digitem),
+        'transferencias': _table_records(result.transferencias),
+        'summary': summary_record(result, source_file),
+        'validation': validation_record(result),
+        'timings': result.timings,
+    }
+
+
+def _warm_worker():
+    """Service worker initializer: pay the heavy imports once, before the first request."""
+    for module_name in ("pandas", "pdfplumber"):
+        importlib.import_module(module_name)
+
+
+class _JobTimeout(BaseException):
+    """
+    Raised by a service worker's alarm. Not an Exception, so the broad except blocks
+    in the extraction stages cannot swallow it; _serve_job turns it into TimeoutError.
+    """
+
+
+def _raise_job_timeout(signum, frame):
+    raise _JobTimeout
+
+
+def _stop_serving(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _serve_job(pdf_bytes: bytes, response_format: str, bank: str, source_file: str, timeout: float,
+               bank_configs: dict = None):
+    """
+    Service worker: parse one uploaded statement and build the response body.
+    Returns (content type, body bytes, (bank, how the bank was detected)). The parse
+    is interrupted after timeout seconds where the platform has interval timers.
+    """
+    alarm = timeout and hasattr(signal, 'setitimer')
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_job_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result = parse_statement(pdf_bytes, bank=bank, options=ParseOptions(bank_configs=bank_configs))
+        if response_format == 'xlsx':
+            buffer = io.BytesIO()
+            with redirect_stdout(io.StringIO()):
+                error = write_statement_outputs(result, source_file, buffer)
+            if error:
+                raise RuntimeError(error)
+            return ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', buffer.getvalue(),
+                    (result.bank, result.bank_source))
+        body = json.dumps(statement_json(result, source_file), ensure_ascii=False, default=str)
+        return ('application/json; charset=utf-8', body.encode('utf-8'), (result.bank, result.bank_source))
+    except _JobTimeout:
+        raise TimeoutError(f"statement not parsed within {timeout:g} seconds") from None
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+class StatementServer(ThreadingHTTPServer):
+    """
+    HTTP front end over a pool of pre-started parse workers.
+    At most workers + queue_size statements are accepted at once (running or waiting);
+    past that, requests get 429 right away instead of piling up. Each job has a timeout,
+    enforced in the worker and again while waiting for its result. bank_configs are the
+    calibrated configs every job parses with (see ParseOptions).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, workers: int = None, queue_size: int = 8,
+                 timeout: float = SERVE_DEFAULT_TIMEOUT, bank_configs: dict = None):
+        super().__init__(address, StatementRequestHandler)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.bank_configs = bank_configs
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock = threading.Lock()
+        self.metrics = {
+            'requests': {},  # status code -> count
+            'detections': {},  # (bank, detection source) -> count
+            'in_flight': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'failures': 0,
+            'completed': 0,
+            'parse_seconds': 0.0,
+        }
+        self._executor = self._start_pool()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Start every worker now, so the first requests don't pay for process start and imports
+        for future in [executor.submit(time.sleep, 0.1) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(cancel_futures=True)
+
+    def count(self, name: str, amount=1):
+        with self._lock:
+            self.metrics[name] += amount
+
+    def count_response(self, status: int):
+        with self._lock:
+            self.metrics['requests'][status] = self.metrics['requests'].get(status, 0) + 1
+
+    def count_detection(self, detection: tuple):
+        with self._lock:
+            self.metrics['detections'][detection] = self.metrics['detections'].get(detection, 0) + 1
+
+    def submit(self, pdf_bytes: bytes, response_format: str, bank: str, source_file: str):
+        """Queue a job; returns its future, or None when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            self.count('rejected')
+            return None
+        self.count('in_flight')
+        try:
+            future = self._executor.submit(_serve_job, pdf_bytes, response_format, bank, source_file, self.timeout,
+                                           self.bank_configs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory): start a fresh pool and retry once
+            self._executor = self._start_pool()
+            future = self._executor.submit(_serve_job, pdf_bytes, response_format, bank, source_file, self.timeout,
+                                           self.bank_configs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        self.count('in_flight', -1)
+        self._slots.release()
+
+    def metrics_text(self) -> str:
+        """Metrics in the Prometheus text format."""
+        with self._lock:
+            m = dict(self.metrics, requests=dict(self.metrics['requests']),
+                     detections=dict(self.metrics['detections']))
+        lines = [
+            '# TYPE valarix_requests_total counter',
+            *[f'valarix_requests_total{{code="{code}"}} {n}' for code, n in sorted(m['requests'].items())],
+            '# TYPE valarix_jobs_in_flight gauge',
+            f'valarix_jobs_in_flight {m["in_flight"]}',
+            '# TYPE valarix_job_capacity gauge',
+            f'valarix_job_capacity {self.workers + self.queue_size}',
+            '# TYPE valarix_workers gauge',
+            f'valarix_workers {self.workers}',
+            '# TYPE valarix_jobs_completed_total counter',
+            f'valarix_jobs_completed_total {m["completed"]}',
+            '# TYPE valarix_jobs_failed_total counter',
+            f'valarix_jobs_failed_total {m["failures"]}',
+            '# TYPE valarix_jobs_timed_out_total counter',
+            f'valarix_jobs_timed_out_total {m["timeouts"]}',
+            '# TYPE valarix_jobs_rejected_total counter',
+            f'valarix_jobs_rejected_total {m["rejected"]}',
+            '# TYPE valarix_job_seconds_total counter',
+            f'valarix_job_seconds_total {m["parse_seconds"]:.3f}',
+            # Per bank: how often a fast path (layout, metadata, fonts) found it versus the page text
+            '# TYPE valarix_bank_detections_total counter',
+            *[f'valarix_bank_detections_total{{bank="{bank}",source="{source}"}} {n}'
+              for (bank, source), n in sorted(m['detections'].items())],
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+class StatementRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /parse with the PDF as the request body (?format=json|xlsx, ?bank=Name)
+    returns the parsed statement; GET /metrics and GET /health report on the service.
+    """
+
+    server_version = "Valarix"
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json; charset=utf-8',
+              headers: dict = None):
+        self.server.count_response(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: dict = None):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'), headers=headers)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self._send(200, self.server.metrics_text().encode('utf-8'), 'text/plain; version=0.0.4')
+        elif path == '/health':
+            self._send(200, b'{"status": "ok"}')
+        else:
+            self._send_error(404, 'not found')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/parse':
+            self._send_error(404, 'not found')
+            return
+        query = parse_qs(url.query)
+        response_format = query.get('format', ['json'])[0].lower()
+        if response_format not in ('json', 'xlsx'):
+            self._send_error(400, 'format must be json or xlsx')
+            return
+        bank = query.get('bank', [None])[0]
+        if (bank is not None and bank not in BANK_CONFIGS and bank not in BANK_KEYWORDS
+                and bank not in (self.server.bank_configs or {})):
+            self._send_error(400, f'unknown bank {bank}')
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_error(400, 'send the PDF as the request body')
+            return
+        if length > SERVE_MAX_UPLOAD_BYTES:
+            self._send_error(413, 'PDF too large')
+            return
+        pdf_bytes = self.rfile.read(length)
+        if not pdf_bytes.startswith(b'%PDF'):
+            self._send_error(415, 'request body is not a PDF')
+            return
+        source_file = query.get('name', ['statement.pdf'])[0]
+
+        started = time.perf_counter()
+        future = self.server.submit(pdf_bytes, response_format, bank, source_file)
+        if future is None:
+            self._send_error(429, 'too many statements in progress, retry later', {'Retry-After': '1'})
+            return
+        try:
+            # The worker stops itself at the timeout; the grace covers queueing and transfer
+            content_type, body, detection = future.result(timeout=self.server.timeout + 5)
+        except TimeoutError:
+            self.server.count('timeouts')
+            self._send_error(504, f'statement not parsed within {self.server.timeout:g} seconds')
+            return
+        except Exception as e:
+            self.server.count('failures')
+            self._send_error(422, f'{type(e).__name__}: {e}')
+            return
+        self.server.count('completed')
+        self.server.count_detection(detection)
+        self.server.count('parse_seconds', time.perf_counter() - started)
+        headers = {}
+        if response_format == 'xlsx':
+            headers['Content-Disposition'] = f'attachment; filename="{_download_name(source_file)}.xlsx"'
+        self._send(200, body, content_type, headers)
+
+
+def _download_name(source_file: str) -> str:
+    """
+    The client's ?name= reduced to a safe file stem for Content-Disposition: no directory,
+    and only ASCII letters, digits, '.', '_', '-' and spaces (no CR/LF or quotes).
+    """
+    stem = os.path.splitext(os.path.basename(source_file.replace('\\', '/')))[0]
+    return UNSAFE_FILENAME_RE.sub('', stem).strip(' .') or 'statement'
+
+
+def run_server(host: str = '127.0.0.1', port: int = 8000, workers: int = None, queue_size: int = 8,
+               timeout: float = SERVE_DEFAULT_TIMEOUT, bank_config_file: str = None):
+    """Serve POST /parse, GET /metrics and GET /health until interrupted."""
+    bank_configs = load_bank_config_file(bank_config_file) if bank_config_file else None
+    server = StatementServer((host, port), workers=workers, queue_size=queue_size, timeout=timeout,
+                             bank_configs=bank_configs)
+    # Stop cleanly on SIGTERM too, so the worker processes are shut down with the server
+    signal.signal(signal.SIGTERM, _stop_serving)
+    print(f"🌐 Serving on http://{host}:{server.server_address[1]} "
+          f"({server.workers} workers, queue {queue_size}, timeout {timeout:g}s)")
+    if bank_config_file:
+        print(f"📐 Calibrated columns: {bank_config_file}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 def main():
     # Validate input
     if len(sys.argv) < 2:
@@ -2013,8 +3975,55 @@ def main():
         #print("\nExample:")
         #print("  python main2.py BBVA.pdf")
         #print("  python main2.py BBVA.pdf --find 2")
+        #print("  python main2.py BBVA.pdf --calibrate [--bank BBVA] [--pages 2-40] [--config bank_configs.json]")
+        #print("  python main2.py BBVA.pdf --config bank_configs.json  # Use the column ranges saved by --calibrate")
+        #print("  python main2.py BBVA.pdf --no-cache    # Ignore the on-disk page cache")
+        #print("  python main2.py BBVA.pdf --page-workers 4  # Lay out pages in 4 processes")
+        #print("  python main2.py BBVA.pdf --pages 2-10  # Only scan pages 2 to 10 for movements")
+        #print("  python main2.py BBVA.pdf --compact-words  # Keep page words in compact arrays (large statements)")
+        #print("  python main2.py BBVA.pdf --streaming  # Write the workbook row by row (constant memory)")
+        #print("  python main2.py BBVA.pdf --format parquet  # Typed Parquet files instead of Excel (xlsx,parquet for both)")
+        #print("  python main2.py BBVA.pdf --ndjson  # One JSON line per movement on stdout, no files")
+        #print("  python main2.py BBVA.pdf --ledger ledger.sqlite3  # Also store the statement in a SQLite ledger")
+        #print("  python main2.py --batch <folder|glob> [--workers N] [--report out.xlsx] [--ledger ledger.sqlite3] [--config bank_configs.json]")
+        #print("  python main2.py --serve [--host 127.0.0.1] [--port 8000] [--workers N] [--queue 8] [--timeout 120] [--config bank_configs.json]")
+        #print("  (VALARIX_BANK_CONFIGS=bank_configs.json has the same effect as --config)")
+        sys.exit(1)
+
+    # Calibrated column ranges are only used when asked for (--config or $VALARIX_BANK_CONFIGS)
+    bank_config_file = bank_config_path(_get_cli_option('--config'))
+    if bank_config_file and '--calibrate' not in sys.argv[2:3] and not os.path.isfile(bank_config_file):
+        print(f"❌ No existe el archivo de configuración: {bank_config_file}")
         sys.exit(1)
 
+    # Check for --batch mode: convert a whole folder (or glob) with a process pool
+    if sys.argv[1] == '--batch':
+        if len(sys.argv) < 3:
+            sys.exit(1)
+        workers = _get_cli_option('--workers')
+        run_batch(
+            sys.argv[2],
+            workers=int(workers) if workers else None,
+            use_cache='--no-cache' not in sys.argv[3:],
+            report_path=_get_cli_option('--report'),
+            ledger=_get_cli_option('--ledger'),
+            bank_config_file=bank_config_file,
+        )
+        return
+
+    # Check for --serve mode: HTTP service over warm parse workers
+    if sys.argv[1] == '--serve':
+        workers = _get_cli_option('--workers')
+        run_server(
+            host=_get_cli_option('--host', '127.0.0.1'),
+            port=int(_get_cli_option('--port', 8000)),
+            workers=int(workers) if workers else None,
+            queue_size=int(_get_cli_option('--queue', 8)),
+            timeout=float(_get_cli_option('--timeout', SERVE_DEFAULT_TIMEOUT)),
+            bank_config_file=bank_config_file,
+        )
+        return
+
     pdf_path = sys.argv[1]
     
     # Check for --find mode
@@ -2024,6 +4033,23 @@ def main():
         find_column_coordinates(pdf_path, page_num)
         return
 
+    # Check for --calibrate mode: propose column ranges and save them to the config file
+    if len(sys.argv) >= 3 and sys.argv[2] == '--calibrate':
+        pages = _get_cli_option('--pages')
+        try:
+            page_range = parse_page_range(pages) if pages else None
+        except ValueError:
+            sys.exit(1)
+        print("📐 Calibrando columnas...")
+        run_calibration(
+            pdf_path,
+            bank_name=_get_cli_option('--bank'),
+            page_range=page_range,
+            config_path=bank_config_file or DEFAULT_BANK_CONFIG_FILE,
+            use_cache='--no-cache' not in sys.argv[3:],
+        )
+        return
+
     if not os.path.isfile(pdf_path):
         #print("❌ File not found.")
         sys.exit(1)
@@ -2034,19 +4060,182 @@ def main():
 
     output_excel = os.path.splitext(pdf_path)[0] + ".xlsx"
 
-    print("Reading PDF...")
-    
-    # Detect bank from PDF content (read PDF directly for detection)
-    detected_bank = detect_bank_from_pdf(pdf_path)
-    
-    # Now extract full data
-    extracted_data = extract_text_from_pdf(pdf_path)
-    # split pages into lines
-    pages_lines = split_pages_into_lines(extracted_data)
-
-    # Get bank config based on detected bank
-    bank_config = BANK_CONFIGS.get(detected_bank)
-    if not bank_config:
+    formats = tuple(_get_cli_option('--format', 'xlsx').lower().split(','))
+    if not formats or any(fmt not in OUTPUT_FORMATS for fmt in formats):
+        #print("❌ Invalid --format value, expected xlsx, parquet or arrow")
+        sys.exit(1)
+
+    page_workers = _get_cli_option('--page-workers')
+    pages = _get_cli_option('--pages')
+    try:
+        page_range = parse_page_range(pages) if pages else None
+    except ValueError:
+        #print("❌ Invalid --pages value, expected e.g. 3-10")
+        sys.exit(1)
+
+    # --ndjson: stdout carries only the JSON lines, progress messages go to stderr
+    ndjson = sys.stdout if '--ndjson' in sys.argv[2:] else None
+    if ndjson and _get_cli_option('--ledger'):
+        #print("❌ --ndjson cannot be combined with --ledger")
+        sys.exit(1)
+    with redirect_stdout(sys.stderr if ndjson else sys.stdout):
+        convert_statement(
+            pdf_path,
+            output_excel,
+            use_cache='--no-cache' not in sys.argv[2:],
+            page_workers=int(page_workers) if page_workers else None,
+            page_range=page_range,
+            compact_words='--compact-words' in sys.argv[2:],
+            streaming='--streaming' in sys.argv[2:],
+            formats=formats,
+            ndjson=ndjson,
+            ledger=_get_cli_option('--ledger'),
+            bank_config_file=bank_config_file,
+        )
+
+
+class ParseOptions(NamedTuple):
+    """
+    Options for parse_statement. The defaults parse without touching the disk.
+    use_cache reads and fills the on-disk page cache; page_workers lays pages out in that
+    many processes first; page_range (1-based first, last) limits the pages scanned for
+    movements; compact_words keeps page words as PageWords arrays.
+    on_movement, a callable, gets each movement record (see movement_records) as soon as it
+    is finalized; the movements are then not kept, and the result has no movement tables.
+    bank_configs, calibrated configs as read by load_bank_config_file, take the place of
+    BANK_CONFIGS for their banks.
+    """
+    use_cache: bool = False
+    page_workers: int = None
+    page_range: tuple = None
+    compact_words: bool = False
+    on_movement: object = None
+    bank_configs: dict = None
+
+
+class StatementResult(NamedTuple):
+    """
+    Everything parse_statement extracted from one statement. The DataFrames are the
+    workbook sheets (movements, digitem and transferencias end with their Total row);
+    digitem and transferencias are None for banks without those sections.
+    bank_confidence is the detector's score share (1.0 when the bank was given, 0.0 when
+    nothing matched and DEFAULT_BANK was used) and bank_source how the bank was found
+    ("given", "layout", "metadata", "fonts", "text" or "default"); timings holds the
+    seconds spent per stage and in total.
+    """
+    bank: str
+    bank_confidence: float
+    bank_source: str
+    pages: int
+    summary: pd.DataFrame
+    movements: pd.DataFrame
+    digitem: pd.DataFrame
+    transferencias: pd.DataFrame
+    validation: pd.DataFrame
+    validation_status: str
+    pdf_summary: dict
+    extracted_totals: dict
+    statement_period: tuple
+    movement_pages: pd.Series
+    timings: dict
+
+
+def parse_statement(source, *, bank: str = None, options: ParseOptions = None) -> StatementResult:
+    """
+    Parse one PDF statement in memory: nothing is printed and no file is written.
+    source is a file path, the PDF's bytes or a binary file object; bank skips detection.
+    Returns a StatementResult.
+    """
+    options = options or ParseOptions()
+    started = time.perf_counter()
+
+    if hasattr(source, 'read'):
+        source = source.read()
+    elif isinstance(source, (bytearray, memoryview)):
+        source = bytes(source)
+
+    # Open the PDF once; every stage below shares this session.
+    # Pages laid out on earlier runs come from the on-disk cache with options.use_cache.
+    page_cache = None
+    if options.use_cache:
+        try:
+            page_cache = PageCache(bank_configs=options.bank_configs)
+        except (OSError, sqlite3.Error):
+            page_cache = None
+    # Pages are laid out lazily, only when a stage reaches them; page_range limits the
+    # pages scanned for movements and sections (detection and summary read their own pages).
+    try:
+        doc = PdfDocument(source, cache=page_cache, page_range=options.page_range,
+                          compact_words=options.compact_words)
+    except BaseException:
+        if page_cache is not None:
+            page_cache.close()
+        raise
+    # Closed however the parse ends (errors, service timeouts), which also writes the cache entries
+    with doc:
+        return _parse_document(doc, page_cache, bank, options, started)
+
+
+def _parse_document(doc: PdfDocument, page_cache, bank: str, options: ParseOptions, started: float) -> StatementResult:
+    """The stages of parse_statement, over its open document."""
+    timings = {}
+    lap_started = started
+
+    def lap(stage):
+        """Record the seconds spent in stage since the previous lap."""
+        nonlocal lap_started
+        now = time.perf_counter()
+        timings[stage] = round(now - lap_started, 3)
+        lap_started = now
+
+    page_count = doc.page_count
+    if options.page_workers:
+        doc.prefetch(doc.scan_page_indexes(), options.page_workers)
+
+    def result(df_summary, df_mov, df_digitem, df_transferencias, pdf_summary, extracted_totals,
+               statement_period, movement_pages):
+        """Build the validation sheet and the StatementResult."""
+        # Create validation sheet
+        df_validation = create_validation_sheet(pdf_summary, extracted_totals)
+        validation_status = df_validation[df_validation['Concepto'] == 'VALIDACIÓN GENERAL']['Estado'].values[0]
+        lap('validation')
+        timings['total'] = round(time.perf_counter() - started, 3)
+        return StatementResult(
+            bank=detected_bank, bank_confidence=bank_confidence,
+            bank_source=bank_source, pages=page_count, summary=df_summary, movements=df_mov,
+            digitem=df_digitem, transferencias=df_transferencias, validation=df_validation,
+            validation_status=validation_status, pdf_summary=pdf_summary,
+            extracted_totals=extracted_totals, statement_period=statement_period,
+            movement_pages=movement_pages, timings=timings,
+        )
+
+    def streamed_result(df_summary, extracted_totals):
+        """Result of an on_movement parse: the movements were handed over, not kept."""
+        lap('movements')
+        pdf_summary = extract_summary_from_pdf(doc, detected_bank)
+        statement_period = infer_statement_period(doc.page_text(0))
+        return result(df_summary, None, None, None, pdf_summary, extracted_totals, statement_period, None)
+
+    # A statement laid out like one parsed before reuses its bank, columns and movement start
+    fingerprint = layout_fingerprint(doc) if page_cache is not None and not bank else None
+    layout = page_cache.get_layout(fingerprint) if fingerprint else None
+
+    # Detect bank from PDF content, unless the caller knows it
+    if bank:
+        detected_bank, bank_confidence, bank_source = bank, 1.0, "given"
+    elif layout is not None:
+        detected_bank, bank_confidence, bank_source = layout['bank'], 1.0, "layout"
+    else:
+        detected_bank, bank_confidence, bank_source = detect_bank(doc)
+        if detected_bank is None:
+            detected_bank, bank_source = DEFAULT_BANK, "default"
+    lap('detection')
+
+    # Get bank config based on detected bank (a calibrated one first, when given)
+    bank_config = (options.bank_configs or {}).get(detected_bank) or BANK_CONFIGS.get(detected_bank)
+    if layout is not None:
+        bank_config = {"name": detected_bank, "columns": layout['columns']}
+    elif not bank_config:
         #print(f"⚠️  Bank config not found for {detected_bank}, using generic fallback")
         # Create a generic config for non-BBVA banks
         # They will use raw text extraction instead of coordinate-based
@@ -2062,19 +4251,7 @@ def main():
     columns_config = bank_config.get("columns", {})
 
     # find where movements start (first line anywhere that matches a date or contains header keywords)
-    # Pattern for dates: supports multiple formats:
-    # - "DIA MES" (01 ABR)
-    # - "MES DIA" (ABR 01)
-    # - "DIA MES AÑO" (06 mar 2023) - for Konfio
-    # - "DIA-MES-AÑO" (12-ENE-23) - for Banorte
-    # Common month abbreviations: ENE, FEB, MAR, ABR, MAY, JUN, JUL, AGO, SEP, OCT, NOV, DIC
-    # Updated pattern to also match "DIA-MES-AÑO" format with hyphens (e.g., "12-ENE-23")
-    day_re = re.compile(r"\b(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})\b", re.I)
-    # match lines that contain both 'fecha' AND 'descripcion', OR lines that contain 'concepto'
-    # Implemented with lookahead for the AND case, and an alternation for 'concepto'
-    header_keywords_re = re.compile(r"(?:(?=.*\bfecha\b)(?=.*\bdescripcion\b))|(?:\bconcepto\b)", re.I)
-    # ensure a reusable date pattern is available for later checks
-    date_pattern = day_re
+    # Dates use DATE_RE; headers contain both 'fecha' AND 'descripcion', or 'concepto' (HEADER_KEYWORDS_RE)
     movement_start_found = False
     movement_start_page = None
     movement_start_index = None
@@ -2084,73 +4261,103 @@ def main():
     # For Banorte, movements start after "DETALLE DE MOVIMIENTOS (PESOS)"
     inbursa_detalle_pattern = None
     banorte_detalle_pattern = None
-    detalle_found = False
-    header_line_skipped = False
     if bank_config['name'] == 'Inbursa':
-        inbursa_detalle_pattern = re.compile(r'DETALLE\s+DE\s+MOVIMIENTOS', re.I)
-        # Pattern to detect the header line: "FECHA REFERENCIA CONCEPTO CARGOS ABONOS SALDO"
-        # Make it more flexible to handle variations in spacing
-        inbursa_header_pattern = re.compile(r'FECHA.*?REFERENCIA.*?CONCEPTO.*?CARGOS.*?ABONOS.*?SALDO', re.I)
+        # Second pattern detects the header line: "FECHA REFERENCIA CONCEPTO CARGOS ABONOS SALDO"
+        inbursa_detalle_pattern, inbursa_header_pattern = MOVEMENT_START_PATTERNS['Inbursa']
     elif bank_config['name'] == 'Banorte':
-        banorte_detalle_pattern = re.compile(r'DETALLE\s+DE\s+MOVIMIENTOS\s*\(PESOS\)', re.I)
+        banorte_detalle_pattern, = MOVEMENT_START_PATTERNS['Banorte']
     
-    for p in pages_lines:
-        if not movement_start_found:
-            for i, ln in enumerate(p['lines']):
-                # For Inbursa, first find "DETALLE DE MOVIMIENTOS"
-                if inbursa_detalle_pattern and not detalle_found:
-                    if inbursa_detalle_pattern.search(ln):
-                        detalle_found = True
-                        continue  # Skip the "DETALLE DE MOVIMIENTOS" line itself
+    # With a known layout the scan starts on its movement page, in the state the scan was in
+    # when it reached that page; if the start isn't found there, the whole statement is scanned
+    scan_plans = [(1, False, False)]
+    if layout is not None:
+        scan_plans.insert(0, (layout['start_page'], layout['detalle_found'], layout['header_line_skipped']))
+    start_page_state = None
+    for scan_from, detalle_found, header_line_skipped in scan_plans:
+        for p in iter_pages_lines(doc.iter_pages(scan_from)):
+            if not movement_start_found:
+                start_page_state = (detalle_found, header_line_skipped)
+                for i, ln in enumerate(p['lines']):
+                    # For Inbursa, first find "DETALLE DE MOVIMIENTOS"
+                    if inbursa_detalle_pattern and not detalle_found:
+                        if inbursa_detalle_pattern.search(ln):
+                            detalle_found = True
+                            continue  # Skip the "DETALLE DE MOVIMIENTOS" line itself
                 
-                # For Banorte, find "DETALLE DE MOVIMIENTOS (PESOS)"
-                if banorte_detalle_pattern and not detalle_found:
-                    if banorte_detalle_pattern.search(ln):
-                        detalle_found = True
-                        continue  # Skip the "DETALLE DE MOVIMIENTOS (PESOS)" line itself
+                    # For Banorte, find "DETALLE DE MOVIMIENTOS (PESOS)"
+                    if banorte_detalle_pattern and not detalle_found:
+                        if banorte_detalle_pattern.search(ln):
+                            detalle_found = True
+                            continue  # Skip the "DETALLE DE MOVIMIENTOS (PESOS)" line itself
                 
-                # After finding "DETALLE DE MOVIMIENTOS", skip the header line (for Inbursa)
-                if inbursa_detalle_pattern and detalle_found and not header_line_skipped:
-                    if inbursa_header_pattern and inbursa_header_pattern.search(ln):
-                        header_line_skipped = True
-                        continue  # Skip the header line
+                    # After finding "DETALLE DE MOVIMIENTOS", skip the header line (for Inbursa)
+                    if inbursa_detalle_pattern and detalle_found and not header_line_skipped:
+                        if inbursa_header_pattern and inbursa_header_pattern.search(ln):
+                            header_line_skipped = True
+                            continue  # Skip the header line
                 
-                # After finding "DETALLE DE MOVIMIENTOS" and skipping header for Inbursa, or for Banorte, or for other banks, look for date/header
-                if (inbursa_detalle_pattern and detalle_found and header_line_skipped) or (banorte_detalle_pattern and detalle_found) or (not inbursa_detalle_pattern and not banorte_detalle_pattern):
-                    # For Inbursa, only look for dates (not headers, as we already skipped the header line)
-                    if inbursa_detalle_pattern:
-                        # For Inbursa, only start when we find a date (actual movement row)
-                        if day_re.search(ln):
-                            movement_start_found = True
-                            movement_start_page = p['page']
-                            movement_start_index = i
-                            # collect from this line onward in this page
-                            movements_lines.extend(p['lines'][i:])
-                            break
-                    elif banorte_detalle_pattern:
-                        # For Banorte, start when we find a date (actual movement row)
-                        if day_re.search(ln):
-                            movement_start_found = True
-                            movement_start_page = p['page']
-                            movement_start_index = i
-                            # collect from this line onward in this page
-                            movements_lines.extend(p['lines'][i:])
-                            break
-                    else:
-                        # For other banks, look for date or header
-                        if day_re.search(ln) or header_keywords_re.search(ln):
-                            movement_start_found = True
-                            movement_start_page = p['page']
-                            movement_start_index = i
-                            # collect from this line onward in this page
-                            movements_lines.extend(p['lines'][i:])
-                            break
-        else:
-            movements_lines.extend(p['lines'])
+                    # After finding "DETALLE DE MOVIMIENTOS" and skipping header for Inbursa, or for Banorte, or for other banks, look for date/header
+                    if (inbursa_detalle_pattern and detalle_found and header_line_skipped) or (banorte_detalle_pattern and detalle_found) or (not inbursa_detalle_pattern and not banorte_detalle_pattern):
+                        # For Inbursa, only look for dates (not headers, as we already skipped the header line)
+                        if inbursa_detalle_pattern:
+                            # For Inbursa, only start when we find a date (actual movement row)
+                            if DATE_RE.search(ln):
+                                movement_start_found = True
+                                movement_start_page = p['page']
+                                movement_start_index = i
+                                # collect from this line onward in this page
+                                movements_lines.extend(p['lines'][i:])
+                                break
+                        elif banorte_detalle_pattern:
+                            # For Banorte, start when we find a date (actual movement row)
+                            if DATE_RE.search(ln):
+                                movement_start_found = True
+                                movement_start_page = p['page']
+                                movement_start_index = i
+                                # collect from this line onward in this page
+                                movements_lines.extend(p['lines'][i:])
+                                break
+                        else:
+                            # For other banks, look for date or header
+                            if DATE_RE.search(ln) or HEADER_KEYWORDS_RE.search(ln):
+                                movement_start_found = True
+                                movement_start_page = p['page']
+                                movement_start_index = i
+                                # collect from this line onward in this page
+                                movements_lines.extend(p['lines'][i:])
+                                break
+            else:
+                # Start found: later pages are only laid out when a stage asks for them
+                break
+        if movement_start_found:
+            break
+
+    # No column config for this bank: infer the columns from the first movement pages,
+    # so it goes through the coordinate engine like a configured bank
+    if not columns_config and movement_start_found:
+        sample = itertools.islice(doc.iter_pages(movement_start_page), LAYOUT_INFERENCE_PAGES)
+        inferred = infer_columns(page_word_rows(sample))
+        # Without a numeric column (amounts not told apart) the raw text path does better
+        if (inferred['rows'] >= LAYOUT_INFERENCE_MIN_ROWS
+                and any(col in inferred['columns'] for col in NUMERIC_COLUMNS)):
+            columns_config = bank_config['columns'] = inferred['columns']
+
+    # Remember this template's layout for the next statement like it, unless the bank was a guess
+    if (fingerprint and layout is None and movement_start_found and bank_source in ("metadata", "text")
+            and bank_confidence >= LAYOUT_MIN_CONFIDENCE):
+        page_cache.put_layout(fingerprint, detected_bank, columns_config, movement_start_page, *start_page_state)
+
+    def _collect_movements_lines():
+        """Lines from the movement start to the end of the scanned pages (text-based paths)."""
+        lines = list(movements_lines)
+        if movement_start_found:
+            for p in iter_pages_lines(doc.iter_pages(movement_start_page + 1)):
+                lines.extend(p['lines'])
+        return lines
 
     # build summary from first page (lines before movements start if movements begin on page 1)
-    if pages_lines:
-        first_page = pages_lines[0]
+    if doc.page_count:
+        first_page = split_pages_into_lines([{'page': 1, 'content': doc.page_text(0)}])[0]
         if movement_start_found and movement_start_page == first_page['page'] and movement_start_index is not None:
             summary_lines = first_page['lines'][:movement_start_index]
         else:
@@ -2162,9 +4369,10 @@ def main():
     # Special handling for Konfio: always use text-based extraction since data is not in fixed columns
     movement_rows = []  # Initialize to avoid UnboundLocalError
     df_mov = None  # Initialize to avoid UnboundLocalError
+    streamed_totals = None  # Totals of the movements already handed to options.on_movement
     if bank_config['name'] == 'Konfio':
         # Use text-based extraction for Konfio
-        movement_entries = group_entries_from_lines(movements_lines)
+        movement_entries = group_entries_from_lines(_collect_movements_lines())
         konfio_rows = []
         current_entry = None
         
@@ -2173,7 +4381,7 @@ def main():
                 continue
             
             # Pattern for Konfio date: "06 mar 2023"
-            date_match = date_pattern.search(entry)
+            date_match = DATE_RE.search(entry)
             if date_match:
                 # Save previous entry if exists
                 if current_entry:
@@ -2192,8 +4400,7 @@ def main():
                 
                 # Find amounts (with $ symbol or without)
                 # Pattern: $50,000.00 or 50,000.00
-                amount_pattern = re.compile(r'\$?\s*(\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2}))', re.I)
-                amounts = amount_pattern.findall(text_after_date)
+                amounts = CURRENCY_AMOUNT_RE.findall(text_after_date)
                 
                 # Remove amounts from description
                 desc_text = text_after_date
@@ -2237,8 +4444,7 @@ def main():
                 # Continuation line: append to current entry's description
                 if current_entry:
                     # Check if this line has an amount
-                    amount_pattern = re.compile(r'\$?\s*(\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2}))', re.I)
-                    amounts = amount_pattern.findall(entry)
+                    amounts = CURRENCY_AMOUNT_RE.findall(entry)
                     
                     if amounts:
                         # This line has an amount, assign it
@@ -2281,203 +4487,27 @@ def main():
             df_mov = pd.DataFrame(columns=['fecha', 'descripcion', 'cargos', 'abonos'])
     else:
         # For other banks, use coordinate-based extraction
-        movement_rows = []
-        # regex to detect decimal-like amounts (used to strip amounts from descriptions and detect amounts)
-        dec_amount_re = re.compile(r"\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2})")
         # Pattern to detect end of movements table for specific banks
-        movement_end_pattern = None
-        if bank_config['name'] == 'Banamex':
-            movement_end_pattern = re.compile(r'SALDO\s+MINIMO\s+REQUERIDO', re.I)
-        elif bank_config['name'] == 'Santander':
-            # Santander: "TOTAL 821,646.20 820,238.73 1,417.18" - indicates end of movements table
-            movement_end_pattern = re.compile(r'^TOTAL\s+[\d,\.]+\s+[\d,\.]+\s+[\d,\.]+', re.I)
-        elif bank_config['name'] == 'Banorte':
-            # Banorte: "INVERSION ENLACE NEGOCIOS" - indicates end of movements table
-            movement_end_pattern = re.compile(r'INVERSION\s+ENLACE\s+NEGOCIOS', re.I)
-        
-        extraction_stopped = False
-        for page_data in extracted_data:
-            if extraction_stopped:
-                break
-                
-            page_num = page_data['page']
-            words = page_data.get('words', [])
-            
-            if not words:
-                continue
-            
-            # Check if this page contains movements (page >= movement_start_page if found)
-            if movement_start_found and page_num < movement_start_page:
-                continue
-        
-            # Group words by row
-            # Use y_tolerance=3 for all banks to avoid grouping multiple movements into one row
-            # The split_row_if_multiple_movements function will handle cases where movements are still grouped
-            word_rows = group_words_by_row(words, y_tolerance=3)
-            
-            # Check if grouped rows contain multiple movements and split them
-            # This applies to all banks to ensure each movement is in its own row
-            if columns_config:
-                split_rows = []
-                for row_words in word_rows:
-                    if not row_words:
-                        continue
-                    
-                    # Use the generic function to split rows with multiple movements
-                    # Pass bank_name to enable bank-specific logic
-                    split_result = split_row_if_multiple_movements(row_words, columns_config, date_pattern, bank_config['name'])
-                    split_rows.extend(split_result)
-                
-                word_rows = split_rows
-            
-            for row_words in word_rows:
-                if not row_words or extraction_stopped:
-                    continue
-
-                # Check for end pattern (for Banamex, Santander, etc.)
-                if movement_end_pattern:
-                    all_text = ' '.join([w.get('text', '') for w in row_words])
-                    if movement_end_pattern.search(all_text):
-                        #print(f"🛑 Fin de tabla de movimientos detectado en página {page_num}")
-                        extraction_stopped = True
-                        break
-
-                # Extract structured row using coordinates
-                # Pass bank_name and date_pattern to enable date/description separation
-                row_data = extract_movement_row(row_words, columns_config, bank_config['name'], date_pattern)
-
-                # Determine if this row starts a new movement (contains a date)
-                # If columns_config is empty, check all words for dates
-                if not columns_config:
-                    # Check all words in the row for dates
-                    all_text = ' '.join([w.get('text', '') for w in row_words])
-                    has_date = bool(date_pattern.search(all_text))
-                    if has_date:
-                        # Create a basic row_data structure
-                        row_data = {'raw': all_text, '_amounts': row_data.get('_amounts', [])}
-                else:
-                    # A new movement begins when the 'fecha' column contains a date token.
-                    fecha_val = str(row_data.get('fecha') or '')
-                    has_date = bool(date_pattern.search(fecha_val))
-                    
-                # Check if row has valid data (date, description, or amounts)
-                has_valid_data = has_date
-                if not has_valid_data:
-                    # Check if row has description or amounts
-                    desc_val = str(row_data.get('descripcion') or '').strip()
-                    has_amounts = len(row_data.get('_amounts', [])) > 0
-                    has_cargos_abonos = bool(row_data.get('cargos') or row_data.get('abonos') or row_data.get('saldo'))
-                    has_valid_data = bool(desc_val or has_amounts or has_cargos_abonos)
-
-                if has_date:
-                    # Only add rows that have date AND (description OR amounts)
-                    # This ensures we don't add incomplete rows
-                    desc_val = str(row_data.get('descripcion') or '').strip()
-                    has_amounts = len(row_data.get('_amounts', [])) > 0
-                    has_cargos_abonos = bool(row_data.get('cargos') or row_data.get('abonos') or row_data.get('saldo'))
-                    has_description_or_amounts = bool(desc_val or has_amounts or has_cargos_abonos)
-                    
-                    if has_description_or_amounts:
-                        row_data['page'] = page_num
-                        movement_rows.append(row_data)
-                    # If row has date but no description/amounts, skip it (incomplete row)
-                elif has_valid_data:
-                    # Row has valid data but no date - treat as continuation or standalone row
-                    if movement_rows:
-                        # Continuation row: append description-like text and amounts to previous movement
-                        prev = movement_rows[-1]
-                        
-                        # First, capture amounts from continuation row and assign to appropriate columns
-                        cont_amounts = row_data.get('_amounts', [])
-                        if cont_amounts and columns_config:
-                            # Get description range to exclude amounts from it
-                            descripcion_range = None
-                            if 'descripcion' in columns_config:
-                                x0, x1 = columns_config['descripcion']
-                                descripcion_range = (x0, x1)
-                            
-                            # Get column ranges for numeric columns
-                            col_ranges = {}
-                            for col in ('cargos', 'abonos', 'saldo'):
-                                if col in columns_config:
-                                    x0, x1 = columns_config[col]
-                                    col_ranges[col] = (x0, x1)
-                            
-                            # Assign amounts from continuation row
-                            tolerance = 10
-                            for amt_text, center in cont_amounts:
-                                # Skip if amount is within description range
-                                if descripcion_range and descripcion_range[0] <= center <= descripcion_range[1]:
-                                    continue
-                                
-                                # Find which numeric column this amount belongs to
-                                assigned = False
-                                for col in ('cargos', 'abonos', 'saldo'):
-                                    if col in col_ranges:
-                                        x0, x1 = col_ranges[col]
-                                        if (x0 - tolerance) <= center <= (x1 + tolerance):
-                                            # Only assign if the column is empty or if this is a better match
-                                            existing = prev.get(col) or ''
-                                            if not existing or amt_text not in existing:
-                                                if existing:
-                                                    prev[col] = (existing + ' ' + amt_text).strip()
-                                                else:
-                                                    prev[col] = amt_text
-                                            assigned = True
-                                            break
-                                
-                                # If not assigned by range, use proximity as fallback
-                                if not assigned and col_ranges:
-                                    valid_cols = {}
-                                    for col in col_ranges.keys():
-                                        x0, x1 = col_ranges[col]
-                                        if center >= (x0 - 20) and center <= (x1 + 20):
-                                            col_center = (x0 + x1) / 2
-                                            valid_cols[col] = abs(center - col_center)
-                                    
-                                    if valid_cols:
-                                        nearest = min(valid_cols.keys(), key=lambda c: valid_cols[c])
-                                        if not descripcion_range or not (descripcion_range[0] <= center <= descripcion_range[1]):
-                                            existing = prev.get(nearest) or ''
-                                            if not existing or amt_text not in existing:
-                                                if existing:
-                                                    prev[nearest] = (existing + ' ' + amt_text).strip()
-                                                else:
-                                                    prev[nearest] = amt_text
-                        
-                        # Also merge amounts list for later processing
-                        prev_amounts = prev.get('_amounts', [])
-                        prev['_amounts'] = prev_amounts + cont_amounts
-                        
-                        # Collect possible text pieces from this row (prefer descripcion, then liq, then any other text)
-                        cont_parts = []
-                        for k in ('descripcion', 'fecha'):
-                            v = row_data.get(k)
-                            if v:
-                                cont_parts.append(str(v))
-                        # Also capture any stray text in other columns
-                        for k, v in row_data.items():
-                            if k in ('descripcion', 'fecha', 'cargos', 'abonos', 'saldo', 'page', '_amounts'):
-                                continue
-                            if v:
-                                cont_parts.append(str(v))
-
-                        cont_text = ' '.join(cont_parts)
-                        # Remove decimal amounts (they belong to cargos/abonos/saldo)
-                        cont_text = dec_amount_re.sub('', cont_text)
-                        cont_text = ' '.join(cont_text.split()).strip()
-
-                        if cont_text:
-                            # append to previous 'descripcion' field
-                            if prev.get('descripcion'):
-                                prev['descripcion'] = (prev.get('descripcion') or '') + ' ' + cont_text
-                            else:
-                                prev['descripcion'] = cont_text
-                    else:
-                        # No previous movement and no date - skip this row
-                        # Only rows with dates should be added to movements
-                        # Rows without dates are only used as continuation of previous rows
-                        pass
+        movement_end_pattern = MOVEMENT_END_PATTERNS.get(bank_config['name'])
+        # Only pages from the movement start on are laid out; each row is finalized as soon
+        # as the row engine hands it over
+        finalized_rows = finalize_movement_rows(
+            iter_movement_rows(doc, movement_start_page if movement_start_found else 1,
+                               columns_config, bank_config['name'], movement_end_pattern),
+            columns_config,
+            bank_config['name'],
+        )
+        if options.on_movement is not None:
+            # Hand over each movement as it is finalized instead of collecting movement_rows
+            track_saldo = bank_config['name'] != 'BBVA' and 'saldo' in columns_config
+            streamed_totals = emit_movement_records(
+                movement_records(finalized_rows, columns_config, bank_config['name']), options.on_movement, track_saldo
+            )
+            if not streamed_totals['total_movimientos']:
+                # Nothing came out of the row engine: fall back to raw text extraction below
+                streamed_totals = None
+        else:
+            movement_rows = list(finalized_rows)
 
     # Process summary lines to format them properly
     def format_summary_line(line):
@@ -2491,8 +4521,7 @@ def main():
         results = []
         
         # Pattern for "Periodo DEL [date] AL [date]" (case insensitive)
-        periodo_pattern = re.compile(r'periodo\s+del\s+(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s+al\s+(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})', re.I)
-        match = periodo_pattern.search(line)
+        match = SUMMARY_PERIODO_RE.search(line)
         if match:
             fecha_inicio = match.group(1)
             fecha_fin = match.group(2)
@@ -2501,8 +4530,7 @@ def main():
             return results
         
         # Pattern for "No. de Cuenta [number]" or "No. de Cliente [number]" (case insensitive)
-        cuenta_pattern = re.compile(r'(no\.?\s*de\s+(?:cuenta|cliente))\s+(.+)', re.I)
-        match = cuenta_pattern.search(line)
+        match = SUMMARY_CUENTA_RE.search(line)
         if match:
             titulo = match.group(1).strip()
             # Capitalize properly: "No. de Cuenta" or "No. de Cliente"
@@ -2517,8 +4545,7 @@ def main():
         # Pattern for lines with "/" that separate multiple concepts (e.g., "Retiros / Cargos (-) 73 1,120,719.64")
         # Look for pattern: "Title1 / Title2 (optional) number1 number2"
         # More flexible: allows for optional parentheses and various number formats
-        slash_pattern = re.compile(r'^([A-Za-z][A-Za-z\s]+?)\s*/\s*([A-Za-z][A-Za-z\s]*(?:\([^)]+\))?)\s+(\d+(?:,\d{3})*(?:\.\d{2})?)\s+([\d,\.\s]+)$', re.I)
-        match = slash_pattern.search(line)
+        match = SUMMARY_SLASH_RE.search(line)
         if match:
             title1 = match.group(1).strip()
             title2 = match.group(2).strip()
@@ -2532,7 +4559,7 @@ def main():
         # Don't split these
         is_company_name = (
             line.isupper() or 
-            re.search(r'\b(SA DE CV|S\.A\.|S\.A\. DE C\.V\.|S\.R\.L\.|INC\.|CORP\.|LLC)\b', line, re.I) or
+            SUMMARY_COMPANY_RE.search(line) or
             (len(line.split()) > 3 and not re.search(r'\d', line))  # Long text without numbers
         )
         if is_company_name:
@@ -2564,13 +4591,12 @@ def main():
             # Check if current is text and next is number (or vice versa)
             # Better number detection: allows for formatted numbers with commas and decimals
             # Pattern: digits with optional thousands separators (commas) and optional decimal part
-            num_pattern = re.compile(r'^\d{1,3}(?:,\d{3})*(?:\.\d{2})?$|^\d+(?:\.\d{2})?$')
-            current_is_num = bool(num_pattern.match(current))
-            next_is_num = bool(num_pattern.match(next_token))
+            current_is_num = bool(SUMMARY_NUMBER_TOKEN_RE.match(current))
+            next_is_num = bool(SUMMARY_NUMBER_TOKEN_RE.match(next_token))
             
             # Also check for date patterns
-            current_is_date = bool(re.match(r'^\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}$', current))
-            next_is_date = bool(re.match(r'^\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}$', next_token))
+            current_is_date = bool(SUMMARY_DATE_TOKEN_RE.match(current))
+            next_is_date = bool(SUMMARY_DATE_TOKEN_RE.match(next_token))
             
             # Split if: text->number, number->text, or text->date
             if (not current_is_num and not current_is_date and (next_is_num or next_is_date)):
@@ -2589,7 +4615,7 @@ def main():
             dato = ' '.join(tokens[split_idx:]).strip()
             
             # Clean up título (remove trailing special chars, add colon)
-            titulo = re.sub(r'[:\-]+$', '', titulo).strip()
+            titulo = TRAILING_PUNCT_RE.sub('', titulo).strip()
             if not titulo.endswith(':'):
                 titulo += ':'
             
@@ -2597,7 +4623,7 @@ def main():
             return results
         
         # Fallback: try to split on multiple spaces or first number
-        kv_match = re.match(r'^([A-Za-z][A-Za-z\s]+(?:de|del|la|el|los|las)?)\s{2,}(.+)$', line, re.I)
+        kv_match = SUMMARY_KV_RE.match(line)
         if kv_match:
             titulo = kv_match.group(1).strip()
             dato = kv_match.group(2).strip()
@@ -2607,13 +4633,13 @@ def main():
             return results
         
         # Try to split on first number or date
-        num_match = re.search(r'(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}|[\d,\.]+)', line)
+        num_match = SUMMARY_VALUE_RE.search(line)
         if num_match:
             split_pos = num_match.start()
             if split_pos > 0:
                 titulo = line[:split_pos].strip()
                 dato = line[split_pos:].strip()
-                titulo = re.sub(r'[:\-]+$', '', titulo).strip()
+                titulo = TRAILING_PUNCT_RE.sub('', titulo).strip()
                 if not titulo.endswith(':'):
                     titulo += ':'
                 results.append((titulo, dato))
@@ -2635,195 +4661,16 @@ def main():
     else:
         df_summary = pd.DataFrame({'Título': [], 'Dato': []})
     
-    # Reassign amounts to cargos/abonos/saldo by proximity when needed
-    # Only process movement_rows if we're not using Konfio (which already has df_mov created)
+    # Movement rows were finalized as they left the row engine
+    if streamed_totals is not None:
+        # The movements were already handed over; only the summary and validation remain
+        return streamed_result(df_summary, streamed_totals)
+    # Only use movement_rows if we're not using Konfio (which already has df_mov created)
     if movement_rows and bank_config['name'] != 'Konfio':
-        # prepare column centers and ranges
-        col_centers = {}
-        col_ranges = {}
-        descripcion_range = None
-        
-        # Get description range to exclude amounts from it
-        if 'descripcion' in columns_config:
-            x0, x1 = columns_config['descripcion']
-            descripcion_range = (x0, x1)
-        
-        for col in ('cargos', 'abonos', 'saldo'):
-            if col in columns_config:
-                x0, x1 = columns_config[col]
-                col_centers[col] = (x0 + x1) / 2
-                col_ranges[col] = (x0, x1)
-
-        for r in movement_rows:
-            amounts = r.get('_amounts', [])
-            if not amounts:
-                continue
-
-            # Check if columns already have values from initial extraction
-            # If they do, we should preserve them unless we find better matches
-            existing_cargos = r.get('cargos', '').strip()
-            existing_abonos = r.get('abonos', '').strip()
-            existing_saldo = r.get('saldo', '').strip()
-
-            # If columns already have numbers, keep them but prefer reassignment
-            # We'll assign each detected amount to the appropriate numeric column
-            # ONLY if it's within the column's coordinate range
-            for amt_text, center in amounts:
-                # Find which numeric column this amount belongs to based on coordinate range
-                # Use a small tolerance for edge cases (amounts near column boundaries)
-                tolerance = 10
-                assigned = False
-                
-                # First, check if amount is within any numeric column range
-                # This takes priority over description range check
-                for col in ('cargos', 'abonos', 'saldo'):
-                    if col in col_ranges:
-                        x0, x1 = col_ranges[col]
-                        # Check with tolerance to handle amounts slightly outside the range
-                        if (x0 - tolerance) <= center <= (x1 + tolerance):
-                            # Amount is within a numeric column range - assign it regardless of description range
-                            # Amount is within this column's range (with tolerance)
-                            existing = r.get(col, '').strip()
-                            # Check if this amount is already in the column (to avoid duplicates)
-                            if existing and amt_text in existing:
-                                assigned = True
-                                break
-                            # Only assign if column is empty or if this amount is not already there
-                            # IMPORTANT: Preserve existing values if they're already valid numbers
-                            if not existing:
-                                # Column is empty, assign the amount
-                                r[col] = amt_text
-                                assigned = True
-                                break
-                            elif amt_text not in existing:
-                                # Column has a value but this amount is different
-                                # Check if existing is a valid amount (has digits and decimal)
-                                if DEC_AMOUNT_RE.search(existing):
-                                    # Existing looks like a valid amount - preserve it
-                                    # Don't overwrite or append, just keep the existing value
-                                    # This preserves values extracted during initial coordinate-based extraction
-                                    assigned = True
-                                    break
-                                else:
-                                    # Existing doesn't look like an amount, replace it
-                                    r[col] = amt_text
-                                    assigned = True
-                                    break
-                            else:
-                                # Amount already in column
-                                assigned = True
-                                break
-                
-                # If not assigned by range, use proximity as fallback
-                # Only exclude from description range if it's NOT in any numeric column range
-                if not assigned and col_centers:
-                    # Calculate distances, but only consider columns that are reasonably close
-                    valid_cols = {}
-                    for col in col_centers.keys():
-                        if col in col_ranges:
-                            x0, x1 = col_ranges[col]
-                            # Only consider if center is reasonably close to the column
-                            if center >= (x0 - 20) and center <= (x1 + 20):
-                                valid_cols[col] = abs(center - col_centers[col])
-                    
-                    if valid_cols:
-                        nearest = min(valid_cols.keys(), key=lambda c: valid_cols[c])
-                        # Check if amount is in description range AND not in any numeric column
-                        # If it's close to a numeric column, assign it even if it's also in description range
-                        in_desc_range = descripcion_range and descripcion_range[0] <= center <= descripcion_range[1]
-                        in_num_range = False
-                        for col in col_ranges.keys():
-                            x0, x1 = col_ranges[col]
-                            if (x0 - 20) <= center <= (x1 + 20):
-                                in_num_range = True
-                                break
-                        
-                        # Only skip if in description range AND NOT in any numeric column range
-                        if not in_desc_range or in_num_range:
-                            existing = r.get(nearest, '').strip()
-                if existing:
-                    # If existing is a valid amount, preserve it
-                    if DEC_AMOUNT_RE.search(existing):
-                        # Existing is a valid amount, preserve it
-                        assigned = True
-                        break
-                    elif amt_text not in existing:
-                        r[nearest] = (existing + ' ' + amt_text).strip()
-                        assigned = True
-                        break
-                else:
-                    r[nearest] = amt_text
-                    assigned = True
-                    break
-                
-                # Only skip if amount is in description range AND NOT assigned to any numeric column
-                # This prevents amounts in cargos/abonos/saldo from being skipped
-                if not assigned and descripcion_range:
-                    if descripcion_range[0] <= center <= descripcion_range[1]:
-                        # Amount is in description range and wasn't assigned to any numeric column
-                        # Skip it to avoid assigning description amounts to numeric columns
-                        continue
-
-            # Remove amount tokens from descripcion if present
-            if r.get('descripcion'):
-                r['descripcion'] = DEC_AMOUNT_RE.sub('', r.get('descripcion'))
-
-            # cleanup helper key
-            if '_amounts' in r:
-                del r['_amounts']
-
-            # Debug: Print row data for BBVA to see what's happening with cargos
-            if bank_config['name'] == 'BBVA' and len([x for x in movement_rows if x.get('cargos')]) <= 5:  # Only print first 5 rows with cargos for debugging
-                cargos_val = r.get('cargos', '')
-                abonos_val = r.get('abonos', '')
-                saldo_val = r.get('saldo', '')
-                if cargos_val or abonos_val or saldo_val:
-                    pass
-                    # print(f"DEBUG BBVA Row: cargos='{cargos_val}', abonos='{abonos_val}', saldo='{saldo_val}'")
-        
-        # If columns_config was empty, we may have rows but without cargos/abonos/saldo
-        # Try to extract them from raw text or _amounts
-        if movement_rows and not columns_config and bank_config['name'] != 'BBVA':
-            has_saldo = 'saldo' in columns_config
-            for r in movement_rows:
-                # If row has 'raw', extract from it
-                if 'raw' in r and r.get('raw'):
-                    raw_text = str(r.get('raw'))
-                    amounts = DEC_AMOUNT_RE.findall(raw_text)
-                    if len(amounts) >= 3:
-                        r['cargos'] = amounts[-3]
-                        r['abonos'] = amounts[-2]
-                        if has_saldo:
-                            r['saldo'] = amounts[-1]
-                    elif len(amounts) == 2:
-                        r['abonos'] = amounts[0]
-                        if has_saldo:
-                            r['saldo'] = amounts[1]
-                    elif len(amounts) == 1:
-                        if has_saldo:
-                            r['saldo'] = amounts[0]
-                # If row has _amounts but no cargos/abonos/saldo, try to assign them
-                elif '_amounts' in r and r.get('_amounts'):
-                    amounts_list = [amt for amt, _ in r.get('_amounts', [])]
-                    if len(amounts_list) >= 3:
-                        r['cargos'] = amounts_list[-3]
-                        r['abonos'] = amounts_list[-2]
-                        if has_saldo:
-                            r['saldo'] = amounts_list[-1]
-                    elif len(amounts_list) == 2:
-                        r['abonos'] = amounts_list[0]
-                        if has_saldo:
-                            r['saldo'] = amounts_list[1]
-                    elif len(amounts_list) == 1:
-                        if has_saldo:
-                            r['saldo'] = amounts_list[0]
-
-        # Create df_mov from movement_rows if not already created
-        if df_mov is None:
-            df_mov = pd.DataFrame(movement_rows) if movement_rows else pd.DataFrame(columns=['fecha', 'descripcion', 'cargos', 'abonos', 'saldo'])
+        df_mov = pd.DataFrame(movement_rows)
     else:
         # No coordinate-based extraction available, use raw text extraction
-        movement_entries = group_entries_from_lines(movements_lines)
+        movement_entries = group_entries_from_lines(_collect_movements_lines())
         df_mov = pd.DataFrame({'raw': movement_entries})
         
         # For non-BBVA banks, try to extract Cargos, Abonos, Saldo from raw text
@@ -2897,23 +4744,6 @@ def main():
 
     # Split combined fecha values into two separate columns: Fecha Oper and Fecha Liq
     # Works for coordinate-based extraction (column 'fecha') and for fallback raw lines ('raw').
-    # Pattern for dates: supports multiple formats:
-    # - "DIA MES" (01 ABR)
-    # - "MES DIA" (ABR 01)
-    # - "DIA MES AÑO" (06 mar 2023) - for Konfio
-    date_pattern = re.compile(r"(?:(?:0[1-9]|[12][0-9]|3[01])(?:[\/\-\s])[A-Za-z]{3}(?:[\/\-\s]\d{2,4})?|[A-Za-z]{3}(?:[\/\-\s])(?:0[1-9]|[12][0-9]|3[01])|(?:0[1-9]|[12][0-9]|3[01])\s+[A-Za-z]{3}\s+\d{2,4})", re.I)
-
-    def _extract_two_dates(txt):
-        if not txt or not isinstance(txt, str):
-            return (None, None)
-        found = date_pattern.findall(txt)
-        if not found:
-            return (None, None)
-        if len(found) == 1:
-            return (found[0], None)
-        # If more than two, take first two
-        return (found[0], found[1])
-
     if 'fecha' in df_mov.columns:
         dates = df_mov['fecha'].astype(str).apply(_extract_two_dates)
     elif 'raw' in df_mov.columns:
@@ -2935,34 +4765,6 @@ def main():
 
     # For BBVA, split 'saldo' column into 'OPERACIÓN' and 'LIQUIDACIÓN'
     if bank_config['name'] == 'BBVA' and 'saldo' in df_mov.columns:
-        def _extract_two_amounts(txt):
-            """Extract two amounts from the saldo column (OPERACIÓN and LIQUIDACIÓN)."""
-            if not txt or not isinstance(txt, str):
-                return (None, None)
-            # Find all amounts matching the decimal pattern
-            amounts = DEC_AMOUNT_RE.findall(str(txt))
-            if len(amounts) >= 2:
-                # Check if both amounts are the same (normalize by removing separators)
-                # Normalize: remove commas, spaces, and compare numeric parts
-                def normalize_amount(amt):
-                    # Remove commas, spaces, keep only digits and decimal separator
-                    normalized = re.sub(r'[,\s]', '', amt)
-                    return normalized
-                
-                amt1_normalized = normalize_amount(amounts[0])
-                amt2_normalized = normalize_amount(amounts[1])
-                
-                if amt1_normalized == amt2_normalized:
-                    # If amounts are the same, return the same value for both columns
-                    return (amounts[0], amounts[0])
-                # Return first two amounts (first is LIQUIDACIÓN, second is OPERACIÓN)
-                return (amounts[0], amounts[1])
-            elif len(amounts) == 1:
-                # Only one amount found - assign it to both columns
-                return (amounts[0], amounts[0])
-            else:
-                return (None, None)
-        
         # Extract the two amounts from saldo column
         amounts = df_mov['saldo'].astype(str).apply(_extract_two_amounts)
         df_mov['OPERACIÓN'] = amounts.apply(lambda t: t[1])  # Second amount is OPERACIÓN
@@ -2973,8 +4775,6 @@ def main():
 
     # Merge 'liq' and 'descripcion' into a single 'Descripcion' column.
     # Remove any date tokens and decimal amounts from the description text.
-    dec_amount_re = re.compile(r"\d{1,3}(?:[\.,\s]\d{3})*(?:[\.,]\d{2})")
-    # date_pattern already defined above; reuse it
 
     def _build_description(row):
         parts = []
@@ -3003,7 +4803,7 @@ def main():
                 text = text.replace(str(fecha), '')
 
         # Remove decimal amounts (they belong to cargos/abonos/saldo)
-        text = dec_amount_re.sub('', text)
+        text = DEC_AMOUNT_RE.sub('', text)
 
         # Normalize whitespace
         text = ' '.join(text.split()).strip()
@@ -3050,6 +4850,9 @@ def main():
     if bank_config['name'] == 'BBVA' and 'Fecha Liq' in df_mov.columns:
         df_mov = df_mov.rename(columns={'Fecha Liq': 'Fecha Liq.'})
 
+    # Page of each movement, for the columnar output (only BBVA keeps it in the sheet)
+    movement_pages = df_mov['page'] if 'page' in df_mov.columns else None
+
     # Reorder columns according to bank type
     if bank_config['name'] == 'BBVA':
         # For BBVA: Fecha Oper, Fecha Liq., Descripción, Cargos, Abonos, Operación, Liquidación
@@ -3079,8 +4882,6 @@ def main():
         # Only keep the desired columns, remove all others
         df_mov = df_mov[desired_order]
 
-    print("📊 Exporting to Excel...")
-    
     # Filter summary/info rows from Movements for Banamex
     # These should not appear in Movements: "Saldo mínimo requerido", "COMISIONES COBRADAS"
     if bank_config['name'] == 'Banamex':
@@ -3111,8 +4912,17 @@ def main():
         if info_rows_to_remove:
             #print(f"   📝 Removiendo {len(info_rows_to_remove)} filas de información de Movements...")
             df_mov = df_mov.drop(index=info_rows_to_remove).reset_index(drop=True)
+            if movement_pages is not None:
+                movement_pages = movement_pages.drop(index=info_rows_to_remove).reset_index(drop=True)
             #print(f"   ✅ Filas removidas de Movements")
     
+    # on_movement on the text-based paths: the rows only exist once df_mov is complete
+    if options.on_movement is not None:
+        for record in frame_movement_records(df_mov, bank_config['name'], movement_pages):
+            options.on_movement(record)
+        return streamed_result(df_summary, calculate_extracted_totals(df_mov, bank_config['name']))
+    lap('movements')
+
     # Extract DIGITEM and Transferencias sections directly from PDF for Banamex
     # This must be done BEFORE calculating totals for validation
     df_transferencias = None
@@ -3121,10 +4931,10 @@ def main():
         # print("🔍 Extrayendo secciones DIGITEM y TRANSFERENCIA directamente del PDF...")
         
         # Extract DIGITEM section from PDF using same coordinate-based extraction as Movements
-        df_digitem = extract_digitem_section(pdf_path, columns_config)
+        df_digitem = extract_digitem_section(doc, columns_config)
         
         # Extract Transferencias section from PDF
-        df_transferencias = extract_transferencia_section(pdf_path)
+        df_transferencias = extract_transferencia_section(doc)
         
         # Add total row for DIGITEM if there are rows
         if df_digitem is not None and not df_digitem.empty and len(df_digitem) > 0:
@@ -3137,10 +4947,9 @@ def main():
             
             # Calculate total for Importe column
             try:
-                importe_values = df_digitem['Importe'].apply(lambda x: normalize_amount_str(x) if pd.notna(x) and str(x).strip() else 0.0)
-                total_importe = importe_values.sum()
+                total_importe = int(amounts_to_cents(df_digitem['Importe']).sum())
                 if total_importe > 0:
-                    total_row_digitem['Importe'] = f"{total_importe:,.2f}"
+                    total_row_digitem['Importe'] = format_cents(total_importe)
             except Exception as e:
                 pass
                 # print(f"⚠️  Error al calcular total de Importe en DIGITEM: {e}")
@@ -3165,28 +4974,24 @@ def main():
             # Calculate totals for all numeric columns
             try:
                 if 'Importe' in df_transferencias.columns:
-                    importe_values = df_transferencias['Importe'].apply(lambda x: normalize_amount_str(x) if pd.notna(x) and str(x).strip() else 0.0)
-                    total_importe = importe_values.sum()
+                    total_importe = int(amounts_to_cents(df_transferencias['Importe']).sum())
                     if total_importe > 0:
-                        total_row_transferencia['Importe'] = f"{total_importe:,.2f}"
+                        total_row_transferencia['Importe'] = format_cents(total_importe)
                 
                 if 'Comisiones' in df_transferencias.columns:
-                    comisiones_values = df_transferencias['Comisiones'].apply(lambda x: normalize_amount_str(x) if pd.notna(x) and str(x).strip() else 0.0)
-                    total_comisiones = comisiones_values.sum()
+                    total_comisiones = int(amounts_to_cents(df_transferencias['Comisiones']).sum())
                     if total_comisiones > 0:
-                        total_row_transferencia['Comisiones'] = f"{total_comisiones:,.2f}"
+                        total_row_transferencia['Comisiones'] = format_cents(total_comisiones)
                 
                 if 'I.V.A' in df_transferencias.columns:
-                    iva_values = df_transferencias['I.V.A'].apply(lambda x: normalize_amount_str(x) if pd.notna(x) and str(x).strip() else 0.0)
-                    total_iva = iva_values.sum()
+                    total_iva = int(amounts_to_cents(df_transferencias['I.V.A']).sum())
                     if total_iva > 0:
-                        total_row_transferencia['I.V.A'] = f"{total_iva:,.2f}"
+                        total_row_transferencia['I.V.A'] = format_cents(total_iva)
                 
                 if 'Total' in df_transferencias.columns:
-                    total_values = df_transferencias['Total'].apply(lambda x: normalize_amount_str(x) if pd.notna(x) and str(x).strip() else 0.0)
-                    total_total = total_values.sum()
+                    total_total = int(amounts_to_cents(df_transferencias['Total']).sum())
                     if total_total > 0:
-                        total_row_transferencia['Total'] = f"{total_total:,.2f}"
+                        total_row_transferencia['Total'] = format_cents(total_total)
             except Exception as e:
                 pass
                 # print(f"⚠️  Error al calcular totales en Transferencias: {e}")
@@ -3196,10 +5001,14 @@ def main():
             df_transferencias = pd.concat([df_transferencias, total_df_transferencia], ignore_index=True)
             #print(f"✅ Fila de totales agregada a Transferencias")
     
+    lap('sections')
+
     # Extract summary from PDF and calculate totals for validation
     # IMPORTANT: Calculate totals AFTER removing DIGITEM rows and BEFORE adding the "Total" row
     #print("🔍 Extrayendo información de resumen del PDF para validación...")
-    pdf_summary = extract_summary_from_pdf(pdf_path)
+    pdf_summary = extract_summary_from_pdf(doc, detected_bank)
+    # Year (and closing month) for movement dates that carry no year, used by the columnar output
+    statement_period = infer_statement_period(doc.page_text(0))
     extracted_totals = calculate_extracted_totals(df_mov, bank_config['name'])
     
     # Add a "Total" row at the end summing only "Abonos" and "Cargos" columns
@@ -3218,12 +5027,11 @@ def main():
         elif col in ['Abonos', 'Cargos']:
             # Only sum Abonos and Cargos columns
             try:
-                # Try to convert to numeric and sum
-                numeric_values = df_mov[col].apply(lambda x: normalize_amount_str(x) if pd.notna(x) and str(x).strip() else 0.0)
-                total = numeric_values.sum()
+                # Convert the whole column to integer cents and sum exactly
+                total = int(amounts_to_cents(df_mov[col]).sum())
                 if total > 0:
                     # Format as currency with 2 decimals
-                    total_row[col] = f"{total:,.2f}"
+                    total_row[col] = format_cents(total)
                 else:
                     total_row[col] = ''
             except:
@@ -3238,15 +5046,125 @@ def main():
     df_mov = pd.concat([df_mov, total_df], ignore_index=True)
     #print(f"✅ Fila de totales agregada (solo Abonos y Cargos)")
     
-    # Create validation sheet
-    #print("📋 Creando pestaña de validación...")
-    df_validation = create_validation_sheet(pdf_summary, extracted_totals)
-    #print(f"✅ DataFrame de validación creado con {len(df_validation)} filas")
-    #print(f"   Columnas: {list(df_validation.columns)}")
-    
-    # Print validation summary to console
-    print_validation_summary(pdf_summary, extracted_totals, df_validation)
-    
+    return result(df_summary, df_mov, df_digitem, df_transferencias, pdf_summary, extracted_totals,
+                  statement_period, movement_pages)
+
+
+def convert_statement(pdf_path: str, output_excel: str, use_cache: bool = True,
+                      page_workers: int = None, page_range: tuple = None,
+                      compact_words: bool = False, streaming: bool = False,
+                      formats: tuple = ("xlsx",), ndjson=None, ledger: str = None,
+                      bank_config_file: str = None) -> dict:
+    """
+    Parse one PDF statement with parse_statement and write its workbook to output_excel.
+    With page_workers, pages are laid out in that many worker processes first
+    (useful for statements with hundreds of pages); the output is identical.
+    page_range (1-based first, last) limits the pages scanned for movements.
+    compact_words keeps page words as PageWords arrays, cutting memory on big statements.
+    streaming writes the workbook with write_excel_streaming instead of pd.ExcelWriter.
+    formats selects the outputs: "xlsx" and/or the typed columnar "parquet" / "arrow" files.
+    ndjson, a text stream, replaces every file output: each movement is written to it as one
+    JSON line as soon as it is finalized, then a summary and a validation record.
+    ledger, a SQLite file path, also stores the statement in that LedgerStore; a PDF already
+    in it (same SHA-256) is not parsed again and nothing is written. ndjson runs keep no
+    movement tables, so they cannot be stored in a ledger.
+    bank_config_file, a JSON file saved by --calibrate, supplies calibrated column ranges.
+    Returns a run report: file, bank, pages, rows, validation status and seconds.
+    """
+    started = time.perf_counter()
+    if ndjson is not None and ledger:
+        raise ValueError("ndjson output cannot be stored in a ledger")
+
+    if ledger:
+        try:
+            store = LedgerStore(ledger)
+            try:
+                stored = store.statement(file_sha256(pdf_path))
+            finally:
+                store.close()
+        except sqlite3.Error:
+            stored = None  # Parse anyway; writing the ledger reports the error
+        if stored:
+            print(f"ℹ️  Statement already in ledger -> {ledger}")
+            return {
+                'file': pdf_path,
+                'bank': stored['bank'],
+                'detected_by': 'ledger',
+                'pages': stored['pages'],
+                'rows': stored['movements'],
+                'validation': stored['validation'],
+                'seconds': round(time.perf_counter() - started, 3),
+                'error': None,
+            }
+
+    print("Reading PDF...")
+    bank_configs = load_bank_config_file(bank_config_file) if bank_config_file else None
+    options = ParseOptions(
+        use_cache=use_cache,
+        page_workers=page_workers,
+        page_range=page_range,
+        compact_words=compact_words,
+        on_movement=(lambda record: write_ndjson_record(ndjson, record)) if ndjson is not None else None,
+        bank_configs=bank_configs,
+    )
+    result = parse_statement(pdf_path, options=options)
+    if result.bank_confidence:
+        print(f"🏦 Banco detectado: {result.bank}")
+    else:
+        print(f"⚠️  No se pudo detectar el banco, usando: {result.bank}")
+    if bank_config_file:
+        if result.bank in bank_configs:
+            print(f"📐 Columnas calibradas de {bank_config_file}")
+        else:
+            print(f"📐 Columnas integradas ({result.bank} no está en {bank_config_file})")
+
+    if ndjson is not None:
+        print_validation_summary(result.pdf_summary, result.extracted_totals, result.validation)
+        write_ndjson_tail(ndjson, result, os.path.basename(pdf_path))
+        error = None
+    else:
+        print("📊 Exporting to Excel...")
+        # Print validation summary to console
+        print_validation_summary(result.pdf_summary, result.extracted_totals, result.validation)
+        error = write_statement_outputs(
+            result, pdf_path, output_excel, streaming=streaming, formats=formats, ledger=ledger
+        )
+
+    return {
+        'file': pdf_path,
+        'bank': result.bank,
+        'detected_by': result.bank_source,
+        'pages': result.pages,
+        'rows': result.extracted_totals['total_movimientos'],
+        'validation': result.validation_status,
+        'seconds': round(time.perf_counter() - started, 3),
+        'error': error,
+    }
+
+
+def empty_validation_frame() -> pd.DataFrame:
+    """The minimal Data Validation sheet written when no validation could be built."""
+    return pd.DataFrame({
+        'Concepto': ['No se pudo crear la validación'],
+        'Valor en PDF': [''],
+        'Valor Extraído': [''],
+        'Diferencia': [''],
+        'Estado': ['⚠️']
+    })
+
+
+def write_statement_outputs(result: StatementResult, pdf_path: str, output_excel: str,
+                            streaming: bool = False, formats: tuple = ("xlsx",), ledger: str = None):
+    """Write a parsed statement's workbook, columnar files and ledger entry. Returns the last error, or None."""
+    bank = result.bank
+    df_summary = result.summary
+    df_mov = result.movements
+    df_digitem = result.digitem
+    df_transferencias = result.transferencias
+    df_validation = result.validation
+    statement_period = result.statement_period
+    movement_pages = result.movement_pages
+
     # Determine number of sheets to write
     num_sheets = 3  # Summary, Movements, Data Validation
     if df_transferencias is not None and not df_transferencias.empty:
@@ -3262,64 +5180,127 @@ def main():
         if df_digitem is not None and not df_digitem.empty:
             sheet_names += ", DIGITEM"
         #print(f"📝 Escribiendo Excel con {num_sheets} pestañas: {sheet_names}")
-        with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-            #print("   - Escribiendo pestaña 'Summary'...")
-            df_summary.to_excel(writer, sheet_name='Summary', index=False)
+        if 'xlsx' not in formats:
+            pass  # Only columnar files were requested (written below)
+        elif streaming:
+            # Same sheets in the same order, written row by row with a write-only workbook
+            sheets = [('Summary', df_summary), ('Movements', df_mov)]
+            if df_transferencias is not None and not df_transferencias.empty:
+                sheets.append(('Transferencias', df_transferencias))
+            if df_digitem is not None and not df_digitem.empty:
+                sheets.append(('DIGITEM', df_digitem))
+            has_validation = df_validation is not None and not df_validation.empty
+            sheets.append(('Data Validation', df_validation if has_validation else empty_validation_frame()))
+            write_excel_streaming(output_excel, sheets)
+        else:
+            with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
+                #print("   - Escribiendo pestaña 'Summary'...")
+                df_summary.to_excel(writer, sheet_name='Summary', index=False)
             
-            #print("   - Escribiendo pestaña 'Movements'...")
-            df_mov.to_excel(writer, sheet_name='Movements', index=False)
+                #print("   - Escribiendo pestaña 'Movements'...")
+                df_mov.to_excel(writer, sheet_name='Movements', index=False)
             
-            # Write Transferencias sheet if available
-            if df_transferencias is not None and not df_transferencias.empty:
-                #print("   - Escribiendo pestaña 'Transferencias'...")
-                df_transferencias.to_excel(writer, sheet_name='Transferencias', index=False)
-                #print(f"   ✅ Pestaña 'Transferencias' creada exitosamente con {len(df_transferencias)} filas")
+                # Write Transferencias sheet if available
+                if df_transferencias is not None and not df_transferencias.empty:
+                    #print("   - Escribiendo pestaña 'Transferencias'...")
+                    df_transferencias.to_excel(writer, sheet_name='Transferencias', index=False)
+                    #print(f"   ✅ Pestaña 'Transferencias' creada exitosamente con {len(df_transferencias)} filas")
             
-            # Write DIGITEM sheet if available
-            if df_digitem is not None and not df_digitem.empty:
-                # print("   - Escribiendo pestaña 'DIGITEM'...")
-                df_digitem.to_excel(writer, sheet_name='DIGITEM', index=False)
-                # print(f"   ✅ Pestaña 'DIGITEM' creada exitosamente con {len(df_digitem)} filas")
+                # Write DIGITEM sheet if available
+                if df_digitem is not None and not df_digitem.empty:
+                    # print("   - Escribiendo pestaña 'DIGITEM'...")
+                    df_digitem.to_excel(writer, sheet_name='DIGITEM', index=False)
+                    # print(f"   ✅ Pestaña 'DIGITEM' creada exitosamente con {len(df_digitem)} filas")
             
-            # Ensure validation DataFrame exists and is not empty
-            #print("   - Escribiendo pestaña 'Data Validation'...")
-            if df_validation is not None and not df_validation.empty:
-                try:
-                    df_validation.to_excel(writer, sheet_name='Data Validation', index=False)
-                    #print(f"   ✅ Pestaña 'Data Validation' creada exitosamente con {len(df_validation)} filas")
-                except Exception as e:
-                    pass
-                    # print(f"   ❌ Error al escribir pestaña 'Data Validation': {e}")
-                    # Try with a simpler name
+                # Ensure validation DataFrame exists and is not empty
+                #print("   - Escribiendo pestaña 'Data Validation'...")
+                if df_validation is not None and not df_validation.empty:
                     try:
-                        df_validation.to_excel(writer, sheet_name='Validation', index=False)
+                        df_validation.to_excel(writer, sheet_name='Data Validation', index=False)
+                        #print(f"   ✅ Pestaña 'Data Validation' creada exitosamente con {len(df_validation)} filas")
+                    except Exception as e:
                         pass
-                        # print(f"   ✅ Pestaña 'Validation' creada exitosamente (nombre alternativo)")
-                    except Exception as e2:
+                        # print(f"   ❌ Error al escribir pestaña 'Data Validation': {e}")
+                        # Try with a simpler name
+                        try:
+                            df_validation.to_excel(writer, sheet_name='Validation', index=False)
+                            pass
+                            # print(f"   ✅ Pestaña 'Validation' creada exitosamente (nombre alternativo)")
+                        except Exception as e2:
+                            pass
+                            # print(f"   ❌ Error también con nombre alternativo: {e2}")
+                else:
+                    #print("   ⚠️  DataFrame de validación está vacío o es None")
+                    # Create a minimal validation sheet even if empty
+                    empty_validation = empty_validation_frame()
+                    try:
+                        empty_validation.to_excel(writer, sheet_name='Data Validation', index=False)
+                        #print("   ✅ Pestaña 'Data Validation' creada con datos mínimos")
+                    except Exception as e:
                         pass
-                        # print(f"   ❌ Error también con nombre alternativo: {e2}")
-            else:
-                #print("   ⚠️  DataFrame de validación está vacío o es None")
-                # Create a minimal validation sheet even if empty
-                empty_validation = pd.DataFrame({
-                    'Concepto': ['No se pudo crear la validación'],
-                    'Valor en PDF': [''],
-                    'Valor Extraído': [''],
-                    'Diferencia': [''],
-                    'Estado': ['⚠️']
-                })
-                try:
-                    empty_validation.to_excel(writer, sheet_name='Data Validation', index=False)
-                    #print("   ✅ Pestaña 'Data Validation' creada con datos mínimos")
-                except Exception as e:
-                    pass
-                    # print(f"   ❌ Error al crear pestaña mínima: {e}")
+                        # print(f"   ❌ Error al crear pestaña mínima: {e}")
         
-        print(f"✅ Excel file created -> {output_excel}")
+        if 'xlsx' in formats:
+            print(f"✅ Excel file created -> {output_excel}")
+        error = None
     except Exception as e:
         print(f'❌ Error writing Excel: {e}')
         import traceback
         traceback.print_exc()
+        error = f'Error writing Excel: {e}'
+
+    # Typed tables, shared by the columnar files and the ledger
+    columnar_formats = [fmt for fmt in formats if fmt in COLUMNAR_EXTENSIONS]
+    if columnar_formats or ledger:
+        source_file = os.path.basename(pdf_path)
+        tables = {
+            'summary': typed_table(df_summary, bank, source_file),
+            'movements': typed_table(df_mov, bank, source_file, statement_period, movement_pages),
+        }
+        if df_transferencias is not None and not df_transferencias.empty:
+            tables['transferencias'] = typed_table(df_transferencias, bank, source_file, statement_period)
+        if df_digitem is not None and not df_digitem.empty:
+            tables['digitem'] = typed_table(df_digitem, bank, source_file, statement_period)
+        tables['validation'] = typed_table(df_validation, bank, source_file)
+
+    # Typed columnar files (Parquet / Arrow) next to the workbook
+    if columnar_formats:
+        output_base = os.path.splitext(output_excel)[0]
+        for fmt in columnar_formats:
+            try:
+                write_columnar(output_base, tables, fmt)
+                print(f"✅ {fmt.capitalize()} files created -> {output_base}.*{COLUMNAR_EXTENSIONS[fmt]}")
+            except ImportError:
+                print(f'❌ --format {fmt} requires pyarrow (pip install pyarrow)')
+                error = f'--format {fmt} requires pyarrow'
+            except Exception as e:
+                print(f'❌ Error writing {fmt} files: {e}')
+                error = f'Error writing {fmt} files: {e}'
+
+    # Ledger database: one transaction per statement, skipped when this PDF is already in it
+    if ledger:
+        try:
+            store = LedgerStore(ledger)
+            try:
+                added = store.add_statement(file_sha256(pdf_path), {
+                    'source_file': source_file,
+                    'bank': bank,
+                    'pages': result.pages,
+                    'period_year': statement_period[0],
+                    'period_month': statement_period[1],
+                    'validation': result.validation_status,
+                }, tables)
+            finally:
+                store.close()
+            if added:
+                print(f"✅ Ledger updated -> {ledger}")
+            else:
+                print(f"ℹ️  Statement already in ledger -> {ledger}")
+        except sqlite3.Error as e:
+            print(f'❌ Error writing ledger: {e}')
+            error = f'Error writing ledger: {e}'
+
+    return error
 
 
 if __name__ == "__main__":
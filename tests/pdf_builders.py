@@ -0,0 +1,76 @@
+"""Synthetic statement PDFs for the tests, built in memory without extra dependencies."""
+import random
+
+PAGE_HEIGHT = 792
+MONTHS = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN"]
+
+
+def pdf_bytes(fragments, font="Helvetica"):
+    """A one-page PDF drawing each (x, top, text, size) fragment in Helvetica, named font."""
+    return pages_pdf_bytes([fragments], font)
+
+
+def pages_pdf_bytes(pages, font="Helvetica"):
+    """A PDF with one page per list of (x, top, text, size) fragments (see pdf_bytes)."""
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    first_page = 4  # After the catalog, page tree and font: a page and its content stream per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % (first_page + 2 * n) for n in range(len(pages))), len(pages)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % font.encode(),
+    ]
+    for n, fragments in enumerate(pages):
+        stream = "\n".join(
+            f"BT /F1 {size} Tf {x:.2f} {PAGE_HEIGHT - top - size:.2f} Td ({escape(text)}) Tj ET"
+            for x, top, text, size in fragments
+        ).encode("latin-1")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (first_page + 2 * n + 1))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def statement_page(seed):
+    """Fragments of a statement page: summary, section markers, a header and dated rows."""
+    rng = random.Random(seed)
+    fragments = [
+        (30, 30, "ESTADO DE CUENTA", 9),
+        (30, 50, "Saldo Anterior $5,297.64", 7),
+        (30, 60, "( + ) 8 Depositos $344,527.26", 7),
+        (30, 80, "DETALLE DE MOVIMIENTOS (PESOS)", 8),
+        (20, 95, "FECHA", 7), (60, 95, "REFERENCIA", 7), (130, 95, "CONCEPTO", 7),
+        (280, 95, "CARGOS", 7), (350, 95, "ABONOS", 7), (430, 95, "SALDO", 7),
+    ]
+    top = 110
+    for i in range(45):
+        date = f"{rng.randint(1, 28):02d}-{rng.choice(MONTHS)}-23" if i % 3 else \
+            f"{rng.randint(1, 28):02d} {rng.choice(MONTHS)}"
+        # Fragments of one row drift a little vertically, as in real statements
+        row = [(20, date), (130, f"PAGO SPEI REF {rng.randint(1000, 9999)}"),
+               (rng.choice([280, 350]), f"{rng.uniform(10, 90000):,.2f}"), (430, f"{rng.uniform(10, 90000):,.2f}")]
+        for x, text in row:
+            fragments.append((x, top + rng.choice([0, 0, 0.4, -0.4, 1.2]), text, 7))
+        top += rng.choice([8, 9, 11])
+        if rng.random() < 0.3:
+            fragments.append((130, top, f"CONTINUACION TEXTO {i}", 7))
+            top += 8
+    fragments += [
+        (20, top + 10, "TOTALES: 1,000.00 2,000.00", 7),
+        (20, top + 24, "TRANSFERENCIA ELECTRONICA DE FONDOS", 7),
+        (20, top + 38, "SALDO MINIMO REQUERIDO 0.00", 7),
+        (20, top + 52, "TOTAL 821,646.20 820,238.73 1,417.18", 7),
+    ]
+    rng.shuffle(fragments)  # Drawing order differs from reading order
+    return fragments
@@ -0,0 +1,29 @@
+"""Page-1 font names name a bank only through whole name segments, and only as a hint."""
+import pytest
+
+import main
+from pdf_builders import pdf_bytes
+
+
+@pytest.mark.parametrize("font_name, banks", [
+    ("ABCDEF+BentonSansBBVA-Book", {"BBVA"}),
+    ("BanBajio-Bold", {"Banbajío"}),
+    ("Santander-Text", {"Santander"}),
+    ("Scotia-Bank", {"Scotiabank"}),
+    ("ClarendonBT-Roman", set()),
+    ("Heyday-Regular", set()),
+    ("KONFIO+Helvetica", set()),
+])
+def test_font_name_banks(font_name, banks):
+    assert main.font_name_banks([font_name]) == banks
+
+
+def test_font_only_bank_is_a_low_confidence_hint(tmp_path):
+    fragments = [(30, 30, "ESTADO DE CUENTA", 9), (30, 50, "Saldo Anterior $5,297.64", 7)]
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(pdf_bytes(fragments, font="ABCDEF+ClaraSans-Bold"))
+    assert main.detect_bank(str(path)) == ("Clara", main.BANK_FONT_CONFIDENCE, "fonts")
+
+    # Page text naming a bank outweighs the fonts
+    path.write_bytes(pdf_bytes(fragments + [(30, 70, "BANORTE", 7)], font="ABCDEF+ClaraSans-Bold"))
+    assert main.detect_bank(str(path))[::2] == ("Banorte", "text")
@@ -0,0 +1,80 @@
+"""cluster_rows must cut rows exactly where the original word-by-word walk did."""
+import random
+
+import pytest
+
+import main
+
+
+def reference_rows(tops, y_tolerance=5):
+    """
+    The original group_words_by_row walk, on indexes: sort by top (stably) and start a
+    new row whenever a top is more than y_tolerance from the current row's first top.
+    """
+    order = sorted(range(len(tops)), key=tops.__getitem__)
+    rows = []
+    current_row = []
+    current_y = None
+    for i in order:
+        if current_y is None:
+            current_y = tops[i]
+        if abs(tops[i] - current_y) <= y_tolerance:
+            current_row.append(i)
+        else:
+            if current_row:
+                rows.append(current_row)
+            current_row = [i]
+            current_y = tops[i]
+    if current_row:
+        rows.append(current_row)
+    return rows
+
+
+def clustered_rows(tops, y_tolerance):
+    order, bounds = main.cluster_rows(tops, y_tolerance)
+    order = order.tolist()
+    return [order[a:b] for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+
+def random_page_tops(rng, words):
+    """Tops of a synthetic page: text lines with jitter, ties, tight line spacing and strays."""
+    tops = []
+    y = rng.uniform(0, 50)
+    while len(tops) < words:
+        y += rng.choice([rng.uniform(1, 4), rng.uniform(4, 8), rng.uniform(8, 14)])
+        line = round(y, rng.choice([0, 1, 3]))
+        for _ in range(rng.randint(1, 12)):
+            tops.append(line + rng.choice([0, 0, 0, rng.uniform(-1.5, 1.5)]))
+    tops = tops[:words]
+    rng.shuffle(tops)
+    return tops
+
+
+@pytest.mark.parametrize("y_tolerance", [3, 5])
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_reference_walk(y_tolerance, seed):
+    rng = random.Random(seed)
+    tops = random_page_tops(rng, rng.choice([1, 7, 150, 2500]))
+    assert clustered_rows(tops, y_tolerance) == reference_rows(tops, y_tolerance)
+
+
+@pytest.mark.parametrize("y_tolerance", [3, 5])
+def test_boundary_and_chained_tops(y_tolerance):
+    # Exactly at the tolerance stays in the row; chains longer than it are cut from the anchor
+    tops = [0, y_tolerance, y_tolerance + 0.5, 2 * y_tolerance, 2 * y_tolerance + 0.01, 100, 100]
+    assert clustered_rows(tops, y_tolerance) == reference_rows(tops, y_tolerance)
+    chain = [i * 0.9 for i in range(60)]
+    assert clustered_rows(chain, y_tolerance) == reference_rows(chain, y_tolerance)
+
+
+def test_empty_page():
+    assert clustered_rows([], 5) == []
+
+
+@pytest.mark.parametrize("y_tolerance", [3, 5])
+def test_group_words_by_row_keeps_rows(y_tolerance):
+    rng = random.Random(y_tolerance)
+    tops = random_page_tops(rng, 500)
+    words = [{"text": str(i), "top": top} for i, top in enumerate(tops)]
+    expected = [[words[i] for i in row] for row in reference_rows(tops, y_tolerance)]
+    assert main.group_words_by_row(words, y_tolerance=y_tolerance) == expected
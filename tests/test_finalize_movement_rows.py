@@ -0,0 +1,34 @@
+"""finalize_movement_rows: amounts go to the numeric columns, never out of the description band."""
+import main
+
+BANORTE = main.BANK_CONFIGS["Banorte"]["columns"]
+
+
+def finalize(row):
+    return list(main.finalize_movement_rows([row], BANORTE, "Banorte"))
+
+
+def movement(descripcion, amounts, **columns):
+    row = {"fecha": "01-ENE-23", "descripcion": descripcion, "cargos": "", "abonos": "", "saldo": ""}
+    row.update(columns)
+    row["_amounts"] = amounts
+    return row
+
+
+def test_amount_in_description_band_is_left_out():
+    # 77 falls inside the description band and far from every numeric column
+    [row] = finalize(movement("PAGO 1,000.00", [("1,000.00", 77.0)], saldo="5.00"))
+    assert (row["cargos"], row["abonos"], row["saldo"]) == ("", "", "5.00")
+    assert row["descripcion"].strip() == "PAGO"
+    assert "_amounts" not in row
+
+
+def test_amounts_near_columns_are_assigned():
+    # 400 is inside the abonos range, 505 only within the wider tolerance of cargos
+    [row] = finalize(movement("PAGO", [("250.00", 400.0), ("1,000.00", 505.0)]))
+    assert (row["cargos"], row["abonos"]) == ("1,000.00", "250.00")
+
+
+def test_existing_amount_is_preserved():
+    [row] = finalize(movement("PAGO", [("9.99", 505.0)], cargos="1,000.00"))
+    assert row["cargos"] == "1,000.00"
@@ -0,0 +1,45 @@
+"""PageCache layouts: stored only for confident detections, dropped once stale."""
+import functools
+import sqlite3
+import time
+
+import main
+from pdf_builders import pdf_bytes, statement_page
+
+
+def stored_layouts(cache_dir):
+    with sqlite3.connect(str(cache_dir / "pages.sqlite3")) as conn:
+        return conn.execute("SELECT fingerprint, bank FROM layouts").fetchall()
+
+
+def parse_with_cache(path, *bank_lines):
+    path.write_bytes(pdf_bytes([(30, 15 + 8 * n, line, 7) for n, line in enumerate(bank_lines)]
+                               + statement_page(0)))
+    return main.parse_statement(str(path), options=main.ParseOptions(use_cache=True))
+
+
+def test_low_confidence_detection_is_not_remembered(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "PageCache", functools.partial(main.PageCache, str(tmp_path / "cache")))
+    result = parse_with_cache(tmp_path / "a.pdf", "BANORTE", "SANTANDER")
+    assert result.bank_source == "text" and result.bank_confidence < main.LAYOUT_MIN_CONFIDENCE
+    assert stored_layouts(tmp_path / "cache") == []
+
+    result = parse_with_cache(tmp_path / "b.pdf", "BANORTE")
+    assert result.bank_confidence >= main.LAYOUT_MIN_CONFIDENCE
+    assert [bank for _, bank in stored_layouts(tmp_path / "cache")] == ["Banorte"]
+
+
+def test_stale_layouts_are_evicted(tmp_path):
+    columns = main.BANK_CONFIGS["Banorte"]["columns"]
+    cache = main.PageCache(str(tmp_path))
+    cache.put_layout("old", "Banorte", columns, 0, False, False)
+    cache.put_layout("used", "Banorte", columns, 0, False, False)
+    cache.close()
+    stale = time.time() - main.PAGE_CACHE_LAYOUT_MAX_AGE - 60
+    with sqlite3.connect(str(tmp_path / "pages.sqlite3")) as conn:
+        conn.execute("UPDATE layouts SET last_used = ?", (stale,))
+
+    cache = main.PageCache(str(tmp_path))
+    assert cache.get_layout("used")["bank"] == "Banorte"  # Reading a layout keeps it fresh
+    cache.close()
+    assert stored_layouts(tmp_path) == [("used", "Banorte")]
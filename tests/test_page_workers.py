@@ -0,0 +1,21 @@
+"""Laying pages out in worker processes must not change what parse_statement returns."""
+import pandas.testing as pdt
+
+import main
+from pdf_builders import pages_pdf_bytes, statement_page
+
+
+def test_page_workers_match_serial_parse(tmp_path):
+    pages = [[(30, 20, "BANORTE", 9)] + statement_page(0)] + [statement_page(seed) for seed in range(1, 4)]
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(pages_pdf_bytes(pages))
+
+    serial = main.parse_statement(str(path), options=main.ParseOptions(page_workers=None))
+    parallel = main.parse_statement(str(path), options=main.ParseOptions(page_workers=2))
+
+    assert serial.bank == parallel.bank == "Banorte"
+    assert serial.pages == parallel.pages == 4
+    assert len(serial.movements) > 100
+    pdt.assert_frame_equal(serial.movements, parallel.movements)
+    pdt.assert_frame_equal(serial.summary, parallel.summary)
+    pdt.assert_frame_equal(serial.validation, parallel.validation)
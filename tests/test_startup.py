@@ -0,0 +1,52 @@
+"""
+Startup budget: the usage and --find paths must start fast and leave pandas unimported
+(pdfplumber, numpy and pandas are deferred until a stage needs them).
+"""
+import os
+import subprocess
+import sys
+import time
+
+from pdf_builders import pdf_bytes, statement_page
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+# Wall-clock budgets in seconds, generous enough for a loaded CI machine
+USAGE_BUDGET = 1.5
+FIND_BUDGET = 4.0
+
+
+def run_with_importtime(*args):
+    """Run main.py with -X importtime; returns (exit code, seconds, imported module names)."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", MAIN, *args],
+                          capture_output=True, text=True, timeout=60)
+    elapsed = time.perf_counter() - started
+    # "import time: self [us] | cumulative | imported package", the name indented by depth
+    modules = {line.rsplit("|", 1)[1].strip() for line in proc.stderr.splitlines()
+               if line.startswith("import time:") and line.count("|") == 2}
+    modules.discard("imported package")
+    return proc.returncode, elapsed, modules
+
+
+def imports(modules, package):
+    return any(name == package or name.startswith(package + ".") for name in modules)
+
+
+def test_usage_error_is_fast_and_light():
+    code, elapsed, modules = run_with_importtime()
+    assert code == 1
+    assert elapsed < USAGE_BUDGET
+    assert modules, "no -X importtime output"
+    for package in ("pandas", "numpy", "pdfplumber"):
+        assert not imports(modules, package), f"usage error imported {package}"
+
+
+def test_find_mode_skips_pandas(tmp_path):
+    pdf_path = tmp_path / "statement.pdf"
+    pdf_path.write_bytes(pdf_bytes(statement_page(0)))
+    code, elapsed, modules = run_with_importtime(str(pdf_path), "--find", "1")
+    assert code == 0
+    assert elapsed < FIND_BUDGET
+    assert imports(modules, "pdfplumber")
+    assert not imports(modules, "pandas"), "--find imported pandas"
@@ -0,0 +1,42 @@
+"""
+Lines rebuilt by text_from_words must look the same as page.extract_text() to the
+line-oriented detection: dates, movement headers and section start/end markers.
+"""
+import io
+
+import pdfplumber
+import pytest
+
+import main
+from pdf_builders import pdf_bytes, statement_page
+
+
+def detections(lines):
+    """Which lines each line-oriented detector matches."""
+    markers = {
+        "date": main.DATE_RE,
+        "header": main.HEADER_KEYWORDS_RE,
+        "transferencia": main.TRANSFERENCIA_RE,
+        "totales": main.TOTALES_RE,
+    }
+    for bank, patterns in main.MOVEMENT_START_PATTERNS.items():
+        for n, pattern in enumerate(patterns):
+            markers[f"start {bank} {n}"] = pattern
+    for bank, pattern in main.MOVEMENT_END_PATTERNS.items():
+        markers[f"end {bank}"] = pattern
+    return {name: [i for i, line in enumerate(lines) if pattern.search(line.strip())]
+            for name, pattern in markers.items()}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rebuilt_lines_match_extract_text_detection(seed):
+    with pdfplumber.open(io.BytesIO(pdf_bytes(statement_page(seed)))) as pdf:
+        page = pdf.pages[0]
+        expected = page.extract_text().split("\n")
+        rebuilt = main.text_from_words(page.extract_words(**main.WORD_EXTRACTION_PARAMS)).split("\n")
+
+    found = detections(rebuilt)
+    assert found == detections(expected)
+    # The page really exercises every kind of line
+    assert found["date"] and found["header"] and found["totales"] and found["transferencia"]
+    assert all(found[f"start {bank} 0"] for bank in main.MOVEMENT_START_PATTERNS)
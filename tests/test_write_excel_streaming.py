@@ -0,0 +1,27 @@
+"""The write-only workbook must hold the same sheets and cells as DataFrame.to_excel."""
+import openpyxl
+import pandas as pd
+
+import main
+
+
+def sheet_values(path):
+    workbook = openpyxl.load_workbook(path)
+    return {name: [list(row) for row in workbook[name].iter_rows(values_only=True)]
+            for name in workbook.sheetnames}
+
+
+def test_streaming_matches_excel_writer(tmp_path):
+    movements = pd.DataFrame({"Fecha": ["01-ENE-23", "02-ENE-23"], "Descripcion": ["PAGO", None],
+                              "Cargos": [1000.5, float("nan")], "Saldo": [5, 7]})
+    summary = pd.DataFrame({"Concepto": ["Saldo Anterior"], "Valor": ["5.00"]})
+    streamed, written = tmp_path / "streamed.xlsx", tmp_path / "written.xlsx"
+
+    main.write_excel_streaming(str(streamed), [("Summary", summary), ("Movements", movements)])
+    with pd.ExcelWriter(written, engine="openpyxl") as writer:
+        summary.to_excel(writer, sheet_name="Summary", index=False)
+        movements.to_excel(writer, sheet_name="Movements", index=False)
+
+    assert sheet_values(streamed) == sheet_values(written)
+    header = openpyxl.load_workbook(streamed)["Movements"]["A1"]
+    assert header.font.b and header.border.bottom.style == "thin"